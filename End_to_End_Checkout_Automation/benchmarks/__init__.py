@@ -0,0 +1 @@
+from benchmarks.checkout import CheckoutBenchmark
@@ -0,0 +1,103 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+from datetime import datetime
+from benchmarks.baseline import compare, load_baseline, save_baseline
+from benchmarks.checkout import CheckoutBenchmark
+from results.store import git_commit
+from stub_storefront import StubStorefront
+from utils.artifacts import artifacts
+from utils.config import Config
+from utils.driver_factory import DriverFactory
+from utils.data_store import TestDataStore
+from utils.worker import WorkerContext
+
+'''
+Checkout benchmark. Repeats the checkout flow, reports robust per-phase timings (median, MAD, p95),
+compares them with a stored baseline and exits non-zero when a phase regressed:
+    python -m benchmarks                      # against the local stub storefront
+    python -m benchmarks --update-baseline    # record a new baseline
+Runs against the bundled stub storefront by default so numbers are comparable across machines and commits.
+'''
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "checkout.json")
+
+def print_report(result, rows):
+    print("%-40s %10s %10s %10s %8s %10s %9s" % ("phase", "median(s)", "mad(s)", "p95(s)", "trips", "baseline", "change"))
+    by_phase = {row["phase"]: row for row in rows}
+    for phase, stats in result["phases"].items():
+        row = by_phase.get(phase, {})
+        baseline = "%.4f" % row["baseline"] if row.get("baseline") is not None else "-"
+        change = "%+.1f%%" % (row["change"] * 100) if row.get("change") is not None else "-"
+        flag = "  REGRESSION" if row.get("regressed") else ""
+        print("%-40s %10.4f %10.4f %10.4f %8.0f %10s %9s%s" % (phase, stats["median"], stats["mad"], stats["p95"], stats["round_trips"], baseline, change, flag))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the checkout flow and gate on regressions")
+    parser.add_argument("--iterations", type=int, default=Config.BENCHMARK_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=Config.BENCHMARK_WARMUP, help="iterations run first and discarded")
+    parser.add_argument("--base-url", default="local", help="storefront to benchmark, or 'local' for the stub storefront")
+    parser.add_argument("--driver-profile", default=Config.DRIVER_PROFILE, choices=sorted(DriverFactory.PROFILES))
+    parser.add_argument("--latency-ms", type=int, default=Config.STUB_LATENCY_MS, help="stub storefront page latency")
+    parser.add_argument("--ajax-latency-ms", type=int, default=Config.STUB_AJAX_LATENCY_MS, help="stub storefront AJAX latency")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to compare with / update")
+    parser.add_argument("--threshold", type=float, default=Config.BENCHMARK_THRESHOLD, help="allowed slowdown of a phase median, as a fraction")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - [%(levelname)s] - %(message)s")
+
+    test_data = TestDataStore.get().data
+    account = WorkerContext().account(test_data)
+    storefront = None
+    if args.base_url == "local":
+        accounts = test_data.get("accounts") or [test_data["credentials"]]
+        storefront = StubStorefront(accounts, latency_ms=args.latency_ms, ajax_latency_ms=args.ajax_latency_ms).start()
+        Config.BASE_URL = storefront.url
+    else:
+        Config.BASE_URL = args.base_url.rstrip("/")
+    try:
+        phases = CheckoutBenchmark(test_data, account, profile=args.driver_profile).run(args.iterations, args.warmup)
+    finally:
+        artifacts.close()
+        if storefront:
+            storefront.stop()
+
+    result = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "profile": args.driver_profile,
+            "base_url": args.base_url,
+            "latency_ms": [args.latency_ms, args.ajax_latency_ms] if storefront else None,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+        },
+        "phases": phases,
+    }
+    output = os.path.join(WorkerContext().output_dir("benchmarks"), "checkout-%s.json" % datetime.now().strftime("%Y%m%d_%H%M%S"))
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+    baseline = load_baseline(args.baseline)
+    rows = compare(result, baseline, args.threshold) if baseline else []
+    print_report(result, rows)
+    print("Results written to %s" % output)
+    if args.update_baseline:
+        save_baseline(args.baseline, result)
+        return 0
+    if baseline is None:
+        print("No baseline at %s; run with --update-baseline to record one" % args.baseline)
+        return 0
+    regressed = [row["phase"] for row in rows if row["regressed"]]
+    if regressed:
+        print("Regression beyond %.0f%% in: %s" % (args.threshold * 100, ", ".join(regressed)))
+        return 1
+    print("No regressions beyond %.0f%%" % (args.threshold * 100))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# A slowdown only counts when it is also clearly outside the run-to-run noise
+NOISE_FACTOR = 3.0
+MIN_DELTA_SECONDS = 0.005
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def save_baseline(path, result):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    logger.info("Baseline written to %s", path)
+
+def compare(result, baseline, threshold):
+    '''
+    Compare every phase's median with the baseline's. A phase regresses when its median is more than
+    `threshold` (a fraction) slower AND the difference exceeds NOISE_FACTOR times the larger of the two
+    MADs (and MIN_DELTA_SECONDS), so a noisy phase does not fail the run on jitter alone.
+    '''
+    for key in ("profile", "base_url"):
+        if baseline["meta"].get(key) != result["meta"].get(key):
+            logger.warning("Baseline was recorded with %s=%s, this run uses %s", key, baseline["meta"].get(key), result["meta"].get(key))
+    rows = []
+    for phase, current in result["phases"].items():
+        reference = baseline["phases"].get(phase)
+        if reference is None:
+            rows.append({"phase": phase, "baseline": None, "current": current["median"], "change": None, "regressed": False})
+            continue
+        delta = current["median"] - reference["median"]
+        change = delta / reference["median"] if reference["median"] else 0.0
+        noise = max(NOISE_FACTOR * max(current["mad"], reference["mad"]), MIN_DELTA_SECONDS)
+        rows.append({
+            "phase": phase,
+            "baseline": reference["median"],
+            "current": current["median"],
+            "change": change,
+            "regressed": change > threshold and delta > noise,
+        })
+    return rows
@@ -0,0 +1,47 @@
+import logging
+from flows.checkout import CheckoutFlow
+from utils.config import Config
+from utils.data_store import TestDataStore
+from utils.driver_factory import DriverFactory
+from utils.timing import instrument, step, timings
+from benchmarks.stats import describe
+
+logger = logging.getLogger(__name__)
+
+class CheckoutBenchmark:
+    '''
+    Runs the checkout flow repeatedly and times each phase: driver startup, login, add-to-cart per
+    product, cart validation, proceeding to checkout, each one-page-checkout step and order confirmation.
+    Every iteration starts a fresh browser and logs in through the form, so no state carries over
+    between samples. Phases are timed with utils.timing steps, the same ones the test reports use.
+    '''
+    def __init__(self, test_data, account, products=None, profile=None):
+        self.test_data = test_data
+        self.account = account
+        store = TestDataStore.get()
+        self.products = store.products() if products is None else [store.product(name) for name in products]
+        self.profile = profile or Config.DRIVER_PROFILE
+
+    def run(self, iterations, warmup=0):
+        """Run warmup + iterations checkouts; return robust statistics per phase for the measured ones."""
+        timings.reset()
+        for iteration in range(warmup + iterations):
+            if iteration == warmup:
+                # Warm-up iterations pay for first-time costs (caches, a customer's first address)
+                timings.reset()
+            logger.info("Benchmark iteration %d/%d%s", iteration + 1, warmup + iterations, " (warm-up)" if iteration < warmup else "")
+            self.run_once()
+        summary = timings.summary()["steps"]
+        return {
+            phase: dict(describe(samples), round_trips=summary[phase]["round_trips_p50"])
+            for phase, samples in timings.step_samples().items()
+        }
+
+    def run_once(self):
+        with step("Driver startup"):
+            driver = DriverFactory.get_driver(self.profile)
+        try:
+            instrument(driver)
+            CheckoutFlow(driver, self.test_data, self.account, self.products).run()
+        finally:
+            driver.quit()
@@ -0,0 +1,23 @@
+import statistics
+from utils.timing import percentile
+
+# Scales the median absolute deviation to the standard deviation of normally distributed samples
+MAD_SCALE = 1.4826
+
+def mad(samples):
+    """Median absolute deviation: a spread estimate that one slow outlier cannot inflate."""
+    if len(samples) < 2:
+        return 0.0
+    center = statistics.median(samples)
+    return MAD_SCALE * statistics.median(abs(sample - center) for sample in samples)
+
+def describe(samples):
+    """Robust summary of one phase's samples (seconds)."""
+    return {
+        "n": len(samples),
+        "median": round(statistics.median(samples), 6),
+        "mad": round(mad(samples), 6),
+        "p95": round(percentile(samples, 0.95), 6),
+        "min": round(min(samples), 6),
+        "max": round(max(samples), 6),
+    }
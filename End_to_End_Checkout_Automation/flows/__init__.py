@@ -0,0 +1 @@
+from flows.checkout import CheckoutFlow
@@ -0,0 +1,134 @@
+import logging
+from collections import namedtuple
+from functools import partial
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from pages.login_page import LoginPage
+from pages.home_page import HomePage
+from pages.search_and_add_multiple_products import SearchAndAddMultipleProducts
+from pages.cart_summary_page import CartSummaryPage
+from pages.checkout_page import CheckoutPage
+from pages.shipping_billing_address_page import ShippingBillingAdressPage
+from pages.submit_order_page import SubmitOrderPage
+from pages.order_completion_page import OrderCompletionPage
+from utils.cart_seeder import CartSeeder
+from utils.config import Config
+from utils.timing import step
+from utils.waits import PageSync
+
+logger = logging.getLogger(__name__)
+
+# One stage of the journey: its step name, the callable doing it, the cart items it adds, and
+# whether loading the URL it ends on brings its state back (not so inside the one-page checkout)
+Stage = namedtuple("Stage", ["name", "action", "cart", "restorable"], defaults=(True,))
+
+class CheckoutFlow:
+    '''
+    The checkout journey built from the page objects, as ordered stages:
+    Login, Add to cart (gift card and each product, or one HTTP seeding call), Cart validation,
+    Proceed to checkout, Checkout details (the one-page-checkout steps, each also timed by
+    ShippingBillingAdressPage) and Order confirmation.
+    run() times every stage as a step and calls `think` after it, e.g. to pause like a real shopper
+    would; the benchmark and the load generator use it. The pytest test runs the same stages as
+    checkpointed steps. Values later stages or the caller need (the expected order, the order
+    number) are kept in `data`.
+    '''
+    def __init__(self, driver, test_data, account, products, gift_card=True, think=None,
+                 session_cache=None, seed_cart=False, data=None):
+        self.driver = driver
+        self.test_data = test_data
+        self.account = account
+        self.products = products
+        self.gift_card = gift_card
+        self.think = think or (lambda: None)
+        self.session_cache = session_cache
+        self.seed_cart = seed_cart
+        self.data = {} if data is None else data
+        self.sync = PageSync(driver)
+
+    def stages(self):
+        stages = [Stage("Login", self.login, ())]
+        if self.gift_card:
+            stages.append(Stage("Add to cart: gift card", self.add_gift_card, ("Gift card",)))
+        if self.seed_cart:
+            # Not a test of search: fill the cart over HTTP and skip the UI round trips
+            stages.append(Stage("Seed cart over HTTP", self.seed_products, tuple(product["name"] for product in self.products)))
+        else:
+            for product in self.products:
+                stages.append(Stage("Add to cart: %s" % product["name"], partial(self.add_product, product), (product["name"],)))
+        stages.extend([
+            Stage("Cart validation", self.validate_cart, ()),
+            Stage("Proceed to checkout", self.proceed_to_checkout, ()),
+            Stage("Checkout details", self.enter_checkout_details, (), restorable=False),
+            Stage("Order confirmation", self.place_order, ()),
+        ])
+        return stages
+
+    def run(self):
+        for stage in self.stages():
+            with step(stage.name):
+                stage.action()
+            self.think()
+        return self.data
+
+    def login(self):
+        if self.session_cache is not None:
+            # Reuses the account's cached session when it is still valid, otherwise logs in through LoginPage
+            reused = self.session_cache.login(self.driver, self.account["email"], self.account["password"])
+            logger.info("Login successful (%s)", "cached session" if reused else "login form")
+        else:
+            self.driver.get(Config.BASE_URL + "/login")
+            LoginPage(self.driver).login(self.account["email"], self.account["password"])
+        WebDriverWait(self.driver, 10).until(EC.visibility_of_element_located((By.LINK_TEXT, "Log out")))
+
+    def add_gift_card(self):
+        home_page = HomePage(self.driver)
+        home_page.scroll_to_item()
+        page = self.sync.document()
+        home_page.choose_item()
+        self.sync.wait_for_new_page(page)
+        home_page.enter_recipent_information(self.account["recipient_name"], self.account["recipient_email"])
+        home_page.add_to_cart()
+        self.sync.wait_for_ajax_idle()
+        assert home_page.item_is_added_to_cart(), "Item not added to cart"
+        logger.info("Gift card added to cart")
+
+    def add_product(self, product):
+        logger.info("Processing product: %s", product["name"])
+        multiple_products = SearchAndAddMultipleProducts(self.driver)
+        multiple_products.search_and_select_product(product["name"])
+        multiple_products.scroll_to_item()
+        multiple_products.add_to_cart(product["add_to_cart_xpath"])
+        logger.info("Product '%s' added to cart", product["name"])
+
+    def seed_products(self):
+        CartSeeder(self.driver).seed(self.products)
+
+    def validate_cart(self):
+        cart_page = CartSummaryPage(self.driver)
+        cart_page.navigate_to_cart()
+        cart_details, subtotal = cart_page.validate_cart()
+        # What the order must contain, checked by the order ledger at the end of a test run
+        self.data["expected_order"] = {"lines": cart_details, "subtotal": subtotal}
+
+    def proceed_to_checkout(self):
+        checkout_page = CheckoutPage(self.driver)
+        checkout_page.agree_to_terms()
+        page = self.sync.document()
+        checkout_page.proceed_to_checkout()
+        self.sync.wait_for_new_page(page)
+        logger.info("Proceeded to checkout")
+
+    def enter_checkout_details(self):
+        # Billing address, Shipping address, Shipping method, Payment method, Payment information
+        ShippingBillingAdressPage(self.driver).enter_billing_address(self.test_data["shipping_billing_address"])
+
+    def place_order(self):
+        page = self.sync.document()
+        SubmitOrderPage(self.driver).submit_order()
+        # Confirming saves the order over AJAX, then the browser is sent to the completion page
+        self.sync.wait_for_new_page(page)
+        order = OrderCompletionPage(self.driver).confirm_and_validate_order()
+        self.data["order_number"] = order.order_number
+        logger.info("Order %s placed", order.order_number)
@@ -0,0 +1 @@
+from loadtest.runner import LoadRunner
@@ -0,0 +1,82 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from loadtest.runner import LoadRunner
+from stub_storefront import StubStorefront
+from utils.config import Config
+from utils.data_store import TestDataStore
+from utils.driver_factory import DriverFactory
+from utils.worker import WorkerContext
+
+'''
+Load generator: runs the checkout flow as concurrent virtual users and prints live throughput and
+per-step latency percentiles:
+    python -m loadtest --base-url https://shop.staging.example --users 20 --ramp-up 120 --think-time 2 --duration 900
+Only point it at a storefront you own. Each user needs a login; accounts come from test_data.json.
+'''
+def print_snapshot(snapshot):
+    print("[%7.1fs] users=%d orders=%d errors=%d orders/min=%.1f (last minute: %d)" % (
+        snapshot["elapsed_seconds"], snapshot["active_users"], snapshot["orders"], snapshot["errors"],
+        snapshot["orders_per_minute"], snapshot["orders_last_minute"]))
+    for name, stats in sorted(snapshot["steps"].items()):
+        print("    %-40s n=%-5d p50=%7.3fs p90=%7.3fs p99=%7.3fs" % (name, stats["count"], stats["p50_seconds"], stats["p90_seconds"], stats["p99_seconds"]))
+    for endpoint in snapshot.get("endpoints", []):
+        print("    %-40s active=%-3d started=%-5d failures=%-4d latency=%.1fms start=%.0fms%s" % (
+            endpoint["url"], endpoint["active_sessions"], endpoint["sessions_started"], endpoint["failures"],
+            endpoint["mean_latency_ms"], endpoint["mean_session_start_ms"], " (drained)" if endpoint["drained"] else ""))
+    sys.stdout.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the checkout flow as concurrent virtual users")
+    parser.add_argument("--base-url", default=Config.BASE_URL, help="storefront under load, or 'local' for the stub storefront")
+    parser.add_argument("--users", type=int, default=Config.LOAD_USERS, help="target number of concurrent virtual users")
+    parser.add_argument("--ramp-up", type=float, default=Config.LOAD_RAMP_UP, help="seconds over which users are started")
+    parser.add_argument("--think-time", type=float, default=Config.LOAD_THINK_TIME, help="mean pause (seconds) after each step")
+    parser.add_argument("--duration", type=float, default=Config.LOAD_DURATION, help="seconds to run, ramp-up included")
+    parser.add_argument("--report-interval", type=float, default=10, help="seconds between progress reports")
+    parser.add_argument("--driver-profile", default=Config.DRIVER_PROFILE, choices=sorted(DriverFactory.PROFILES))
+    parser.add_argument("--products", nargs="*", help="product names to buy (default: every product in the test data)")
+    parser.add_argument("--gift-card", action="store_true", help="also add the homepage gift card to every order")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - [%(levelname)s] - [%(threadName)s] - %(message)s")
+
+    store = TestDataStore.get()
+    test_data = store.data
+    base_account = WorkerContext().account(test_data)
+    accounts = [dict(base_account, **account) for account in test_data.get("accounts") or [base_account]]
+    products = store.products() if args.products is None else [store.product(name) for name in args.products]
+    if not all(products):
+        parser.error("unknown product in --products")
+    storefront = None
+    if args.base_url == "local":
+        storefront = StubStorefront(accounts, latency_ms=Config.STUB_LATENCY_MS, ajax_latency_ms=Config.STUB_AJAX_LATENCY_MS).start()
+        Config.BASE_URL = storefront.url
+    else:
+        Config.BASE_URL = args.base_url.rstrip("/")
+
+    runner = LoadRunner(
+        test_data, accounts, products, args.users, ramp_up=args.ramp_up, think_time=args.think_time,
+        duration=args.duration, profile=args.driver_profile, gift_card=args.gift_card,
+    )
+    try:
+        result = runner.run(report=print_snapshot, report_interval=args.report_interval)
+    except KeyboardInterrupt:
+        print("Stopping virtual users...")
+        runner.stop()
+        result = runner.stats.snapshot()
+    finally:
+        if storefront:
+            storefront.stop()
+    print("Final:")
+    print_snapshot(result)
+    output = os.path.join(WorkerContext().output_dir("loadtest"), "load-%s.json" % datetime.now().strftime("%Y%m%d_%H%M%S"))
+    with open(output, "w") as f:
+        json.dump(dict(result, base_url=args.base_url, users=args.users, ramp_up=args.ramp_up, think_time=args.think_time), f, indent=2)
+    print("Results written to %s" % output)
+    return 0 if result["orders"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from selenium.common.exceptions import WebDriverException
+from flows.checkout import CheckoutFlow
+from utils.driver_factory import DriverFactory
+from utils.dispatcher import dispatcher
+from utils.driver_pool import DriverPool
+from utils.timing import percentile, timings
+
+logger = logging.getLogger(__name__)
+
+def quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.warning("Error while quitting driver: %s", e)
+
+class LoadStats:
+    '''
+    Live counters of a load run: completed and failed checkouts, active users, and order rates.
+    Per-step latencies come from the shared timing recorder.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.orders = 0
+        self.errors = 0
+        self.active_users = 0
+        self._recent_orders = deque()
+
+    def order_completed(self):
+        with self._lock:
+            self.orders += 1
+            self._recent_orders.append(time.monotonic())
+
+    def order_failed(self):
+        with self._lock:
+            self.errors += 1
+
+    def user_started(self):
+        with self._lock:
+            self.active_users += 1
+
+    def user_stopped(self):
+        with self._lock:
+            self.active_users -= 1
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._recent_orders and now - self._recent_orders[0] > 60:
+                self._recent_orders.popleft()
+            elapsed = now - self.started
+            result = {
+                "elapsed_seconds": round(elapsed, 1),
+                "active_users": self.active_users,
+                "orders": self.orders,
+                "errors": self.errors,
+                "orders_per_minute": round(self.orders / elapsed * 60, 2) if elapsed else 0.0,
+                "orders_last_minute": len(self._recent_orders),
+            }
+        samples = timings.step_samples()
+        result["steps"] = {
+            name: {
+                "count": len(durations),
+                "p50_seconds": round(percentile(durations, 0.5), 3),
+                "p90_seconds": round(percentile(durations, 0.9), 3),
+                "p99_seconds": round(percentile(durations, 0.99), 3),
+            }
+            for name, durations in samples.items()
+        }
+        if dispatcher.enabled:
+            result["endpoints"] = dispatcher.report()
+        return result
+
+class LoadRunner:
+    '''
+    Runs the checkout flow as concurrent virtual users against one storefront.
+    Users are started evenly over `ramp_up` seconds up to `users`, each with its own browser and
+    account (accounts are reused round-robin when there are fewer accounts than users). Every user
+    loops through the checkout, pausing `think_time` seconds (+/-50% jitter) after each step, until
+    `duration` seconds have passed. A failed checkout is counted and the user continues with a fresh browser.
+    '''
+    def __init__(self, test_data, accounts, products, users, ramp_up=0, think_time=0, duration=60, profile=None, gift_card=False):
+        self.test_data = test_data
+        self.accounts = accounts
+        self.products = products
+        self.users = users
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.duration = duration
+        self.profile = profile
+        self.gift_card = gift_card
+        self.stats = LoadStats()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def run(self, report=None, report_interval=10):
+        """Run the load and call report(snapshot) every report_interval seconds; returns the final snapshot."""
+        if self.users > len(self.accounts):
+            logger.warning("%d users share %d account(s); users on the same account share a cart", self.users, len(self.accounts))
+        timings.reset()
+        self.stats = LoadStats()
+        deadline = time.monotonic() + self.duration
+        ramp = threading.Thread(target=self._ramp_up, args=(deadline,), name="vu-ramp-up", daemon=True)
+        ramp.start()
+        self._threads.append(ramp)
+        while not self._stop.wait(min(report_interval, max(deadline - time.monotonic(), 0))):
+            if report:
+                report(self.stats.snapshot())
+            if time.monotonic() >= deadline:
+                break
+        self.stop()
+        return self.stats.snapshot()
+
+    def stop(self):
+        self._stop.set()
+        # The ramp-up thread is first in the list, so no user thread is added after its turn
+        for thread in self._threads:
+            thread.join()
+
+    def _ramp_up(self, deadline):
+        interval = self.ramp_up / self.users if self.users else 0
+        for index in range(self.users):
+            if self._stop.wait(interval if index else 0) or time.monotonic() >= deadline:
+                return
+            thread = threading.Thread(target=self._user, args=(index, deadline), name="vu-%d" % index, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _think(self):
+        if self.think_time:
+            self._stop.wait(random.uniform(0.5, 1.5) * self.think_time)
+
+    def _user(self, index, deadline):
+        account = self.accounts[index % len(self.accounts)]
+        driver = None
+        self.stats.user_started()
+        try:
+            while not self._stop.is_set() and time.monotonic() < deadline:
+                if driver is None:
+                    try:
+                        driver = DriverFactory.get_driver(self.profile)
+                    except WebDriverException as e:
+                        logger.error("Virtual user %d could not start a browser: %s", index, e)
+                        self.stats.order_failed()
+                        self._stop.wait(5)
+                        continue
+                try:
+                    CheckoutFlow(driver, self.test_data, account, self.products, gift_card=self.gift_card, think=self._think).run()
+                    self.stats.order_completed()
+                except Exception as e:
+                    if self._stop.is_set():
+                        break
+                    logger.error("Virtual user %d checkout failed: %s", index, e)
+                    self.stats.order_failed()
+                    quit_driver(driver)
+                    driver = None
+                    continue
+                # Next shopper visit starts logged out with an empty browser
+                if not DriverPool.reset(driver):
+                    quit_driver(driver)
+                    driver = None
+        finally:
+            if driver is not None:
+                quit_driver(driver)
+            self.stats.user_stopped()
@@ -1,7 +1,9 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from utils.locators import locators
 import logging
+from utils.waits import PageSync
+from utils.page_metrics import page_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -13,58 +15,139 @@ class CartSummaryPage:
     def __init__(self, driver, wait_time=10):
         self.driver = driver
         self.wait = WebDriverWait(driver, wait_time)
-        self.cart_icon = (By.XPATH, "//span[normalize-space()='Shopping cart']")
+        self.sync = PageSync(driver)
+        self.cart_icon = locators.register(
+            "CartSummaryPage.cart_icon",
+            (By.CSS_SELECTOR, ".ico-cart .cart-label"),
+            (By.XPATH, "//span[normalize-space()='Shopping cart']"),
+        )
         self.cart_summary_section = (By.ID, "cart-table")  
         self.cart_items = (By.CSS_SELECTOR, "tr.cart-item-row")  
         self.product_name = (By.CSS_SELECTOR, ".product-name")
         self.unit_price = (By.CSS_SELECTOR, ".product-unit-price")
         self.quantity = (By.CSS_SELECTOR, ".qty-input")
         self.item_total = (By.CSS_SELECTOR, ".product-subtotal")
-        self.subtotal = (By.ID, "subtotal")
+        self.subtotal = locators.register("CartSummaryPage.subtotal", (By.ID, "subtotal"))
+        self._snapshot = None
+        self._snapshot_key = None
 
     def navigate_to_cart(self):
         logger.info("Navigating to cart page")
         self.driver.execute_script("window.scrollTo(0, 0);")  
-        cart_icon = self.wait.until(EC.element_to_be_clickable(self.cart_icon))
+        cart_icon = self.wait.until(self.cart_icon.clickable())
+        page = self.sync.document()
         cart_icon.click()
         logger.info("Cart icon clicked")
-        self.driver.implicitly_wait(10) 
+        self.sync.wait_for_new_page(page)
         logger.info("Cart page loaded successfully")
+        page_metrics.capture(self.driver, "Cart")
         
-    def get_item_count(self):
-        logger.info("Getting cart item count")
-        items = self.wait.until(EC.presence_of_all_elements_located(self.cart_items))
-        return len(items)
+    # Reads every cart row and the displayed subtotal in a single WebDriver call.
+    # A MutationObserver bumps a version counter whenever the cart DOM changes, and so do input/change
+    # events: typing in a qty input changes its value property, which no mutation reports. The qty
+    # values are part of the key as well, for values set from script without any event. If the caller
+    # already holds the current (token, version, quantities) the script returns null and the cached copy is reused.
+    CART_SNAPSHOT_SCRIPT = """
+        var known = arguments[0];
+        var state = window.__cartSnapshotState;
+        if (!state) {
+            state = window.__cartSnapshotState = {token: Math.random().toString(36).slice(2), version: 0};
+            var root = document.querySelector('.order-summary-content') || document.body;
+            new MutationObserver(function () { state.version++; })
+                .observe(root, {childList: true, subtree: true, characterData: true, attributes: true});
+            ['input', 'change'].forEach(function (type) {
+                document.addEventListener(type, function () { state.version++; }, true);
+            });
+        }
+        var quantities = Array.prototype.map.call(document.querySelectorAll('tr.cart-item-row .qty-input'), function (input) {
+            return input.value;
+        }).join('|');
+        if (known && known.token === state.token && known.version === state.version && known.quantities === quantities) {
+            return null;
+        }
+        function text(row, selector) {
+            var el = row.querySelector(selector);
+            return el ? el.innerText.trim() : null;
+        }
+        var rows = Array.prototype.map.call(document.querySelectorAll('tr.cart-item-row'), function (row) {
+            var qty = row.querySelector('.qty-input');
+            return {
+                name: text(row, '.product-name'),
+                qty: qty ? qty.value : null,
+                price: text(row, '.product-unit-price'),
+                total: text(row, '.product-subtotal')
+            };
+        });
+        var subtotal = document.getElementById('subtotal');
+        return {
+            token: state.token,
+            version: state.version,
+            quantities: quantities,
+            rows: rows,
+            subtotal: subtotal ? subtotal.innerText.trim() : null
+        };
+    """
 
-    def get_cart_details(self):
-        logger.info("Extracting cart details")
-        items = self.wait.until(EC.presence_of_all_elements_located(self.cart_items))
+    @staticmethod
+    def _parse_price(text):
+        return float(text.replace("$", "").replace(",", ""))
+
+    def get_cart_snapshot(self):
+        """
+        Return {"row_count", "items", "subtotal"} for the cart in one round trip.
+        The parsed result is memoized and only rebuilt when the cart DOM or a quantity has changed since the last call.
+        """
+        key = dict(zip(("token", "version", "quantities"), self._snapshot_key)) if self._snapshot else None
+        raw = self.driver.execute_script(self.CART_SNAPSHOT_SCRIPT, key)
+        if raw is None:
+            return self._snapshot
         cart_details = []
-        for item in items:
+        for row in raw["rows"]:
             try:
-                name = item.find_element(*self.product_name).text.strip()
-                qty = int(item.find_element(*self.quantity).get_attribute("value"))
-                price = float(item.find_element(*self.unit_price).text.replace("$", "").replace(",", ""))
-                total = float(item.find_element(*self.item_total).text.replace("$", "").replace(",", ""))
+                name = row["name"]
+                qty = int(row["qty"])
+                price = self._parse_price(row["price"])
+                total = self._parse_price(row["total"])
                 cart_details.append({"name": name, "qty": qty, "price": price, "total": total})
-                logger.info(f"Found item: {name}, Qty: {qty}, Price: ${price}, Total: ${total}")
+                logger.debug("Found item: %s, Qty: %s, Price: $%s, Total: $%s", name, qty, price, total)
             except Exception as e:
-                logger.error(f"Error processing item {name}: {str(e)}")
+                logger.error("Error processing item %s: %s", row.get('name'), e)
                 continue
-        return cart_details
+        subtotal = self._parse_price(raw["subtotal"]) if raw["subtotal"] else None
+        self._snapshot_key = (raw["token"], raw["version"], raw["quantities"])
+        self._snapshot = {"row_count": len(raw["rows"]), "items": cart_details, "subtotal": subtotal}
+        return self._snapshot
+
+    def _wait_for_snapshot(self):
+        # Same readiness condition as before: at least one cart row is present
+        def rows_present(driver):
+            snapshot = self.get_cart_snapshot()
+            return snapshot if snapshot["row_count"] else False
+        return self.wait.until(rows_present)
+
+    def get_item_count(self):
+        logger.info("Getting cart item count")
+        return self._wait_for_snapshot()["row_count"]
+
+    def get_cart_details(self):
+        logger.info("Extracting cart details")
+        return list(self._wait_for_snapshot()["items"])
 
     def validate_cart(self, expected_count=None):
         logger.info("Validating cart details")
         item_count = self.get_item_count()
         if expected_count is not None:
             assert item_count == expected_count, f"Expected {expected_count} items, but found {item_count}"
-        cart_details = self.get_cart_details()
+        snapshot = self._wait_for_snapshot()
+        cart_details = list(snapshot["items"])
         calculated_subtotal = sum(item["total"] for item in cart_details)
-        displayed_subtotal = float(self.wait.until(EC.presence_of_element_located(self.subtotal)).text.replace("$", "").replace(",", ""))
+        displayed_subtotal = snapshot["subtotal"]
+        if displayed_subtotal is None:
+            displayed_subtotal = self._parse_price(self.wait.until(self.subtotal.present()).text)
         assert len(cart_details) > 0, "No items found in cart"
         assert abs(displayed_subtotal - calculated_subtotal) < 0.01, \
             f"Subtotal mismatch: expected {calculated_subtotal}, got {displayed_subtotal}"  
-        logger.info(f"Cart validated successfully. Items: {item_count}, Details: {cart_details}, Subtotal: ${displayed_subtotal}")
+        logger.info("Cart validated successfully. Items: %s, Details: %s, Subtotal: $%s", item_count, cart_details, displayed_subtotal)
         return cart_details, displayed_subtotal
     
     def get_total_price(self):
@@ -73,6 +156,6 @@ class CartSummaryPage:
         """
         cart_details = self.get_cart_details()
         total_price = sum(item["total"] for item in cart_details)
-        logger.info(f"Total price of items in cart: ${total_price}")
+        logger.info("Total price of items in cart: $%s", total_price)
         return total_price 
     
\ No newline at end of file
@@ -2,7 +2,9 @@ import logging
 import re
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from utils.locators import locators
+from utils.artifacts import artifacts
+from utils.page_metrics import page_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -10,21 +12,32 @@ class OrderCompletionPage:
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
-        self.success_message = (By.XPATH, "//*[contains(text(), 'Your order has been successfully processed!')]")
-        self.order_number_element = (By.XPATH, "//*[contains(text(), 'Order number:')]")
-        self.order_details_link = (By.XPATH, "//a[contains(text(), 'Click here for order details')]")
+        self.success_message = locators.register(
+            "OrderCompletionPage.success_message",
+            (By.CSS_SELECTOR, ".order-completed .title strong"),
+            (By.XPATH, "//*[contains(text(), 'Your order has been successfully processed!')]"),
+        )
+        self.order_number_element = locators.register(
+            "OrderCompletionPage.order_number_element",
+            (By.CSS_SELECTOR, ".order-completed .details li:first-child"),
+            (By.XPATH, "//*[contains(text(), 'Order number:')]"),
+        )
+        self.order_number = None
 
     def confirm_and_validate_order(self):
         logger.info("Validating order completion page")
         '''
         Assert presence of success message and extract order number. 
+        The order's details are not opened here: the order ledger checks every order placed
+        during the run against the order history in one pass at the end.
         '''
         try:
-            success_message = self.wait.until(EC.presence_of_element_located(self.success_message))
+            success_message = self.wait.until(self.success_message.present())
             logger.info("Success message found: %s", success_message.text)
-            self.driver.save_screenshot('order_confirmation.png')
+            page_metrics.capture(self.driver, "Order completed")
+            artifacts.screenshot(self.driver, "Order confirmation", success=True)
             assert "Your order has been successfully processed!" in success_message.text, "Success message not found"
-            order_number_element = self.wait.until(EC.presence_of_element_located(self.order_number_element))
+            order_number_element = self.wait.until(self.order_number_element.present())
             order_number_text = order_number_element.text
             order_number_match = re.search(r'Order number:\s*(\d+)', order_number_text)
             if not order_number_match:
@@ -32,9 +45,7 @@ class OrderCompletionPage:
             order_number = order_number_match.group(1)
             logger.info("Extracted order number: %s", order_number)
             assert order_number.isdigit(), "Extracted order number is not a valid number: %s" % order_number
-            order_details_link = self.wait.until(EC.element_to_be_clickable(self.order_details_link))
-            order_details_link.click()
-            logger.info("Navigated to order details page for order number: %s", order_number)
+            self.order_number = order_number
             return self  # Return self to allow chaining 
         except Exception as e:
             logger.error("Order completion validation failed: %s", str(e))
@@ -0,0 +1,100 @@
+import logging
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from utils.config import Config
+from utils.page_metrics import page_metrics
+
+logger = logging.getLogger(__name__)
+
+class OrderHistoryPage:
+    '''
+    The account's order history (My account > Orders). Reads every listed order in one call, and the
+    lines of any number of orders in one more: their detail pages are fetched in parallel inside the
+    browser session and parsed there, so the browser never navigates to them.
+    '''
+    # Every order on the history page: number, status, total and the URL of its details page
+    ORDERS_SCRIPT = """
+        function number(text) {
+            var match = /-?[\\d,]+(\\.\\d+)?/.exec(text || '');
+            return match ? parseFloat(match[0].replace(/,/g, '')) : null;
+        }
+        var orders = {};
+        document.querySelectorAll('.order-list .order-item').forEach(function (item) {
+            var title = item.querySelector('.title');
+            var id = /(\\d+)/.exec(title ? title.textContent : '');
+            if (!id) { return; }
+            var info = {};
+            item.querySelectorAll('.info li').forEach(function (li) {
+                var parts = li.textContent.split(':');
+                info[parts[0].trim().toLowerCase()] = parts.slice(1).join(':').trim();
+            });
+            var button = item.querySelector('.order-details-button');
+            var link = /'([^']+)'/.exec(button ? button.getAttribute('onclick') || '' : '');
+            orders[id[1]] = {
+                status: info['order status'] || null,
+                total: number(info['order total']),
+                details_url: link ? link[1] : '/orderdetails/' + id[1]
+            };
+        });
+        return orders;
+    """
+    # Fetches the given order detail pages in parallel and returns {order number: [lines]}
+    ORDER_LINES_SCRIPT = """
+        var urls = arguments[0], done = arguments[arguments.length - 1];
+        function number(text) {
+            var match = /-?[\\d,]+(\\.\\d+)?/.exec(text || '');
+            return match ? parseFloat(match[0].replace(/,/g, '')) : null;
+        }
+        function text(row, selector) {
+            var cell = row.querySelector(selector);
+            if (!cell) { return null; }
+            var link = cell.querySelector('a');
+            return (link || cell).textContent.trim();
+        }
+        Promise.all(Object.keys(urls).map(function (order) {
+            return fetch(urls[order], {credentials: 'same-origin'})
+                .then(function (response) { return response.text(); })
+                .then(function (html) {
+                    var page = new DOMParser().parseFromString(html, 'text/html');
+                    var lines = [];
+                    page.querySelectorAll('.data-table tr').forEach(function (row) {
+                        var name = text(row, '.name');
+                        if (!name) { return; }
+                        lines.push({
+                            name: name,
+                            qty: number(text(row, '.quantity')),
+                            price: number(text(row, '.price')),
+                            total: number(text(row, '.total'))
+                        });
+                    });
+                    return [order, lines];
+                }, function (error) { return [order, null]; });
+        })).then(function (results) {
+            var byOrder = {};
+            results.forEach(function (result) { byOrder[result[0]] = result[1]; });
+            done(byOrder);
+        });
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.wait = WebDriverWait(driver, 10)
+
+    def open(self):
+        logger.info("Opening order history")
+        self.driver.get(Config.BASE_URL + "/customer/orders")
+        self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".order-list, .no-data")))
+        page_metrics.capture(self.driver, "Order history")
+        return self
+
+    def orders(self):
+        """{order number: {"status", "total", "details_url"}} for every order in the history."""
+        return self.driver.execute_script(self.ORDERS_SCRIPT)
+
+    def order_lines(self, details_urls):
+        """{order number: [{"name", "qty", "price", "total"}]} for {order number: details URL}; None where a page failed."""
+        if not details_urls:
+            return {}
+        self.driver.set_script_timeout(Config.SYNC_TIMEOUT)
+        return self.driver.execute_async_script(self.ORDER_LINES_SCRIPT, details_urls)
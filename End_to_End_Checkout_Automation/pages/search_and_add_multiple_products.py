@@ -3,8 +3,14 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.common.exceptions import TimeoutException
 import logging
-from utils.json_reader import JsonReader 
+from utils.data_store import TestDataStore
+from utils.config import Config
+from utils.locators import locators
+from utils.artifacts import artifacts
+from utils.page_metrics import page_metrics
+from utils.waits import PageSync
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +21,19 @@ class SearchAndAddMultipleProducts:
     def __init__(self, driver, wait_time=10):
         self.driver = driver
         self.wait = WebDriverWait(driver, wait_time)
-        self.search_field = (By.ID, "small-searchterms")
-        self.search_button = (By.XPATH, "//input[@value='Search']")
-        self.test_data = JsonReader.read_test_data("test_data.json")["products"]
+        self.search_field = locators.register("SearchAndAddMultipleProducts.search_field", (By.ID, "small-searchterms"))
+        self.search_button = locators.register(
+            "SearchAndAddMultipleProducts.search_button",
+            (By.CSS_SELECTOR, "input.search-box-button"),
+            (By.XPATH, "//input[@value='Search']"),
+        )
+        self.autocomplete_item = locators.register("SearchAndAddMultipleProducts.autocomplete_item", (By.CSS_SELECTOR, ".ui-autocomplete li"))
+        self.sync = PageSync(driver)
+        self.test_data = TestDataStore.get()
 
     def navigate_to_homepage(self):
         try:
-            homepage_url = "https://demowebshop.tricentis.com"
+            homepage_url = Config.BASE_URL + "/"
             if self.driver.current_url != homepage_url:
                 logger.info("Navigating to homepage")
                 self.driver.get(homepage_url)
@@ -29,60 +41,89 @@ class SearchAndAddMultipleProducts:
                     EC.presence_of_element_located((By.CSS_SELECTOR, ".header-logo"))
                 )
                 logger.info("Homepage loaded successfully")
+                page_metrics.capture(self.driver, "Home")
         except Exception as e:
-            logger.error(f"Error navigating to homepage: {e}")
+            logger.error("Error navigating to homepage: %s", e)
             raise
 
     def search_and_select_product(self, product_name):
         try:
-            logger.info(f"Searching for product: {product_name}")
+            logger.info("Searching for product: %s", product_name)
             self.navigate_to_homepage()
-            search_input = self.wait.until(EC.element_to_be_clickable(self.search_field))
+            search_input = self.wait.until(self.search_field.clickable())
             search_input.click()
             search_input.clear()
+            completed = self.sync.page_state()["completed"]
             search_input.send_keys(product_name)
-            try:
-                self.wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, ".ui-autocomplete")))
+            product = self.test_data.product(product_name)
+            expected_url = Config.BASE_URL + product["url"] if product else None
+            if self.wait_for_suggestions(completed) == "autocomplete":
                 search_input.send_keys(Keys.ARROW_DOWN)
                 search_input.send_keys(Keys.ENTER)
-                logger.info(f"Selected {product_name} from autocomplete")
-            except:
-                logger.info(f"No autocomplete for {product_name}, clicking search button")
-                search_button = self.wait.until(EC.element_to_be_clickable(self.search_button))
+                logger.info("Selected %s from autocomplete", product_name)
+                if expected_url:
+                    try:
+                        self.wait.until(EC.url_to_be(expected_url))
+                    except TimeoutException:
+                        pass
+            else:
+                logger.info("No autocomplete for %s, clicking search button", product_name)
+                search_button = self.wait.until(self.search_button.clickable())
                 search_button.click()
                 self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".product-title")))
-            expected_url = next(
-                (product["url"] for product in self.test_data if product["name"] == product_name),
-                None
-            )
-            if expected_url and self.driver.current_url != expected_url:
-                logger.warning(f"Unexpected URL: {self.driver.current_url}, expected: {expected_url}")
-            logger.info(f"Navigated to product page for: {product_name}")
+                page_metrics.capture(self.driver, "Search results")
+            if expected_url and self.driver.current_url == expected_url:
+                self.sync.wait_for_page_ready()
+                logger.info("Navigated to product page for: %s", product_name)
+                # Only the product page itself: the search results page is captured above under its own name
+                page_metrics.capture(self.driver, "Product")
+            else:
+                logger.warning("Unexpected URL: %s, expected: %s", self.driver.current_url, expected_url)
         except Exception as e:
-            logger.error(f"Error searching for product {product_name}: {e}")
-            self.driver.save_screenshot(f"error_search_{product_name.replace(' ', '_')}.png")
+            logger.error("Error searching for product %s: %s", product_name, e)
+            artifacts.screenshot(self.driver, f"Search error {product_name}")
             raise
 
+    def wait_for_suggestions(self, completed, timeout=10):
+        """
+        After typing a search term: "autocomplete" once suggestions are shown, or "no_suggestions" as soon
+        as the storefront answered the autocomplete request (a request finished after `completed`) without any.
+        Falls back to "no_suggestions" if neither is seen within the timeout.
+        """
+        answered = []
+
+        def no_suggestions(driver):
+            state = self.sync.page_state()
+            # The request can finish a moment before the menu is rendered: only trust two polls in a row
+            answered.append(state["completed"] > completed and state["pending"] == 0)
+            return answered[-2:] == [True, True]
+
+        try:
+            state, _ = self.sync.first_of({"autocomplete": self.autocomplete_item.visible(), "no_suggestions": no_suggestions}, timeout)
+        except TimeoutException:
+            return "no_suggestions"
+        return state
+
     def scroll_to_item(self):
         """Scroll to ensure the page is in view."""
         try:
             logger.info("Scrolling to view the page")
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         except Exception as e:
-            logger.error(f"Error scrolling: {e}")
+            logger.error("Error scrolling: %s", e)
             raise
 
     def add_to_cart(self, add_to_cart_xpath):
         try:
-            logger.info(f"Attempting to add product to cart with XPath: {add_to_cart_xpath}")
+            logger.info("Attempting to add product to cart with XPath: %s", add_to_cart_xpath)
             # Wait for the "Add to Cart" button to be clickable
-            cart_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, add_to_cart_xpath)))
+            cart_button = self.wait.until(locators.from_data("SearchAndAddMultipleProducts.add_to_cart", By.XPATH, add_to_cart_xpath).clickable())
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", cart_button)
             cart_button.click()
             logger.info("Successfully clicked Add to Cart button")
             self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".bar-notification.success")))
             logger.info("Product added to cart successfully")
         except Exception as e:
-            logger.error(f"Error adding product to cart with XPath {add_to_cart_xpath}: {e}")
-            self.driver.save_screenshot(f"error_add_to_cart_{add_to_cart_xpath.replace('/', '_')}.png")
+            logger.error("Error adding product to cart with XPath %s: %s", add_to_cart_xpath, e)
+            artifacts.screenshot(self.driver, f"Add to cart error {add_to_cart_xpath}")
             raise
\ No newline at end of file
@@ -6,7 +6,12 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import NoSuchElementException
 from selenium.common.exceptions import TimeoutException
-from utils.json_reader import JsonReader
+from utils.data_store import TestDataStore
+from utils.waits import PageSync
+from utils.form_filler import FormFiller
+from utils.locators import locators
+from utils.page_metrics import page_metrics
+from utils.timing import step
 
 logger = logging.getLogger(__name__)
 
@@ -16,140 +21,92 @@ class ShippingBillingAdressPage:
     This class allows entering billing address details, selecting shipping and payment methods,
     Uses a logic If the user is new or returning.
     '''
+    # Billing form field map for FormFiller: data key of the value -> data key of the locator
+    BILLING_ADDRESS_FIELDS = [
+        {"field": "first_name", "by": By.XPATH, "locator": "first_name_field_xpath"},
+        {"field": "last_name", "by": By.XPATH, "locator": "last_name_field_xpath"},
+        {"field": "email", "by": By.XPATH, "locator": "email_field_xpath"},
+        {"field": "country", "by": By.ID, "locator": "country_dropdown_id"},
+        {"field": "state", "by": By.ID, "locator": "state_dropdown_id", "depends_on": "country"},
+        {"field": "city", "by": By.XPATH, "locator": "city_field_xpath"},
+        {"field": "address1", "by": By.XPATH, "locator": "address1_field_xpath"},
+        {"field": "zip_code", "by": By.XPATH, "locator": "zip_code_field_xpath"},
+        {"field": "phone_number", "by": By.XPATH, "locator": "phone_number_field_xpath"},
+    ]
+
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
-        self.test_data = JsonReader.read_test_data("test_data.json")["shipping_billing_address"]
+        self.sync = PageSync(driver)
+        self.form_filler = FormFiller(driver, self.sync)
+        self.test_data = TestDataStore.get().section("shipping_billing_address")
+        self.billing_address_select = locators.from_data("ShippingBillingAdressPage.billing_address_select", By.XPATH, "//select[@id='billing-address-select']")
+        self.new_address_form = locators.register("ShippingBillingAdressPage.new_address_form", (By.ID, "BillingNewAddress_FirstName"))
 
     def enter_billing_address(self, address_data):
         logger.info("Entering billing address details")
+        page_metrics.capture(self.driver, "Checkout")
         try:
-            dropdown = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//select[@id='billing-address-select']")))
-            dropdown.click()
-            select = Select(dropdown)
-            select.select_by_visible_text("New Address")
-            logger.info("Selected 'New Address' from billing adress book dropdown")
-            first_name_field = WebDriverWait(self.driver, 10).until(EC.visibility_of_element_located((By.XPATH, address_data['first_name_field_xpath'])))
-            first_name_field.clear()
-            first_name_field.send_keys(address_data['first_name'])    
-            last_name_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['last_name_field_xpath'])))
-            last_name_field.clear()
-            last_name_field.send_keys(address_data['last_name'])      
-            email_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['email_field_xpath'])))
-            email_field.clear()
-            email_field.send_keys(address_data['email'])         
-            country_dropdown = self.wait.until(EC.element_to_be_clickable((By.ID, address_data['country_dropdown_id'])))
-            country_dropdown.click()
-            country_dropdown.send_keys(address_data['country'])
-            country_dropdown.send_keys(Keys.ENTER)
-            self.driver.implicitly_wait(10)  
-            state_dropdown = self.wait.until(EC.element_to_be_clickable((By.ID, address_data['state_dropdown_id'])))
-            state_dropdown.click()
-            state_dropdown.send_keys(Keys.ENTER)
-            self.driver.implicitly_wait(10)  
-            city_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['city_field_xpath'])))
-            city_field.clear()
-            city_field.send_keys(address_data['city'])
-            address1_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['address1_field_xpath'])))
-            address1_field.clear()  
-            address1_field.send_keys(address_data['address1'])
-            zip_code_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['zip_code_field_xpath'])))
-            zip_code_field.clear()
-            zip_code_field.send_keys(address_data['zip_code'])
-            phone_number_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['phone_number_field_xpath'])))
-            phone_number_field.clear()
-            phone_number_field.send_keys(address_data['phone_number'])
-            logger.info("Billing address details entered successfully")
-            adress_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='Billing.save()']")))
-            adress_continue_button.click()
-            self.driver.implicitly_wait(10)
-            logger.info("Entering Shipping Adress Details ")
-            shipping_adress_dropdown = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['shipping_address_dropdown_xpath']))) 
-            shipping_adress_dropdown.click()
-            shipping_adress_dropdown.send_keys(Keys.ENTER)
-            shipping_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='Shipping.save()']")))
-            shipping_continue_button.click()
-            logger.info("Shipping address details entered successfully")
-            logger.info("Selecting Shipping Method Details") 
-            shipping_method_radio = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['shipping_method_radio_xpath'])))
-            shipping_method_radio.click() 
-            shipping_method_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='ShippingMethod.save()']")))
-            shipping_method_continue_button.click()
-            logger.info("Shipping method selected successfully")            
-            logger.info("Selecting Payment Method Details")
-            payment_method_radio = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['payment_method_radio_xpath'])))
-            payment_method_radio.click()    
-            payment_method_radio_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='PaymentMethod.save()']")))
-            payment_method_radio_continue_button.click()                
-            payment_method_radio_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='PaymentInfo.save()']")))
-            payment_method_radio_continue_button.click()      
-            payment_info_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='ConfirmOrder.save()']")))   
-            payment_info_continue_button.click()
-            logger.info("Payment method selected successfully")
-            logger.info("Shipping and Billing Address Details entered Successfully ! ")
-            
-        except TimeoutException:
-            logger.error("Entering billing address details directly as a New User")
-            first_name_field = WebDriverWait(self.driver, 10).until(EC.visibility_of_element_located((By.XPATH, address_data['first_name_field_xpath'])))
-            first_name_field.clear()
-            first_name_field.send_keys(address_data['first_name'])        
-            last_name_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['last_name_field_xpath'])))
-            last_name_field.clear()
-            last_name_field.send_keys(address_data['last_name'])      
-            email_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['email_field_xpath'])))
-            email_field.clear()
-            email_field.send_keys(address_data['email'])         
-            country_dropdown = self.wait.until(EC.element_to_be_clickable((By.ID, address_data['country_dropdown_id'])))
-            country_dropdown.click()
-            country_dropdown.send_keys(address_data['country'])
-            country_dropdown.send_keys(Keys.ENTER)
-            self.driver.implicitly_wait(10)  
-            state_dropdown = self.wait.until(EC.element_to_be_clickable((By.ID, address_data['state_dropdown_id'])))
-            state_dropdown.click()
-            state_dropdown.send_keys(Keys.ENTER)
-            self.driver.implicitly_wait(10)  
-            city_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['city_field_xpath'])))
-            city_field.clear()
-            city_field.send_keys(address_data['city'])
-            address1_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['address1_field_xpath'])))
-            address1_field.clear()  
-            address1_field.send_keys(address_data['address1'])
-            zip_code_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['zip_code_field_xpath'])))
-            zip_code_field.clear()
-            zip_code_field.send_keys(address_data['zip_code'])
-            phone_number_field = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['phone_number_field_xpath'])))
-            phone_number_field.clear()
-            phone_number_field.send_keys(address_data['phone_number'])
-            logger.info("Billing address details entered successfully")
-            adress_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='Billing.save()']")))
-            adress_continue_button.click()
-            logger.info("Entering Shipping Adress Details ")
-            shipping_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='Shipping.save()']")))
-            shipping_continue_button.click()
-            logger.info("Shipping address details entered successfully")
-            logger.info("Selecting Shipping Method Details") 
-            shipping_method_radio = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['shipping_method_radio_xpath'])))
-            shipping_method_radio.click() 
-            shipping_method_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='ShippingMethod.save()']")))
-            shipping_method_continue_button.click()
-            logger.info("Shipping method selected successfully") 
-            logger.info("Selecting Payment Method Details")
-            payment_method_radio = self.wait.until(EC.element_to_be_clickable((By.XPATH, address_data['payment_method_radio_xpath'])))
-            payment_method_radio.click() 
-            payment_method_radio_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='PaymentMethod.save()']")))
-            self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", payment_method_radio_continue_button)
-            payment_method_radio_continue_button.click()    
-            payment_method_radio_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='PaymentInfo.save()']")))
-            payment_method_radio_continue_button.click()    
-            payment_info_continue_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@onclick='ConfirmOrder.save()']")))   
-            payment_info_continue_button.click()
-            logger.info("Payment method selected successfully")
+            with step("Billing address"):
+                returning_user = self.select_new_billing_address()
+                self.form_filler.fill(address_data, self.BILLING_ADDRESS_FIELDS)
+                logger.info("Billing address details entered successfully")
+                self.continue_to_step("Billing.save()", "shipping")
+            with step("Shipping address"):
+                logger.info("Entering Shipping Adress Details ")
+                if returning_user:
+                    shipping_adress_dropdown = self.wait.until(locators.from_data("ShippingBillingAdressPage.shipping_address_dropdown", By.XPATH, address_data['shipping_address_dropdown_xpath']).clickable())
+                    shipping_adress_dropdown.click()
+                    shipping_adress_dropdown.send_keys(Keys.ENTER)
+                self.continue_to_step("Shipping.save()", "shipping_method")
+                logger.info("Shipping address details entered successfully")
+            with step("Shipping method"):
+                logger.info("Selecting Shipping Method Details")
+                self.wait.until(locators.from_data("ShippingBillingAdressPage.shipping_method_radio", By.XPATH, address_data['shipping_method_radio_xpath']).clickable()).click()
+                self.continue_to_step("ShippingMethod.save()", "payment_method")
+                logger.info("Shipping method selected successfully")
+            with step("Payment method"):
+                logger.info("Selecting Payment Method Details")
+                self.wait.until(locators.from_data("ShippingBillingAdressPage.payment_method_radio", By.XPATH, address_data['payment_method_radio_xpath']).clickable()).click()
+                self.continue_to_step("PaymentMethod.save()", "payment_info")
+            with step("Payment information"):
+                self.continue_to_step("PaymentInfo.save()", "confirm_order")
+                logger.info("Payment method selected successfully")
             logger.info("Shipping and Billing Address Details entered Successfully ! ")
-          
         except Exception as e:
-            logger.error(f"An error occurred while entering billing address: {e}")
+            logger.error("An error occurred while entering billing address: %s", e)
             raise e
+
+    def select_new_billing_address(self):
+        """
+        Returning users have an address book dropdown: pick 'New Address' so the form is shown.
+        Returns True for a returning user, False when the form is shown directly (new user).
+        Whichever of the two the billing step shows first decides, so neither path waits out a timeout.
+        """
+        try:
+            state, dropdown = self.sync.first_of({
+                "returning_user": self.billing_address_select.clickable(),
+                "new_user": self.new_address_form.visible(),
+            }, timeout=10)
+        except TimeoutException:
+            logger.warning("Neither the billing address book nor the new address form appeared, assuming a new user")
+            return False
+        if state == "new_user":
+            logger.info("Entering billing address details directly as a New User")
+            return False
+        dropdown.click()
+        Select(dropdown).select_by_visible_text("New Address")
+        logger.info("Selected 'New Address' from billing adress book dropdown")
+        return True
+
+    def continue_to_step(self, save_call, next_step):
+        """Click the continue button that runs save_call and wait for next_step to become active."""
+        continue_button = self.wait.until(locators.from_data("ShippingBillingAdressPage.continue_button", By.XPATH, "//input[@onclick='%s']" % save_call).clickable())
+        continue_button.click()
+        self.sync.wait_for_checkout_step(next_step)
+        page_metrics.capture(self.driver, "Checkout: %s" % next_step)
+
     def click_continue(self):
         logger.info("Clicking continue button on billing address page")
         self.wait.until(EC.element_to_be_clickable(self.continue_button)).click()
-        logger.info("Continue button clicked")  
\ No newline at end of file
+        logger.info("Continue button clicked")
@@ -0,0 +1,2 @@
+from results.store import ResultsStore
+from results.recorder import RunResults
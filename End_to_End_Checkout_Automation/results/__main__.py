@@ -0,0 +1,103 @@
+import argparse
+import os
+import sys
+import time
+from results.report import write_report
+from results.store import ResultsStore
+from utils.config import Config
+
+'''
+Query the run history recorded by the test suite:
+    python -m results runs                         # latest runs with pass/fail counts
+    python -m results steps                        # every step's latest and trend-range durations
+    python -m results trend "Login to the application"
+    python -m results pages                        # storefront page metrics over the latest runs
+    python -m results report -o history.html       # static HTML report
+    python -m results prune --keep 1000
+'''
+def show_runs(store, args):
+    print("%6s  %-19s  %-9s  %5s  %6s  %6s  %10s" % ("run", "started", "commit", "tests", "passed", "failed", "test time"))
+    for run in store.recent_runs(args.limit):
+        print("%6d  %-19s  %-9s  %5d  %6d  %6d  %9.1fs" % (
+            run["id"], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"])), run["git_commit"] or "-",
+            run["tests"], run["passed"] or 0, run["failed"] or 0, run["duration"] or 0.0))
+
+def show_steps(store, args):
+    print("%-45s  %10s  %10s  %10s  %5s" % ("step", "latest(s)", "min(s)", "max(s)", "runs"))
+    for name in store.step_names(args.limit):
+        trend = [row["average"] for row in store.step_trend(name, args.limit)]
+        if trend:
+            print("%-45s  %10.3f  %10.3f  %10.3f  %5d" % (name, trend[-1], min(trend), max(trend), len(trend)))
+
+def show_trend(store, args):
+    print("%6s  %-19s  %-9s  %7s  %10s  %10s" % ("run", "started", "commit", "samples", "avg(s)", "max(s)"))
+    for row in store.step_trend(args.step, args.limit):
+        print("%6d  %-19s  %-9s  %7d  %10.3f  %10.3f" % (
+            row["run_id"], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["started"])), row["git_commit"] or "-",
+            row["samples"], row["average"], row["slowest"]))
+
+def show_pages(store, args):
+    def value(row, field, scale=1.0):
+        return "%10.1f" % (row[field] / scale) if row[field] is not None else "%10s" % "-"
+    print("%-30s  %5s  %10s  %10s  %10s  %10s  %10s  %10s" % ("page", "runs", "ttfb(ms)", "load(ms)", "lcp(ms)", "requests", "KB", "load range"))
+    for page in store.page_names(args.limit):
+        trend = store.page_trend(page, args.limit)
+        if not trend:
+            continue
+        latest = trend[-1]
+        loads = [row["load_ms"] for row in trend if row["load_ms"] is not None]
+        spread = "%.0f-%.0f" % (min(loads), max(loads)) if loads else "-"
+        print("%-30s  %5d  %s  %s  %s  %s  %s  %10s" % (
+            page, len(trend), value(latest, "ttfb_ms"), value(latest, "load_ms"), value(latest, "lcp_ms"),
+            value(latest, "requests"), value(latest, "transfer_bytes", 1024.0), spread))
+    latest_run = store.recent_runs(1)
+    if latest_run:
+        print("\nSlowest XHRs in run %d:" % latest_run[0]["id"])
+        for xhr in store.slowest_xhr(latest_run[0]["id"]):
+            print("%10.1f ms  %-24s  %s" % (xhr["duration_ms"], xhr["page"], xhr["url"]))
+
+def report(store, args):
+    print("Report written to %s" % write_report(store, args.output, args.limit))
+
+def prune(store, args):
+    print("Removed %d run(s)" % store.prune(args.keep))
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the test run history")
+    parser.add_argument("--db", default=Config.RESULTS_DB, help="results database (default: RESULTS_DB)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("runs", help="latest runs")
+    command.add_argument("--limit", type=int, default=20)
+    command.set_defaults(handler=show_runs)
+    command = commands.add_parser("steps", help="duration range of every step over the latest runs")
+    command.add_argument("--limit", type=int, default=50)
+    command.set_defaults(handler=show_steps)
+    command = commands.add_parser("trend", help="per-run duration of one step")
+    command.add_argument("step")
+    command.add_argument("--limit", type=int, default=50)
+    command.set_defaults(handler=show_trend)
+    command = commands.add_parser("pages", help="latest and ranged page metrics of every storefront page")
+    command.add_argument("--limit", type=int, default=50)
+    command.set_defaults(handler=show_pages)
+    command = commands.add_parser("report", help="write the HTML history report")
+    command.add_argument("-o", "--output", default=os.path.join(Config.OUTPUT_DIR, "results_report.html"))
+    command.add_argument("--limit", type=int, default=50)
+    command.set_defaults(handler=report)
+    command = commands.add_parser("prune", help="keep only the newest runs")
+    command.add_argument("--keep", type=int, required=True, help="number of newest runs to keep; 0 deletes every run")
+    command.set_defaults(handler=prune)
+    args = parser.parse_args()
+    if args.command == "prune" and args.keep < 0:
+        parser.error("--keep must be 0 or more")
+    if not os.path.exists(args.db):
+        print("No results database at %s yet; run the tests first" % args.db)
+        return 1
+    store = ResultsStore(args.db)
+    try:
+        args.handler(store, args)
+    finally:
+        store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import os
+import uuid
+from results.store import ResultsStore
+from utils.worker import WorkerContext
+
+class RunResults:
+    '''
+    Appends every finished test of this process to the results store. The run row is created on the
+    first test, so the xdist controller (which runs no tests) does not create one; workers of the same
+    session share the run through xdist's test run uid.
+    '''
+    def __init__(self):
+        self.store = None
+        self.run_id = None
+
+    def record(self, item, started, steps, pages):
+        reports = getattr(item, "phase_reports", [])
+        if not reports:
+            return
+        self._start(item.config)
+        if any(report.failed for report in reports):
+            outcome = "failed"
+        elif any(report.skipped for report in reports):
+            outcome = "skipped"
+        else:
+            outcome = "passed"
+        message = "\n".join(report.longreprtext for report in reports if report.failed)[:4000] or None
+        self.store.add_test(
+            self.run_id, item.nodeid, outcome, started, sum(report.duration for report in reports),
+            worker=WorkerContext().worker_id, message=message, steps=steps, artifacts=getattr(item, "artifact_paths", []),
+            pages=pages,
+        )
+
+    def record_check(self, config, name, outcome, started, duration, message=None, artifacts=()):
+        """Record a check that is not a test item (e.g. the order reconciliation) like a test."""
+        self._start(config)
+        self.store.add_test(
+            self.run_id, name, outcome, started, duration,
+            worker=WorkerContext().worker_id, message=message, artifacts=list(artifacts),
+        )
+
+    def _start(self, config):
+        if self.store is None:
+            self.store = ResultsStore()
+            uid = os.getenv("PYTEST_XDIST_TESTRUNUID") or uuid.uuid4().hex
+            self.run_id = self.store.start_run(uid, config.getoption("--base-url"), config.getoption("--driver-profile"))
+
+    def finish(self):
+        if self.store is not None:
+            self.store.finish_run(self.run_id)
+            self.store.close()
+            self.store = None
@@ -0,0 +1,92 @@
+import time
+from html import escape
+
+'''
+Small static HTML report built from the results store: recent runs, a duration trend per step
+(inline SVG, no scripts or external assets), storefront page metrics per page and the failures of the latest run.
+'''
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Checkout test history</title>
+<style>
+body {font-family: sans-serif; margin: 2em; color: #222}
+table {border-collapse: collapse; margin-bottom: 2em}
+th, td {border: 1px solid #ccc; padding: 4px 8px; text-align: left; font-size: 13px}
+.failed {color: #b00020} .passed {color: #1b5e20}
+polyline {fill: none; stroke: #1565c0; stroke-width: 1.5}
+pre {white-space: pre-wrap; font-size: 12px; max-width: 100em}
+</style></head><body>
+<h1>Checkout test history</h1>
+<p>Generated %(generated)s from %(path)s</p>
+<h2>Recent runs</h2>
+<table><tr><th>Run</th><th>Started</th><th>Commit</th><th>Storefront</th><th>Profile</th><th>Tests</th><th>Passed</th><th>Failed</th><th>Test time (s)</th></tr>
+%(runs)s</table>
+<h2>Step duration trends (last %(limit)d runs)</h2>
+<table><tr><th>Step</th><th>Trend</th><th>Latest avg (s)</th><th>Min avg (s)</th><th>Max avg (s)</th><th>Runs</th></tr>
+%(steps)s</table>
+<h2>Storefront page load trends (last %(limit)d runs)</h2>
+<table><tr><th>Page</th><th>Load trend</th><th>Latest load (ms)</th><th>Latest TTFB (ms)</th><th>Latest LCP (ms)</th><th>Requests</th><th>Transferred (KB)</th><th>Runs</th></tr>
+%(pages)s</table>
+<h2>Failures in the latest run</h2>
+%(failures)s
+</body></html>
+"""
+
+def _time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) if timestamp else "-"
+
+def _number(value):
+    return "%.1f" % value if value is not None else "-"
+
+def sparkline(values, width=240, height=40):
+    if len(values) < 2:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1.0
+    step = width / (len(values) - 1)
+    points = " ".join("%.1f,%.1f" % (i * step, height - 2 - (value - low) / span * (height - 4)) for i, value in enumerate(values))
+    return '<svg width="%d" height="%d"><polyline points="%s"/></svg>' % (width, height, points)
+
+def render(store, limit=50):
+    runs = "\n".join(
+        "<tr><td>%d</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%d</td><td class=\"passed\">%d</td><td class=\"failed\">%d</td><td>%.1f</td></tr>" % (
+            run["id"], _time(run["started"]), escape(run["git_commit"] or "-"), escape(run["base_url"] or "-"),
+            escape(run["profile"] or "-"), run["tests"], run["passed"] or 0, run["failed"] or 0, run["duration"] or 0.0)
+        for run in store.recent_runs(limit)
+    )
+    steps = []
+    for name in store.step_names(limit):
+        trend = [row["average"] for row in store.step_trend(name, limit)]
+        if trend:
+            steps.append("<tr><td>%s</td><td>%s</td><td>%.3f</td><td>%.3f</td><td>%.3f</td><td>%d</td></tr>" % (
+                escape(name), sparkline(trend), trend[-1], min(trend), max(trend), len(trend)))
+    pages = []
+    for page in store.page_names(limit):
+        trend = store.page_trend(page, limit)
+        if trend:
+            latest = trend[-1]
+            pages.append("<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%d</td></tr>" % (
+                escape(page), sparkline([row["load_ms"] for row in trend if row["load_ms"] is not None]),
+                _number(latest["load_ms"]), _number(latest["ttfb_ms"]), _number(latest["lcp_ms"]),
+                _number(latest["requests"]), _number(latest["transfer_bytes"] and latest["transfer_bytes"] / 1024.0), len(trend)))
+    latest = store.recent_runs(1)
+    failures = store.failures(latest[0]["id"]) if latest else []
+    failure_html = "\n".join(
+        "<h3 class=\"failed\">%s</h3><pre>%s</pre><p>%s</p>" % (
+            escape(test["nodeid"]), escape(test["message"] or ""),
+            "<br>".join(escape(path) for path in (test["artifact_paths"] or "").splitlines()))
+        for test in failures
+    ) or "<p>None</p>"
+    return PAGE % {
+        "generated": _time(time.time()),
+        "path": escape(store.path),
+        "limit": limit,
+        "runs": runs,
+        "steps": "\n".join(steps),
+        "pages": "\n".join(pages),
+        "failures": failure_html,
+    }
+
+def write_report(store, path, limit=50):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render(store, limit))
+    return path
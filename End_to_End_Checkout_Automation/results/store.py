@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    uid TEXT UNIQUE NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    git_commit TEXT,
+    base_url TEXT,
+    profile TEXT
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    nodeid TEXT NOT NULL,
+    worker TEXT,
+    outcome TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    message TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    name TEXT NOT NULL,
+    duration REAL NOT NULL,
+    round_trips INTEGER
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    name TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS page_metrics (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    page TEXT NOT NULL,
+    url TEXT,
+    navigation INTEGER NOT NULL,
+    ttfb_ms REAL,
+    dom_content_loaded_ms REAL,
+    load_ms REAL,
+    lcp_ms REAL,
+    requests INTEGER,
+    transfer_bytes INTEGER,
+    slowest_xhr TEXT
+);
+CREATE INDEX IF NOT EXISTS tests_by_run ON tests(run_id);
+CREATE INDEX IF NOT EXISTS tests_by_nodeid ON tests(nodeid, run_id);
+CREATE INDEX IF NOT EXISTS steps_by_name ON steps(name, run_id);
+CREATE INDEX IF NOT EXISTS steps_by_test ON steps(test_id);
+CREATE INDEX IF NOT EXISTS steps_by_run ON steps(run_id);
+CREATE INDEX IF NOT EXISTS artifacts_by_test ON artifacts(test_id);
+CREATE INDEX IF NOT EXISTS page_metrics_by_page ON page_metrics(page, run_id);
+CREATE INDEX IF NOT EXISTS page_metrics_by_run ON page_metrics(run_id);
+"""
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class ResultsStore:
+    '''
+    Run history in one SQLite database (WAL mode, so parallel workers and report queries do not block
+    each other). Every finished test is appended right away with its outcome, step timings and
+    artifact paths; nothing is rebuilt per run, and reports only read the runs they show.
+    xdist workers of one session share a run through its uid.
+    '''
+    def __init__(self, path=None):
+        self.path = path or Config.RESULTS_DB
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def start_run(self, uid, base_url=None, profile=None):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO runs (uid, started, git_commit, base_url, profile) VALUES (?, ?, ?, ?, ?)",
+                (uid, time.time(), git_commit(), base_url, profile),
+            )
+            return self.connection.execute("SELECT id FROM runs WHERE uid = ?", (uid,)).fetchone()["id"]
+
+    def finish_run(self, run_id):
+        with self._lock, self.connection:
+            self.connection.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), run_id))
+
+    def add_test(self, run_id, nodeid, outcome, started, duration, worker=None, message=None, steps=(), artifacts=(), pages=()):
+        """
+        Append one finished test; steps are (name, duration, round_trips), artifacts (name, path)
+        and pages the samples captured by utils.page_metrics.
+        """
+        with self._lock, self.connection:
+            test_id = self.connection.execute(
+                "INSERT INTO tests (run_id, nodeid, worker, outcome, started, duration, message) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, nodeid, worker, outcome, started, duration, message),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO steps (run_id, test_id, name, duration, round_trips) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, test_id, name, step_duration, round_trips) for name, step_duration, round_trips in steps],
+            )
+            self.connection.executemany(
+                "INSERT INTO artifacts (run_id, test_id, name, path) VALUES (?, ?, ?, ?)",
+                [(run_id, test_id, name, path) for name, path in artifacts],
+            )
+            self.connection.executemany(
+                """INSERT INTO page_metrics (run_id, test_id, page, url, navigation, ttfb_ms, dom_content_loaded_ms,
+                                             load_ms, lcp_ms, requests, transfer_bytes, slowest_xhr)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(run_id, test_id, page["page"], page.get("url"), int(page.get("navigation", False)), page.get("ttfb_ms"),
+                  page.get("dom_content_loaded_ms"), page.get("load_ms"), page.get("lcp_ms"), page.get("requests"),
+                  page.get("transfer_bytes"), json.dumps(page.get("slowest_xhr", []))) for page in pages],
+            )
+        return test_id
+
+    def recent_runs(self, limit=20):
+        return self.connection.execute(
+            """SELECT runs.*, COUNT(tests.id) AS tests,
+                      SUM(tests.outcome = 'passed') AS passed, SUM(tests.outcome = 'failed') AS failed,
+                      SUM(tests.duration) AS duration
+               FROM (SELECT * FROM runs ORDER BY id DESC LIMIT ?) AS runs
+               LEFT JOIN tests ON tests.run_id = runs.id
+               GROUP BY runs.id ORDER BY runs.id DESC""",
+            (limit,),
+        ).fetchall()
+
+    def step_names(self, limit=50):
+        """Names of the steps recorded in the newest `limit` runs; older history is not scanned."""
+        return [row["name"] for row in self.connection.execute(
+            """SELECT DISTINCT name FROM steps
+               WHERE run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)
+               ORDER BY name""",
+            (limit,),
+        )]
+
+    def step_trend(self, name, limit=50):
+        """Per-run average/max duration of one step over the last `limit` runs that ran it, oldest first."""
+        return self.connection.execute(
+            """SELECT steps.run_id, runs.started, runs.git_commit, COUNT(*) AS samples,
+                      AVG(steps.duration) AS average, MAX(steps.duration) AS slowest
+               FROM steps JOIN runs ON runs.id = steps.run_id
+               WHERE steps.name = ? AND steps.run_id IN (
+                   SELECT DISTINCT run_id FROM steps WHERE name = ? ORDER BY run_id DESC LIMIT ?)
+               GROUP BY steps.run_id ORDER BY steps.run_id""",
+            (name, name, limit),
+        ).fetchall()
+
+    def page_names(self, limit=50):
+        """Pages captured in the newest `limit` runs; older history is not scanned."""
+        return [row["name"] for row in self.connection.execute(
+            """SELECT DISTINCT page AS name FROM page_metrics
+               WHERE run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)
+               ORDER BY page""",
+            (limit,),
+        )]
+
+    def page_trend(self, page, limit=50):
+        """Per-run averages of one page's metrics over the last `limit` runs that reached it, oldest first."""
+        return self.connection.execute(
+            """SELECT page_metrics.run_id, runs.started, runs.git_commit, COUNT(*) AS samples,
+                      AVG(ttfb_ms) AS ttfb_ms, AVG(load_ms) AS load_ms, AVG(lcp_ms) AS lcp_ms,
+                      AVG(requests) AS requests, AVG(transfer_bytes) AS transfer_bytes
+               FROM page_metrics JOIN runs ON runs.id = page_metrics.run_id
+               WHERE page_metrics.page = ? AND page_metrics.run_id IN (
+                   SELECT DISTINCT run_id FROM page_metrics WHERE page = ? ORDER BY run_id DESC LIMIT ?)
+               GROUP BY page_metrics.run_id ORDER BY page_metrics.run_id""",
+            (page, page, limit),
+        ).fetchall()
+
+    def slowest_xhr(self, run_id, limit=10):
+        """The slowest XHRs captured in one run, with the page they were captured on."""
+        rows = []
+        for row in self.connection.execute("SELECT page, slowest_xhr FROM page_metrics WHERE run_id = ?", (run_id,)):
+            rows.extend(dict(xhr, page=row["page"]) for xhr in json.loads(row["slowest_xhr"] or "[]"))
+        rows.sort(key=lambda xhr: xhr["duration_ms"], reverse=True)
+        return rows[:limit]
+
+    def test_trend(self, nodeid, limit=50):
+        return self.connection.execute(
+            """SELECT * FROM (SELECT tests.run_id, tests.outcome, tests.duration, runs.started
+                              FROM tests JOIN runs ON runs.id = tests.run_id
+                              WHERE tests.nodeid = ? ORDER BY tests.run_id DESC LIMIT ?)
+               ORDER BY run_id""",
+            (nodeid, limit),
+        ).fetchall()
+
+    def failures(self, run_id):
+        return self.connection.execute(
+            """SELECT tests.*, GROUP_CONCAT(artifacts.path, '\n') AS artifact_paths
+               FROM tests LEFT JOIN artifacts ON artifacts.test_id = tests.id
+               WHERE tests.run_id = ? AND tests.outcome = 'failed' GROUP BY tests.id""",
+            (run_id,),
+        ).fetchall()
+
+    def prune(self, keep):
+        """Delete all but the newest `keep` runs; keep=0 deletes every run."""
+        if keep < 0:
+            raise ValueError("keep must be 0 or more, got %d" % keep)
+        with self._lock:
+            with self.connection:
+                if keep == 0:
+                    cutoff = self.connection.execute("SELECT MAX(id) + 1 AS id FROM runs").fetchone()
+                else:
+                    cutoff = self.connection.execute("SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?", (keep - 1,)).fetchone()
+                if cutoff is None or cutoff["id"] is None:
+                    return 0
+                for table in ("page_metrics", "artifacts", "steps", "tests"):
+                    self.connection.execute("DELETE FROM %s WHERE run_id < ?" % table, (cutoff["id"],))
+                removed = self.connection.execute("DELETE FROM runs WHERE id < ?", (cutoff["id"],)).rowcount
+            self.connection.execute("VACUUM")
+        return removed
+
+    def close(self):
+        self.connection.close()
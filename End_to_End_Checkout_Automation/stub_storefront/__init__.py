@@ -0,0 +1 @@
+from stub_storefront.server import StubStorefront
@@ -0,0 +1,31 @@
+import argparse
+import logging
+import time
+from stub_storefront.server import StubStorefront
+from utils.data_store import TestDataStore
+
+'''
+Run the stand-in storefront on its own, e.g. for manual debugging or a shared offline CI node:
+    python -m stub_storefront --port 8080 --latency-ms 50
+Accounts are taken from test_data.json.
+'''
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the demo storefront")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=int, default=0, help="delay added to every page load")
+    parser.add_argument("--ajax-latency-ms", type=int, default=0, help="delay added to every AJAX call")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - [%(levelname)s] - %(message)s")
+    test_data = TestDataStore.get().data
+    accounts = test_data.get("accounts") or [test_data["credentials"]]
+    with StubStorefront(accounts, host=args.host, port=args.port, latency_ms=args.latency_ms, ajax_latency_ms=args.ajax_latency_ms) as storefront:
+        print("Stub storefront running at %s (Ctrl+C to stop)" % storefront.url)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,691 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from html import escape
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+CUSTOMER_COOKIE = "Nop.customer"
+AUTH_COOKIE = "NOPCOMMERCE.AUTH"
+CHECKOUT_STEPS = ["billing", "shipping", "shipping_method", "payment_method", "payment_info", "confirm_order"]
+STEP_TITLES = {
+    "billing": "Billing address",
+    "shipping": "Shipping address",
+    "shipping_method": "Shipping method",
+    "payment_method": "Payment method",
+    "payment_info": "Payment information",
+    "confirm_order": "Confirm order",
+}
+
+STYLE = """
+    body { font-family: Arial, sans-serif; margin: 0; }
+    .header, .header-menu, .master-wrapper-main { padding: 8px 16px; }
+    .header-links ul { list-style: none; display: flex; gap: 12px; padding: 0; }
+    .ui-autocomplete { position: absolute; top: 80px; left: 16px; background: #fff; border: 1px solid #999; list-style: none; padding: 4px; margin: 0; z-index: 10; }
+    .ui-autocomplete li.ui-state-focus { background: #ddd; }
+    .bar-notification { padding: 8px 16px; background: #4bb07a; color: #fff; }
+    .product-grid { display: flex; flex-wrap: wrap; gap: 16px; }
+    .product-item { border: 1px solid #ddd; padding: 8px; width: 200px; }
+    #checkout-steps { list-style: none; padding: 0; }
+    #checkout-steps > li:not(.active) > .step { display: none; }
+    .please-wait { color: #999; }
+"""
+
+class StorefrontState:
+    '''
+    In-memory customers, carts, addresses and orders of the stand-in storefront.
+    Guests are identified by the customer cookie; logged-in customers by their email,
+    so a cart survives across browsers the same way it does on the real storefront.
+    '''
+    def __init__(self, catalog, accounts):
+        self.catalog = catalog
+        self.products = {product["id"]: product for product in catalog["products"]}
+        self.products_by_slug = {product["slug"]: product for product in catalog["products"]}
+        self.countries = {country["id"]: country for country in catalog["countries"]}
+        self.passwords = {account["email"].lower(): account["password"] for account in accounts}
+        self.sessions = {}
+        self.carts = {}
+        self.addresses = {}
+        self.orders = []
+        self.checkout = {}
+        self.next_order_number = 1000
+        self.lock = threading.RLock()
+
+    def cart(self, owner):
+        return self.carts.setdefault(owner, [])
+
+    def cart_count(self, owner):
+        return sum(line["qty"] for line in self.cart(owner))
+
+    def add_to_cart(self, owner, product, qty, attributes=None):
+        with self.lock:
+            for line in self.cart(owner):
+                if line["product_id"] == product["id"] and line["attributes"] == (attributes or {}):
+                    line["qty"] += qty
+                    return
+            self.cart(owner).append({"product_id": product["id"], "qty": qty, "attributes": attributes or {}})
+
+    def cart_lines(self, owner):
+        lines = []
+        for line in self.cart(owner):
+            product = self.products[line["product_id"]]
+            lines.append({
+                "product": product,
+                "qty": line["qty"],
+                "price": product["price"],
+                "total": round(product["price"] * line["qty"], 2),
+            })
+        return lines
+
+    def place_order(self, owner):
+        with self.lock:
+            lines = self.cart_lines(owner)
+            if not lines:
+                return None
+            self.next_order_number += 1
+            order = {
+                "number": self.next_order_number,
+                "owner": owner,
+                "created": time.strftime("%m/%d/%Y %I:%M:%S %p"),
+                "lines": [{"name": l["product"]["name"], "qty": l["qty"], "price": l["price"], "total": l["total"]} for l in lines],
+                "total": round(sum(l["total"] for l in lines), 2),
+                "checkout": dict(self.checkout.get(owner, {})),
+            }
+            self.orders.append(order)
+            self.carts[owner] = []
+            self.checkout.pop(owner, None)
+            return order
+
+class StorefrontHandler(BaseHTTPRequestHandler):
+    '''
+    Serves the pages and AJAX endpoints the page objects use:
+    login/logout, home, search and autocomplete, product pages, add-to-cart, cart,
+    one-page checkout, order completion and the customer's order history.
+    '''
+    server_version = "StubStorefront/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    # ---- request plumbing -------------------------------------------------
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        self.query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.form = {}
+        if method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode("utf-8") if length else ""
+            self.form = {key: values[0] for key, values in parse_qs(body, keep_blank_values=True).items()}
+        self.new_cookies = {}
+        self._identify()
+        storefront = self.server.storefront
+        ajax = self.headers.get("X-Requested-With") == "XMLHttpRequest" or url.path.startswith(("/catalog/", "/country/"))
+        delay = storefront.ajax_latency_ms if ajax else storefront.latency_ms
+        if delay:
+            time.sleep(delay / 1000.0)
+        for route_method, pattern, handler_name in ROUTES:
+            match = re.fullmatch(pattern, url.path)
+            if route_method == method and match:
+                getattr(self, handler_name)(*match.groups())
+                return
+        if method == "GET":
+            product = self.state.products_by_slug.get(url.path.strip("/"))
+            if product:
+                self.product_page(product)
+                return
+        self.send_html(self.layout("Page not found", "<div class=\"page\"><h1>Page not found</h1></div>"), status=404)
+
+    def _identify(self):
+        cookies = SimpleCookie(self.headers.get("Cookie", ""))
+        self.state = self.server.storefront.state
+        self.customer_id = cookies[CUSTOMER_COOKIE].value if CUSTOMER_COOKIE in cookies else None
+        if not self.customer_id:
+            self.customer_id = str(uuid.uuid4())
+            self.new_cookies[CUSTOMER_COOKIE] = self.customer_id
+        token = cookies[AUTH_COOKIE].value if AUTH_COOKIE in cookies else None
+        self.email = self.state.sessions.get(token)
+
+    @property
+    def owner(self):
+        return self.email or self.customer_id
+
+    def _send(self, status, content_type, body, headers=None):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-cache, no-store")
+        for name, value in self.new_cookies.items():
+            if value is None:
+                self.send_header("Set-Cookie", "%s=; Path=/; Max-Age=0" % name)
+            else:
+                self.send_header("Set-Cookie", "%s=%s; Path=/; HttpOnly" % (name, value))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_html(self, html, status=200):
+        self._send(status, "text/html; charset=utf-8", html)
+
+    def send_json(self, payload, status=200):
+        self._send(status, "application/json; charset=utf-8", json.dumps(payload))
+
+    def redirect(self, location):
+        self._send(302, "text/plain", "", headers={"Location": location})
+
+    # ---- layout ------------------------------------------------------------
+
+    def layout(self, title, content):
+        """
+        Page chrome with the same nesting as the real storefront, so absolute XPaths such as the
+        login button's (/html/body/div[4]/div[1]/div[4]/div[2]/...) resolve here too.
+        """
+        if self.email:
+            links = ('<li><a href="/customer/info" class="account">%s</a></li>'
+                     '<li><a href="/logout" class="ico-logout">Log out</a></li>') % escape(self.email)
+        else:
+            links = ('<li><a href="/register" class="ico-register">Register</a></li>'
+                     '<li><a href="/login" class="ico-login">Log in</a></li>')
+        return """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Demo Web Shop. %(title)s</title>
+<style>%(style)s</style>
+<script src="/scripts/storefront.js"></script>
+</head>
+<body>
+<div class="ajax-loading-block-window" style="display: none"></div>
+<div id="dialog-notifications-success" style="display: none"></div>
+<div id="dialog-notifications-error" style="display: none"></div>
+<div class="master-wrapper-page">
+<div class="master-wrapper-content">
+<div class="header">
+<div class="header-logo"><a href="/">Demo Web Shop</a></div>
+<div class="header-links-wrapper"><div class="header-links"><ul>
+%(links)s
+<li id="topcartlink"><a href="/cart" class="ico-cart"><span class="cart-label">Shopping cart</span> <span class="cart-qty">(%(cart_count)d)</span></a></li>
+</ul></div></div>
+<div class="search-box"><form action="/search" method="get">
+<input type="text" class="search-box-text" id="small-searchterms" name="q" autocomplete="off" value="">
+<input type="submit" class="button-1 search-box-button" value="Search">
+</form></div>
+</div>
+<div class="header-menu"><ul class="top-menu"><li><a href="/">Home</a></li></ul></div>
+<div id="bar-notification" class="bar-notification" style="display: none"><p class="content"></p></div>
+<div class="master-wrapper-main">
+<div class="side-2"></div>
+<div class="center-2">
+%(content)s
+</div>
+</div>
+</div>
+</div>
+</body>
+</html>""" % {
+            "title": escape(title),
+            "style": STYLE,
+            "links": links,
+            "cart_count": self.state.cart_count(self.owner),
+            "content": content,
+        }
+
+    def product_box(self, product):
+        if product["type"] == "giftcard":
+            # Products with required attributes send the shopper to their details page
+            action = "location.href='/%s'; return false;" % product["slug"]
+        else:
+            action = "AjaxCart.addProductToCart(%d); return false;" % product["id"]
+        return """<div class="item-box"><div class="product-item" data-productid="%(id)d">
+<h2 class="product-title"><a href="/%(slug)s">%(name)s</a></h2>
+<div class="prices"><span class="price actual-price">%(price).2f</span></div>
+<div class="buttons"><input type="button" value="Add to cart" class="button-2 product-box-add-to-cart-button" onclick="%(action)s"></div>
+</div></div>""" % dict(product, name=escape(product["name"]), action=action)
+
+    # ---- pages -------------------------------------------------------------
+
+    def home(self):
+        products = [p for p in self.state.catalog["products"] if p.get("homepage")]
+        content = ('<div class="page home-page"><div class="page-body">'
+                   '<div class="product-grid home-page-product-grid"><div class="title"><strong>Featured products</strong></div>%s</div>'
+                   '</div></div>') % "".join(self.product_box(p) for p in products)
+        self.send_html(self.layout("Home", content))
+
+    def login_page(self, error=None):
+        error_html = '<div class="message-error">Login was unsuccessful. %s</div>' % escape(error) if error else ""
+        content = """<div class="page login-page">
+<div class="page-title"><h1>Welcome, Please Sign In!</h1></div>
+<div class="page-body">
+<div class="customer-blocks">
+<div class="new-wrapper register-block"><div class="title"><strong>New Customer</strong></div></div>
+<div class="returning-wrapper">
+<div class="title"><strong>Returning Customer</strong></div>
+<div class="form-fields">
+<form method="post" action="/login">
+%s
+<div class="inputs"><label for="Email">Email:</label><input class="email" id="Email" name="Email" type="text"></div>
+<div class="inputs"><label for="Password">Password:</label><input class="password" id="Password" name="Password" type="password"></div>
+<div class="inputs reversed"><input id="RememberMe" name="RememberMe" type="checkbox" value="true"><label for="RememberMe">Remember me?</label></div>
+<div class="forgot-password"><a href="/passwordrecovery">Forgot password?</a></div>
+<div class="buttons"><input class="button-1 login-button" type="submit" value="Log in"></div>
+</form>
+</div>
+</div>
+</div>
+</div>
+</div>""" % error_html
+        self.send_html(self.layout("Login", content))
+
+    def login(self):
+        email = self.form.get("Email", "").strip()
+        password = self.state.passwords.get(email.lower())
+        if password is None or password != self.form.get("Password"):
+            self.login_page(error="The credentials provided are incorrect")
+            return
+        token = uuid.uuid4().hex
+        with self.state.lock:
+            self.state.sessions[token] = email
+            # Guest cart is merged into the customer's cart on login
+            for line in self.state.carts.pop(self.customer_id, []):
+                self.state.add_to_cart(email, self.state.products[line["product_id"]], line["qty"], line["attributes"])
+        self.new_cookies[AUTH_COOKIE] = token
+        self.redirect("/")
+
+    def logout(self):
+        cookies = SimpleCookie(self.headers.get("Cookie", ""))
+        if AUTH_COOKIE in cookies:
+            self.state.sessions.pop(cookies[AUTH_COOKIE].value, None)
+        self.new_cookies[AUTH_COOKIE] = None
+        self.redirect("/")
+
+    def search(self):
+        term = self.query.get("q", "").strip()
+        matches = [p for p in self.state.catalog["products"] if term and term.lower() in p["name"].lower()]
+        results = "".join(self.product_box(p) for p in matches) or '<div class="no-result">No products were found that matched your criteria.</div>'
+        content = ('<div class="page search-page"><div class="page-title"><h1>Search</h1></div>'
+                   '<div class="page-body"><div class="search-results"><div class="product-grid">%s</div></div></div></div>') % results
+        self.send_html(self.layout("Search", content))
+
+    def autocomplete(self):
+        term = self.query.get("term", "").strip().lower()
+        matches = [p for p in self.state.catalog["products"] if term and term in p["name"].lower()]
+        self.send_json([{"label": p["name"], "producturl": "/" + p["slug"]} for p in matches[:15]])
+
+    def product_page(self, product):
+        pid = product["id"]
+        giftcard = ""
+        if product["type"] == "giftcard":
+            giftcard = """<div class="giftcard">
+<div><label>Recipient's Name:</label><input class="recipient-name" id="giftcard_%(id)d_RecipientName" name="giftcard_%(id)d.RecipientName" type="text"></div>
+<div><label>Recipient's Email:</label><input class="recipient-email" id="giftcard_%(id)d_RecipientEmail" name="giftcard_%(id)d.RecipientEmail" type="text"></div>
+<div><label>Your Name:</label><input class="sender-name" id="giftcard_%(id)d_SenderName" name="giftcard_%(id)d.SenderName" type="text"></div>
+</div>""" % {"id": pid}
+        content = """<div class="page product-details-page">
+<div class="page-body">
+<form id="product-details-form" onsubmit="return false;">
+<div class="product-essential">
+<div class="product-name"><h1>%(name)s</h1></div>
+<div class="prices"><div class="product-price"><span class="price-value-%(id)d">%(price).2f</span></div></div>
+%(giftcard)s
+<div class="add-to-cart"><div class="add-to-cart-panel">
+<input class="qty-input" id="addtocart_%(id)d_EnteredQuantity" name="addtocart_%(id)d.EnteredQuantity" type="text" value="1">
+<input type="button" id="add-to-cart-button-%(id)d" class="button-1 add-to-cart-button" value="Add to cart" onclick="AjaxCart.addProductToCart(%(id)d); return false;">
+</div></div>
+</div>
+</form>
+</div>
+</div>""" % {"id": pid, "name": escape(product["name"]), "price": product["price"], "giftcard": giftcard}
+        self.send_html(self.layout(product["name"], content))
+
+    def add_to_cart(self, product_id):
+        product = self.state.products.get(int(product_id))
+        if not product:
+            self.send_json({"success": False, "message": "No product found with the specified ID"})
+            return
+        try:
+            qty = int(self.form.get("addtocart_%d.EnteredQuantity" % product["id"], "1"))
+        except ValueError:
+            qty = 0
+        if qty <= 0:
+            self.send_json({"success": False, "message": "Quantity should be positive"})
+            return
+        attributes = {}
+        if product["type"] == "giftcard":
+            name = self.form.get("giftcard_%d.RecipientName" % product["id"], "").strip()
+            email = self.form.get("giftcard_%d.RecipientEmail" % product["id"], "").strip()
+            if not name or not email:
+                self.send_json({"success": False, "message": "Enter valid recipient name and email"})
+                return
+            attributes = {"recipient_name": name, "recipient_email": email}
+        self.state.add_to_cart(self.owner, product, qty, attributes)
+        self.send_json({
+            "success": True,
+            "message": "The product has been added to your shopping cart",
+            "updatetopcartsectionhtml": "(%d)" % self.state.cart_count(self.owner),
+        })
+
+    def cart_page(self):
+        lines = self.state.cart_lines(self.owner)
+        if not lines:
+            body = '<div class="order-summary-content">Your Shopping Cart is empty!</div>'
+        else:
+            rows = "".join("""<tr class="cart-item-row">
+<td class="product"><a href="/%(slug)s" class="product-name">%(name)s</a></td>
+<td class="unit-price nobr"><span class="product-unit-price">%(price).2f</span></td>
+<td class="qty nobr"><input name="itemquantity" type="text" value="%(qty)d" class="qty-input"></td>
+<td class="subtotal nobr end"><span class="product-subtotal">%(total).2f</span></td>
+</tr>""" % {"slug": l["product"]["slug"], "name": escape(l["product"]["name"]), "price": l["price"], "qty": l["qty"], "total": l["total"]} for l in lines)
+            subtotal = sum(l["total"] for l in lines)
+            body = """<div class="order-summary-content">
+<form action="/cart" method="post" onsubmit="return Cart.checkout();">
+<table class="cart" id="cart-table">
+<thead><tr><th>Product(s)</th><th>Price</th><th>Qty.</th><th>Total</th></tr></thead>
+<tbody>%(rows)s</tbody>
+</table>
+<div class="cart-footer"><div class="totals">
+<table class="cart-total"><tr><td class="cart-total-left"><span class="nobr">Sub-Total:</span></td>
+<td class="cart-total-right"><span class="nobr"><span id="subtotal" class="product-price">%(subtotal).2f</span></span></td></tr></table>
+<div class="terms-of-service"><input id="termsofservice" type="checkbox" name="termsofservice"><label for="termsofservice">I agree with the terms of service and I adhere to them unconditionally</label></div>
+<div class="checkout-buttons"><button type="submit" id="checkout" name="checkout" value="checkout" class="button-1 checkout-button">Checkout</button></div>
+</div></div>
+</form>
+</div>""" % {"rows": rows, "subtotal": subtotal}
+        content = '<div class="page shopping-cart-page"><div class="page-title"><h1>Shopping cart</h1></div><div class="page-body">%s</div></div>' % body
+        self.send_html(self.layout("Shopping Cart", content))
+
+    # ---- one-page checkout ---------------------------------------------------
+
+    def checkout_page(self):
+        if not self.email:
+            self.redirect("/login?ReturnUrl=%2Fonepagecheckout")
+            return
+        if not self.state.cart(self.owner):
+            self.redirect("/cart")
+            return
+        self.state.checkout[self.owner] = {}
+        steps = []
+        for index, step in enumerate(CHECKOUT_STEPS, start=1):
+            html = self.billing_section() if step == "billing" else ""
+            steps.append("""<li id="opc-%(step)s" class="tab-section%(active)s">
+<div class="step-title"><span class="number">%(index)d</span><h2 class="title">%(title)s</h2></div>
+<div id="checkout-step-%(step)s" class="step a-item">%(html)s</div>
+</li>""" % {"step": step, "active": " allow active" if step == "billing" else "", "index": index, "title": STEP_TITLES[step], "html": html})
+        content = ('<div class="page checkout-page"><div class="page-title"><h1>Checkout</h1></div>'
+                   '<div class="page-body checkout-data"><ol class="opc" id="checkout-steps">%s</ol></div></div>') % "".join(steps)
+        self.send_html(self.layout("Checkout", content))
+
+    def _step_buttons(self, step, save_call, css_class):
+        return ('<div class="buttons">'
+                '<input type="button" class="button-1 %s" onclick="%s" value="Continue">'
+                '<span class="please-wait" id="%s-please-wait" style="display: none;">Loading next step...</span>'
+                '</div>') % (css_class, save_call, step.replace("_", "-"))
+
+    def _address_options(self):
+        return "".join('<option value="%d">%s</option>' % (index, escape(self._address_label(address)))
+                       for index, address in enumerate(self.state.addresses.get(self.owner, [])))
+
+    @staticmethod
+    def _address_label(address):
+        return "%s %s, %s, %s %s, %s" % (address["first_name"], address["last_name"], address["address1"], address["city"], address["zip"], address["country"])
+
+    def billing_section(self):
+        has_addresses = bool(self.state.addresses.get(self.owner))
+        select = ""
+        if has_addresses:
+            select = ('<div class="select-billing-address"><label for="billing-address-select">Select a billing address from your address book or enter a new address.</label>'
+                      '<select id="billing-address-select" name="billing_address_id" onchange="Billing.newAddress(!this.value)">%s<option value="">New Address</option></select></div>') % self._address_options()
+        countries = "".join('<option value="%d">%s</option>' % (c["id"], escape(c["name"])) for c in self.state.catalog["countries"])
+
+        def text_input(name, label):
+            return '<div class="inputs"><label for="BillingNewAddress_%s">%s:</label><input type="text" id="BillingNewAddress_%s" name="BillingNewAddress.%s" class="text-box single-line"></div>' % (name, label, name, name)
+
+        return """<form id="co-billing-form" action="">
+%(select)s
+<div class="enter-address"><div id="billing-new-address-form" style="display: %(display)s"><div class="edit-address">
+%(first)s%(last)s%(email)s
+<div class="inputs"><label for="BillingNewAddress_CountryId">Country:</label><select id="BillingNewAddress_CountryId" name="BillingNewAddress.CountryId"><option value="0">Select country</option>%(countries)s</select></div>
+<div class="inputs"><label for="BillingNewAddress_StateProvinceId">State / province:</label><select id="BillingNewAddress_StateProvinceId" name="BillingNewAddress.StateProvinceId"><option value="0">Other (Non US)</option></select><span id="states-loading-progress" style="display: none;" class="please-wait">Wait...</span></div>
+%(city)s%(address1)s%(zip)s%(phone)s
+</div></div></div>
+</form>
+%(buttons)s""" % {
+            "select": select,
+            "display": "none" if has_addresses else "block",
+            "first": text_input("FirstName", "First name"),
+            "last": text_input("LastName", "Last name"),
+            "email": text_input("Email", "Email"),
+            "countries": countries,
+            "city": text_input("City", "City"),
+            "address1": text_input("Address1", "Address 1"),
+            "zip": text_input("ZipPostalCode", "Zip / postal code"),
+            "phone": text_input("PhoneNumber", "Phone number"),
+            "buttons": self._step_buttons("billing", "Billing.save()", "new-address-next-step-button"),
+        }
+
+    def save_step(self, step):
+        if not self.email or step not in CHECKOUT_STEPS:
+            self.send_json({"error": "Checkout is not available"})
+            return
+        progress = self.state.checkout.setdefault(self.owner, {})
+        if step == "billing":
+            error = self._save_billing(progress)
+            if error:
+                self.send_json({"error": error})
+                return
+            html = ('<form id="co-shipping-form" action=""><div class="select-shipping-address">'
+                    '<label for="shipping-address-select">Select a shipping address from your address book or enter a new address.</label>'
+                    '<select id="shipping-address-select" name="shipping_address_id">%s<option value="">New Address</option></select></div></form>%s'
+                    ) % (self._address_options(), self._step_buttons("shipping", "Shipping.save()", "new-address-next-step-button"))
+        elif step == "shipping":
+            progress["shipping_address"] = self.form.get("shipping_address_id", progress.get("billing_address"))
+            options = "".join('<li><div class="method-name"><input id="shippingoption_%d" type="radio" name="shippingoption" value="%d"%s><label for="shippingoption_%d">%s (%.2f)</label></div></li>'
+                              % (i, i, " checked" if i == 0 else "", i, escape(m["name"]), m["fee"]) for i, m in enumerate(self.state.catalog["shipping_methods"]))
+            html = '<form id="co-shipping-method-form" action=""><ul class="method-list">%s</ul></form>%s' % (
+                options, self._step_buttons("shipping_method", "ShippingMethod.save()", "shipping-method-next-step-button"))
+        elif step == "shipping_method":
+            progress["shipping_method"] = self.state.catalog["shipping_methods"][int(self.form.get("shippingoption", 0))]["name"]
+            options = "".join('<li><div class="method-name"><input id="paymentmethod_%d" type="radio" name="paymentmethod" value="%d"%s><label for="paymentmethod_%d">%s</label></div></li>'
+                              % (i, i, " checked" if i == 0 else "", i, escape(m["name"])) for i, m in enumerate(self.state.catalog["payment_methods"]))
+            html = '<form id="co-payment-method-form" action=""><ul class="method-list">%s</ul></form>%s' % (
+                options, self._step_buttons("payment_method", "PaymentMethod.save()", "payment-method-next-step-button"))
+        elif step == "payment_method":
+            progress["payment_method"] = self.state.catalog["payment_methods"][int(self.form.get("paymentmethod", 0))]["name"]
+            html = '<div class="info"><p>You will pay by %s</p></div>%s' % (
+                escape(progress["payment_method"]), self._step_buttons("payment_info", "PaymentInfo.save()", "payment-info-next-step-button"))
+        elif step == "payment_info":
+            lines = self.state.cart_lines(self.owner)
+            rows = "".join('<tr class="cart-item-row"><td class="product">%s</td><td><span class="product-unit-price">%.2f</span></td><td>%d</td><td><span class="product-subtotal">%.2f</span></td></tr>'
+                           % (escape(l["product"]["name"]), l["price"], l["qty"], l["total"]) for l in lines)
+            html = ('<div class="order-summary-content"><table class="cart">%s</table>'
+                    '<div class="total-info"><span class="order-total"><strong>%.2f</strong></span></div></div>'
+                    '<div class="buttons"><input type="button" class="button-1 confirm-order-next-step-button" onclick="ConfirmOrder.save()" value="Confirm">'
+                    '<span class="please-wait" id="confirm-order-please-wait" style="display: none;">Submitting order...</span></div>'
+                    ) % (rows, sum(l["total"] for l in lines))
+        else:
+            order = self.state.place_order(self.owner)
+            if not order:
+                self.send_json({"error": "Your Shopping Cart is empty!"})
+                return
+            self.send_json({"redirect": "/checkout/completed/%d" % order["number"]})
+            return
+        next_step = CHECKOUT_STEPS[CHECKOUT_STEPS.index(step) + 1]
+        self.send_json({"goto_section": next_step, "html": html})
+
+    def _save_billing(self, progress):
+        selected = self.form.get("billing_address_id", "")
+        addresses = self.state.addresses.setdefault(self.owner, [])
+        if selected:
+            progress["billing_address"] = selected
+            return None
+        fields = {
+            "first_name": "FirstName", "last_name": "LastName", "email": "Email", "city": "City",
+            "address1": "Address1", "zip": "ZipPostalCode", "phone": "PhoneNumber",
+        }
+        address = {key: self.form.get("BillingNewAddress.%s" % name, "").strip() for key, name in fields.items()}
+        missing = [name for key, name in fields.items() if not address[key]]
+        country = self.state.countries.get(int(self.form.get("BillingNewAddress.CountryId", "0") or 0))
+        if not country:
+            missing.append("CountryId")
+        if missing:
+            return "Required fields are missing: %s" % ", ".join(missing)
+        address["country"] = country["name"]
+        with self.state.lock:
+            addresses.append(address)
+            progress["billing_address"] = str(len(addresses) - 1)
+        return None
+
+    def states(self):
+        try:
+            country = self.state.countries.get(int(self.query.get("countryId", "0")))
+        except ValueError:
+            country = None
+        states = (country or {}).get("states") or []
+        if not states:
+            states = [{"id": 0, "name": "Other (Non US)"}]
+        self.send_json(states)
+
+    def order_completed(self, number):
+        order = next((o for o in self.state.orders if o["number"] == int(number) and o["owner"] == self.owner), None)
+        if not order:
+            self.redirect("/")
+            return
+        content = """<div class="page checkout-page">
+<div class="page-title"><h1>Thank you</h1></div>
+<div class="page-body checkout-data"><div class="section order-completed">
+<div class="title"><strong>Your order has been successfully processed!</strong></div>
+<ul class="details">
+<li>Order number: %(number)d</li>
+<li><a href="/orderdetails/%(number)d">Click here for order details.</a></li>
+</ul>
+<div class="buttons"><input type="button" value="Continue" class="button-2 order-completed-continue-button" onclick="location.href='/'"></div>
+</div></div>
+</div>""" % order
+        self.send_html(self.layout("Checkout", content))
+
+    def customer_orders(self):
+        if not self.email:
+            self.redirect("/login?ReturnUrl=%2Fcustomer%2Forders")
+            return
+        orders = [order for order in reversed(self.state.orders) if order["owner"] == self.owner]
+        if not orders:
+            body = '<div class="no-data">No orders</div>'
+        else:
+            body = '<div class="order-list">%s</div>' % "".join("""<div class="section order-item">
+<div class="title"><strong>Order Number: %(number)d</strong></div>
+<ul class="info">
+<li>Order status: <span class="order-status pending">Pending</span></li>
+<li>Order Date: <span class="order-date">%(created)s</span></li>
+<li>Order Total: <span class="order-total">%(total).2f</span></li>
+</ul>
+<div class="buttons"><input type="button" value="Details" class="button-2 order-details-button" onclick="setLocation('/orderdetails/%(number)d')"></div>
+</div>""" % order for order in orders)
+        content = '<div class="page account-page order-list-page"><div class="page-title"><h1>My account - Orders</h1></div><div class="page-body">%s</div></div>' % body
+        self.send_html(self.layout("Account", content))
+
+    def order_details(self, number):
+        order = next((o for o in self.state.orders if o["number"] == int(number) and o["owner"] == self.owner), None)
+        if not order:
+            self.redirect("/")
+            return
+        rows = "".join('<tr><td class="a-left name">%s</td><td class="a-right price">%.2f</td><td class="a-center quantity">%d</td><td class="a-right total">%.2f</td></tr>'
+                       % (escape(line["name"]), line["price"], line["qty"], line["total"]) for line in order["lines"])
+        content = """<div class="page order-details-page">
+<div class="page-title"><h1>Order information</h1></div>
+<div class="page-body"><div class="order-overview">
+<div class="order-number"><strong>Order #%(number)d</strong></div>
+<div class="order-total"><strong>Order Total: %(total).2f</strong></div>
+</div>
+<div class="products-box"><table class="data-table">%(rows)s</table></div></div>
+</div>""" % dict(order, rows=rows)
+        self.send_html(self.layout("Order information", content))
+
+    def static(self, name):
+        path = os.path.join(STATIC_DIR, os.path.basename(name))
+        if not os.path.isfile(path):
+            self._send(404, "text/plain", "")
+            return
+        with open(path, "rb") as f:
+            self._send(200, "application/javascript; charset=utf-8", f.read())
+
+    def favicon(self):
+        self._send(204, "image/x-icon", b"")
+
+ROUTES = [
+    ("GET", r"/", "home"),
+    ("GET", r"/login", "login_page"),
+    ("POST", r"/login", "login"),
+    ("GET", r"/logout", "logout"),
+    ("GET", r"/search", "search"),
+    ("GET", r"/catalog/searchtermautocomplete", "autocomplete"),
+    ("POST", r"/addproducttocart/details/(\d+)/1", "add_to_cart"),
+    ("GET", r"/cart", "cart_page"),
+    ("GET", r"/onepagecheckout", "checkout_page"),
+    ("POST", r"/checkout/opcsave/(\w+)", "save_step"),
+    ("GET", r"/country/getstatesbycountryid", "states"),
+    ("GET", r"/checkout/completed/(\d+)", "order_completed"),
+    ("GET", r"/customer/orders", "customer_orders"),
+    ("GET", r"/orderdetails/(\d+)", "order_details"),
+    ("GET", r"/scripts/([\w.]+)", "static"),
+    ("GET", r"/favicon.ico", "favicon"),
+]
+
+class StubStorefront:
+    '''
+    Local stand-in for the demo storefront, for offline and deterministic runs.
+    Serves the pages and AJAX endpoints the page objects use from a fixture catalog
+    (catalog.json), accepts the given test accounts, and can inject latency into
+    page loads and AJAX calls separately. Runs on a background thread:
+
+        with StubStorefront(accounts=[{"email": "...", "password": "..."}]) as storefront:
+            Config.BASE_URL = storefront.url
+    '''
+    def __init__(self, accounts, catalog_path=None, host="127.0.0.1", port=0, latency_ms=0, ajax_latency_ms=0):
+        with open(catalog_path or CATALOG_PATH, "r") as f:
+            catalog = json.load(f)
+        self.state = StorefrontState(catalog, accounts)
+        self.latency_ms = latency_ms
+        self.ajax_latency_ms = ajax_latency_ms
+        self.httpd = ThreadingHTTPServer((host, port), StorefrontHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.storefront = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-storefront", daemon=True)
+        self._thread.start()
+        logger.info("Stub storefront listening on %s", self.url)
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        logger.info("Stub storefront stopped")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,165 @@
+// Client behaviour of the stand-in storefront: search autocomplete, AJAX add-to-cart,
+// country -> state reload and the one-page-checkout steps. Mirrors the storefront's
+// endpoints and DOM hooks closely enough for the page objects, nothing more.
+(function () {
+    function post(url, form) {
+        var body = form ? new URLSearchParams(new FormData(form)) : null;
+        return fetch(url, {
+            method: 'POST',
+            body: body,
+            credentials: 'same-origin',
+            headers: {'X-Requested-With': 'XMLHttpRequest'}
+        }).then(function (response) { return response.json(); });
+    }
+
+    function showNotification(message) {
+        var bar = document.getElementById('bar-notification');
+        bar.querySelector('.content').textContent = message;
+        bar.classList.add('success');
+        bar.style.display = 'block';
+    }
+
+    window.setLocation = function (url) {
+        window.location.href = url;
+    };
+
+    window.AjaxCart = {
+        addProductToCart: function (productId) {
+            var form = document.getElementById('product-details-form');
+            post('/addproducttocart/details/' + productId + '/1', form).then(function (result) {
+                if (result.success) {
+                    document.querySelector('.cart-qty').textContent = result.updatetopcartsectionhtml;
+                    showNotification(result.message);
+                } else {
+                    alert(result.message);
+                }
+            });
+        }
+    };
+
+    function setupAutocomplete() {
+        var input = document.getElementById('small-searchterms');
+        if (!input) { return; }
+        var list = document.createElement('ul');
+        list.className = 'ui-autocomplete';
+        list.style.display = 'none';
+        document.body.appendChild(list);
+        var active = -1, timer = null;
+
+        function items() { return list.querySelectorAll('li'); }
+        function highlight(index) {
+            Array.prototype.forEach.call(items(), function (li, i) { li.classList.toggle('ui-state-focus', i === index); });
+            active = index;
+        }
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            var term = input.value.trim();
+            if (term.length < 3) { list.style.display = 'none'; return; }
+            timer = setTimeout(function () {
+                fetch('/catalog/searchtermautocomplete?term=' + encodeURIComponent(term), {credentials: 'same-origin'})
+                    .then(function (response) { return response.json(); })
+                    .then(function (results) {
+                        list.innerHTML = '';
+                        active = -1;
+                        results.forEach(function (result) {
+                            var li = document.createElement('li');
+                            var a = document.createElement('a');
+                            a.href = result.producturl;
+                            a.textContent = result.label;
+                            li.appendChild(a);
+                            list.appendChild(li);
+                        });
+                        list.style.display = results.length ? 'block' : 'none';
+                    });
+            }, 50);
+        });
+        input.addEventListener('keydown', function (event) {
+            var count = items().length;
+            if (list.style.display === 'none' || !count) { return; }
+            if (event.key === 'ArrowDown') {
+                event.preventDefault();
+                highlight(Math.min(active + 1, count - 1));
+            } else if (event.key === 'ArrowUp') {
+                event.preventDefault();
+                highlight(Math.max(active - 1, 0));
+            } else if (event.key === 'Enter' && active >= 0) {
+                event.preventDefault();
+                window.location.href = items()[active].querySelector('a').getAttribute('href');
+            }
+        });
+    }
+
+    function setupStates() {
+        var country = document.getElementById('BillingNewAddress_CountryId');
+        if (!country) { return; }
+        country.addEventListener('change', function () {
+            var state = document.getElementById('BillingNewAddress_StateProvinceId');
+            var loading = document.getElementById('states-loading-progress');
+            loading.style.display = 'inline';
+            fetch('/country/getstatesbycountryid?countryId=' + encodeURIComponent(country.value), {credentials: 'same-origin'})
+                .then(function (response) { return response.json(); })
+                .then(function (states) {
+                    state.innerHTML = '';
+                    states.forEach(function (s) {
+                        var option = document.createElement('option');
+                        option.value = s.id;
+                        option.textContent = s.name;
+                        state.appendChild(option);
+                    });
+                    loading.style.display = 'none';
+                });
+        });
+    }
+
+    function saveStep(step) {
+        var section = document.getElementById('checkout-step-' + step);
+        var wait = document.getElementById(step.replace('_', '-') + '-please-wait');
+        var form = section.querySelector('form');
+        Array.prototype.forEach.call(section.querySelectorAll('input[type=button]'), function (b) { b.disabled = true; });
+        wait.style.display = 'inline';
+        post('/checkout/opcsave/' + step, form).then(function (result) {
+            wait.style.display = 'none';
+            Array.prototype.forEach.call(section.querySelectorAll('input[type=button]'), function (b) { b.disabled = false; });
+            if (result.error) {
+                alert(result.error);
+                return;
+            }
+            if (result.redirect) {
+                window.location.href = result.redirect;
+                return;
+            }
+            document.getElementById('checkout-step-' + result.goto_section).innerHTML = result.html;
+            Array.prototype.forEach.call(document.querySelectorAll('#checkout-steps > li'), function (li) {
+                li.classList.toggle('active', li.id === 'opc-' + result.goto_section);
+            });
+        });
+    }
+
+    window.Billing = {
+        save: function () { saveStep('billing'); },
+        newAddress: function (isNew) {
+            document.getElementById('billing-new-address-form').style.display = isNew ? 'block' : 'none';
+        }
+    };
+    window.Shipping = {save: function () { saveStep('shipping'); }};
+    window.ShippingMethod = {save: function () { saveStep('shipping_method'); }};
+    window.PaymentMethod = {save: function () { saveStep('payment_method'); }};
+    window.PaymentInfo = {save: function () { saveStep('payment_info'); }};
+    window.ConfirmOrder = {save: function () { saveStep('confirm_order'); }};
+
+    window.Cart = {
+        checkout: function () {
+            if (!document.getElementById('termsofservice').checked) {
+                alert('Please accept the terms of service before the next step.');
+                return false;
+            }
+            window.location.href = '/onepagecheckout';
+            return false;
+        }
+    };
+
+    document.addEventListener('DOMContentLoaded', function () {
+        setupAutocomplete();
+        setupStates();
+    });
+})();
@@ -2,8 +2,24 @@ import pytest
 import logging
 from selenium import webdriver
 from utils.driver_factory import DriverFactory
+from utils.driver_pool import DriverPools
+from utils.config import Config
+from utils.data_store import TestDataStore
+from utils.worker import WorkerContext
+from utils.session_cache import SessionCache
+from utils.timing import instrument, percentile, timings
+from utils.locators import locators
+from utils.page_metrics import page_metrics
+from utils.resource_monitor import resource_monitor
+from utils.order_ledger import OrderLedger, OrderReconciliation
+from utils.dispatcher import dispatcher
+from utils.artifacts import artifacts as artifact_service
+from utils.logging_setup import configure_logging, current_test, stop_logging
+from results import RunResults
+from stub_storefront import StubStorefront
 import logging
 import os
+import time
 from datetime import datetime
 
 '''
@@ -14,12 +30,228 @@ def logger():
     return logging.getLogger(__name__)
 
 logger = logging.getLogger(__name__)
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Each xdist worker writes its own log file and allure results
+    worker = WorkerContext()
+    configure_logging(worker)
+    if worker.parallel and getattr(config.option, "allure_report_dir", None):
+        config.option.allure_report_dir = worker.output_dir("allure-results")
+
+def pytest_sessionstart(session):
+    # Resolve the browser binaries and start the shared chromedriver while tests are being collected.
+    # The xdist controller runs no browsers.
+    config = session.config
+    if getattr(config.option, "numprocesses", None) and not hasattr(config, "workerinput"):
+        return
+    DriverFactory.prestart(config.getoption("--driver-profile"))
+
+def pytest_unconfigure(config):
+    stop_logging()
+
+results = RunResults()
+
+reconciliation = OrderReconciliation()
+
+# Number of tests this process ran; no metrics are written when it is none
+tests_run = pytest.StashKey()
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item):
+    item.config.stash[tests_run] = item.config.stash.get(tests_run, 0) + 1
+    # Log records carry the id of the test they were logged from
+    token = current_test.set(item.nodeid)
+    mark = timings.mark()
+    page_mark = page_metrics.mark()
+    started = time.time()
+    yield
+    results.record(item, started, timings.steps_since(mark), page_metrics.samples_since(page_mark))
+    current_test.reset(token)
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    item.phase_reports = getattr(item, "phase_reports", []) + [outcome.get_result()]
+
+def pytest_sessionfinish(session):
+    # --collect-only, the xdist controller and an empty selection run no tests and have nothing to export
+    if not session.config.option.collectonly and session.config.stash.get(tests_run, 0):
+        export_metrics()
+    artifact_service.close()
+    if reconciliation.ledger is not None:
+        path = reconciliation.export(WorkerContext().output_dir("metrics"))
+        results.record_check(session.config, reconciliation.NAME, reconciliation.outcome, reconciliation.started,
+                             reconciliation.duration, reconciliation.message, [("orders.json", path)])
+        if hasattr(session.config, "workeroutput"):
+            # Under xdist the controller fails the run, see pytest_testnodedown
+            session.config.workeroutput["order_problems"] = reconciliation.problems
+    if reconciliation.problems and session.exitstatus == pytest.ExitCode.OK:
+        # Reported here rather than asserted in the order_ledger fixture, where it would be an error of the last test
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+    results.finish()
+
+def export_metrics():
+    # Per-step and per-command timings, as JSON and Prometheus text
+    timings.export(WorkerContext().output_dir("metrics"))
+    locators.export(WorkerContext().output_dir("metrics"))
+    page_metrics.export(WorkerContext().output_dir("metrics"))
+    if resource_monitor.enabled:
+        resource_monitor.export(WorkerContext().output_dir("metrics"))
+    if dispatcher.enabled:
+        dispatcher.export(WorkerContext().output_dir("metrics"))
+
+def pytest_terminal_summary(terminalreporter):
+    if reconciliation.problems:
+        terminalreporter.section("order reconciliation", red=True)
+        for problem in reconciliation.problems:
+            terminalreporter.write_line(problem)
+    samples = timings.step_samples()
+    startups = samples.get("Driver startup", [])
+    if startups:
+        # Cold start = binary resolution + chromedriver start + first browser; later browsers reuse both
+        terminalreporter.section("driver startup")
+        for name in ("Driver binary resolution", "Driver service startup"):
+            if samples.get(name):
+                terminalreporter.write_line("%-26s %8.2f s" % (name.lower(), sum(samples[name])))
+        terminalreporter.write_line("%-26s %8.2f s (first), %.2f s median of %d" % (
+            "browser session", startups[0], percentile(startups, 0.5), len(startups)))
+    growth = resource_monitor.report(limit=5)
+    if any(row["rss_mb_total"] or row["js_heap_mb_total"] for row in growth):
+        # Under xdist each worker's browsers are in workers/<id>/metrics/resources.json
+        terminalreporter.section("browser resource growth")
+        for row in growth:
+            terminalreporter.write_line("%9s MB RSS %9s MB JS heap %8s DOM nodes %5d samples  %s" % (
+                row["rss_mb_total"], row["js_heap_mb_total"], row["dom_nodes_total"], row["count"], row["step"]))
+        recycled = resource_monitor.recycled()
+        if recycled:
+            terminalreporter.write_line("%d browser(s) replaced over resource limits, after: %s" % (
+                len(recycled), ", ".join(entry["test"] for entry in recycled)))
+    # Under xdist the lookups happen in the workers; see workers/<id>/metrics/locators.json
+    slowest = locators.report(limit=10)
+    if not slowest:
+        return
+    terminalreporter.section("slowest locators")
+    for row in slowest:
+        terminalreporter.write_line("%9.1f ms total %7.2f ms mean %5d attempts %5d misses  %s  %s" % (
+            row["total_ms"], row["mean_ms"], row["attempts"], row["misses"], row["locator"], row["strategy"]))
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    # The controller fails the run on the discrepancies each worker reconciled
+    reconciliation.add(node.gateway.id, getattr(node, "workeroutput", {}).get("order_problems") or [])
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_auto_num_workers(config):
+    # "-n auto" never starts more workers than there are test accounts
+    accounts = TestDataStore.get().data.get("accounts") or [None]
+    return min(os.cpu_count() or 1, len(accounts))
+
+def pytest_generate_tests(metafunc):
+    if "scenario" in metafunc.fixturenames:
+        scenarios = TestDataStore.get().section("scenarios")
+        metafunc.parametrize("scenario", scenarios, ids=[scenario["id"] for scenario in scenarios])
+
+@pytest.fixture(scope="session")
+def test_data_store():
+    return TestDataStore.get()
+
+@pytest.fixture(scope="session")
+def test_data(test_data_store):
+    return test_data_store.data
+
+@pytest.fixture(scope="session", autouse=True)
+def storefront(request, test_data):
+    '''
+    Points the suite at --base-url. With 'local', starts the stub storefront for this process
+    and points the suite at it, so the same flow runs offline at local speed.
+    '''
+    base_url = request.config.getoption("--base-url")
+    if base_url != "local":
+        Config.BASE_URL = base_url.rstrip("/")
+        yield Config.BASE_URL
+        return
+    accounts = test_data.get("accounts") or [test_data["credentials"]]
+    server = StubStorefront(accounts, latency_ms=Config.STUB_LATENCY_MS, ajax_latency_ms=Config.STUB_AJAX_LATENCY_MS).start()
+    Config.BASE_URL = server.url
+    yield server.url
+    server.stop()
+
+@pytest.fixture(scope="session")
+def worker():
+    return WorkerContext()
+
+@pytest.fixture(scope="session")
+def account(worker, test_data):
+    return worker.account(test_data)
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--base-url", action="store", default=Config.BASE_URL,
+        help="Storefront to test against, or 'local' to start the bundled stub storefront (default: BASE_URL)"
+    )
+    parser.addoption(
+        "--driver-profile", action="store", default=Config.DRIVER_PROFILE,
+        choices=sorted(DriverFactory.PROFILES),
+        help="Chrome profile for tests not marked full_render (default: DRIVER_PROFILE or 'lean')"
+    )
+
+@pytest.fixture(scope="session")
+def driver_pools(request):
+    logger.info("Setting up WebDriver pool")
+    pools = DriverPools(request.config.getoption("--driver-profile"))
+    # Warm the default profile's pool before the first test asks for it
+    pools.get()
+    yield pools
+    logger.info("Tearing down WebDriver pools")
+    pools.close()
+
+@pytest.fixture(scope="function")
+def driver(request, driver_pools):
+    # Tests marked full_render get a windowed browser that loads every asset
+    profile = "full" if request.node.get_closest_marker("full_render") else None
+    logger.info("Leasing WebDriver from pool")
+    pool = driver_pools.get(profile)
+    with pool.lease() as driver:
+        page_metrics.install(driver)
+        resource_monitor.start(driver, request.node.nodeid)
+        try:
+            yield instrument(driver)
+        finally:
+            # A browser that grew past the resource limits is replaced before the next test
+            if resource_monitor.finish(driver):
+                pool.retire(driver)
+    logger.info("WebDriver returned to pool")
+
+@pytest.fixture(scope="function", autouse=True)
+def artifacts(request):
+    '''
+    The screenshot service. Captures are written in the background; the ones made during
+    the test are attached to its allure report when it finishes.
+    '''
+    yield artifact_service
+    request.node.artifact_paths = artifact_service.flush()
+
+@pytest.fixture(scope="session")
+def session_cache():
+    return SessionCache()
+
+@pytest.fixture(scope="session")
+def order_ledger(driver_pools, session_cache, account):
+    '''
+    Orders placed by this worker's tests. Once they have all run, every order is reconciled against
+    the account's order history in a single pass; pytest_sessionfinish reports the discrepancies.
+    '''
+    ledger = OrderLedger(account["email"])
+    yield ledger
+    if ledger.orders:
+        reconciliation.run(ledger, driver_pools.get(), session_cache, account)
+
 @pytest.fixture(scope="function")
-def driver():
-    logger.info("Setting up WebDriver")
-    driver = DriverFactory.get_driver()
-    driver.maximize_window()
-    yield driver
-    logger.info("Tearing down WebDriver")
-    driver.quit()
+def authenticated_driver(driver, session_cache, account):
+    '''
+    A driver that is already logged in as this worker's account, for tests that are not about login.
+    '''
+    session_cache.login(driver, account["email"], account["password"])
+    return driver
 
@@ -0,0 +1,91 @@
+import pytest
+from benchmarks.baseline import MIN_DELTA_SECONDS, NOISE_FACTOR, compare
+from benchmarks.stats import MAD_SCALE, describe, mad
+
+'''
+Unit tests for the benchmark statistics and the regression gate that decides the benchmark's exit code.
+'''
+
+def phase(median, mad=0.0):
+    return {"median": median, "mad": mad}
+
+def run(phases, profile="lean", base_url="local"):
+    return {"meta": {"profile": profile, "base_url": base_url}, "phases": phases}
+
+def gate(current, reference, threshold=0.2):
+    rows = compare(run({"Login": current}), run({"Login": reference}), threshold)
+    assert len(rows) == 1
+    return rows[0]
+
+def test_mad_of_fewer_than_two_samples_is_zero():
+    assert mad([]) == 0.0
+    assert mad([1.5]) == 0.0
+
+def test_mad_is_scaled_median_absolute_deviation():
+    # Deviations from the median 3 are 2, 1, 0, 1, 2: their median is 1
+    assert mad([1, 2, 3, 4, 5]) == pytest.approx(MAD_SCALE)
+
+def test_mad_ignores_a_single_outlier():
+    assert mad([1.0, 1.0, 1.0, 1.0, 100.0]) == 0.0
+
+def test_describe_summarises_samples():
+    summary = describe([0.3, 0.1, 0.2, 10.0])
+    assert summary["n"] == 4
+    assert summary["median"] == pytest.approx(0.25)
+    assert summary["min"] == 0.1
+    assert summary["max"] == 10.0
+    assert summary["median"] < summary["p95"] <= summary["max"]
+
+def test_slowdown_beyond_threshold_and_noise_regresses():
+    row = gate(phase(1.5), phase(1.0))
+    assert row["change"] == pytest.approx(0.5)
+    assert row["regressed"]
+
+def test_slowdown_within_noise_does_not_regress():
+    # 50% slower, but the difference is less than NOISE_FACTOR times the MAD
+    row = gate(phase(1.5, mad=0.2), phase(1.0, mad=0.1))
+    assert 0.5 < NOISE_FACTOR * 0.2
+    assert not row["regressed"]
+
+def test_noise_uses_the_larger_mad():
+    assert gate(phase(1.5, mad=0.01), phase(1.0, mad=0.2))["regressed"] is False
+    assert gate(phase(1.5, mad=0.01), phase(1.0, mad=0.01))["regressed"] is True
+
+def test_slowdown_below_min_delta_does_not_regress():
+    # Doubling a 2 ms phase is far over the threshold but under MIN_DELTA_SECONDS
+    row = gate(phase(0.004), phase(0.002))
+    assert 0.002 < MIN_DELTA_SECONDS
+    assert row["change"] == pytest.approx(1.0)
+    assert not row["regressed"]
+
+@pytest.mark.parametrize("current, regressed", [
+    (1.19, False),  # under the threshold
+    (1.20, False),  # exactly at the threshold is still allowed
+    (1.21, True),   # just over it
+])
+def test_threshold_edges(current, regressed):
+    assert gate(phase(current), phase(1.0))["regressed"] is regressed
+
+def test_faster_phase_does_not_regress():
+    row = gate(phase(0.5), phase(1.0))
+    assert row["change"] == pytest.approx(-0.5)
+    assert not row["regressed"]
+
+def test_zero_baseline_median_does_not_divide_by_zero():
+    row = gate(phase(1.0), phase(0.0))
+    assert row["change"] == 0.0
+    assert not row["regressed"]
+
+def test_phase_missing_from_baseline_is_reported_without_regressing():
+    rows = compare(run({"Login": phase(1.0), "New phase": phase(9.0)}), run({"Login": phase(1.0)}), 0.2)
+    new = next(row for row in rows if row["phase"] == "New phase")
+    assert new == {"phase": "New phase", "baseline": None, "current": 9.0, "change": None, "regressed": False}
+
+def test_phase_missing_from_current_run_is_skipped():
+    rows = compare(run({"Login": phase(1.0)}), run({"Login": phase(1.0), "Removed phase": phase(1.0)}), 0.2)
+    assert [row["phase"] for row in rows] == ["Login"]
+
+def test_different_profile_only_warns(caplog):
+    rows = compare(run({"Login": phase(1.0)}, profile="full"), run({"Login": phase(1.0)}), 0.2)
+    assert not rows[0]["regressed"]
+    assert "profile=lean" in caplog.text
@@ -0,0 +1,65 @@
+import pytest
+from urllib.parse import urlparse
+from stub_storefront import StubStorefront
+from stub_storefront.server import CUSTOMER_COOKIE
+from utils.cart_seeder import CartSeeder
+
+'''
+Unit tests for CartSeeder against the stub storefront: a fake driver stands in for the browser's
+cookie jar, the products are posted over HTTP and the cart is then read back from the storefront.
+'''
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = "about:blank"
+        self.cookies = {}
+
+    def execute_script(self, script):
+        return "unit-test"
+
+    def get(self, url):
+        self.current_url = url
+
+    def get_cookies(self):
+        domain = urlparse(self.current_url).hostname
+        return [{"name": name, "value": value, "domain": domain, "path": "/"} for name, value in self.cookies.items()]
+
+    def add_cookie(self, cookie):
+        self.cookies[cookie["name"]] = cookie["value"]
+
+@pytest.fixture
+def storefront():
+    with StubStorefront(accounts=[{"email": "user@example.com", "password": "secret"}]) as storefront:
+        yield storefront
+
+def product(product_id, **fields):
+    return dict({"name": "product %d" % product_id, "add_to_cart_xpath": "//input[@id='add-to-cart-button-%d']" % product_id}, **fields)
+
+def cart(storefront, driver):
+    return {line["product"]["id"]: line["qty"] for line in storefront.state.cart_lines(driver.cookies[CUSTOMER_COOKIE])}
+
+def test_seeded_products_are_in_the_browsers_cart(storefront):
+    driver = FakeDriver()
+    CartSeeder(driver, base_url=storefront.url).seed([product(31), product(13), product(31, quantity=2)])
+    # The storefront's customer cookie was handed to the browser, so the browser sees the same cart
+    assert driver.current_url == storefront.url
+    assert cart(storefront, driver) == {31: 3, 13: 1}
+
+def test_seeding_reuses_the_browsers_customer(storefront):
+    driver = FakeDriver()
+    CartSeeder(driver, base_url=storefront.url).seed([product(31)])
+    CartSeeder(driver, base_url=storefront.url).seed([product(22)])
+    assert cart(storefront, driver) == {31: 1, 22: 1}
+
+def test_rejected_product_fails_seeding(storefront):
+    driver = FakeDriver()
+    with pytest.raises(AssertionError) as error:
+        CartSeeder(driver, base_url=storefront.url).seed([product(31), product(999)])
+    assert "product 999: No product found with the specified ID" in str(error.value)
+    assert cart(storefront, driver) == {31: 1}
+
+def test_product_id_comes_from_the_test_data():
+    assert CartSeeder.product_id({"product_id": "7"}) == 7
+    assert CartSeeder.product_id(product(31)) == 31
+    with pytest.raises(ValueError):
+        CartSeeder.product_id({"name": "Laptop", "add_to_cart_xpath": "//input[@id='add']"})
@@ -0,0 +1,169 @@
+import json
+import os
+import pytest
+from selenium.common.exceptions import WebDriverException
+from utils.checkpoints import Checkpoints
+
+'''
+Unit tests for Checkpoints with a fake driver whose cart lives "server side", like the storefront's:
+retry from the last checkpoint, replay of steps that are not checkpointed, resuming a rerun, TTL
+expiry, and refusing a restore when the cart no longer matches the checkpoint.
+'''
+
+class FakeDriver:
+    def __init__(self, cart):
+        self.cart = cart
+        self.current_url = "http://shop/"
+        self.cookies = [{"name": "auth", "value": "token"}]
+        self.visited = []
+
+    def get(self, url):
+        self.current_url = url
+        self.visited.append(url)
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def delete_all_cookies(self):
+        self.cookies = []
+
+    def execute_script(self, script):
+        return len(self.cart)
+
+    def get_screenshot_as_png(self):
+        raise WebDriverException("no screenshots in unit tests")
+
+class FakeSessionCache:
+    base_url = "http://shop"
+
+    def inject(self, driver, cookies):
+        driver.cookies = list(cookies)
+
+class Flow:
+    '''
+    Steps that record every call; a step fails as many times as `failures` says.
+    '''
+    def __init__(self, driver, failures=None):
+        self.driver = driver
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    def step(self, name, url=None, adds=None):
+        def action():
+            self.calls.append(name)
+            if adds:
+                self.driver.cart.append(adds)
+            if self.failures.get(name):
+                self.failures[name] -= 1
+                raise AssertionError("%s failed" % name)
+            if url:
+                self.driver.get(url)
+        return action
+
+@pytest.fixture
+def cart():
+    return []
+
+@pytest.fixture
+def driver(cart):
+    return FakeDriver(cart)
+
+def checkpoints(driver, tmp_path, **options):
+    options.setdefault("retries", 1)
+    return Checkpoints(driver, "scenario|user@example.com", FakeSessionCache(), directory=str(tmp_path), **options)
+
+def test_failed_step_is_retried_from_the_last_checkpoint(driver, tmp_path):
+    flow = Flow(driver, failures={"Checkout": 1})
+    run = checkpoints(driver, tmp_path)
+    run.run("Login", flow.step("Login", url="http://shop/account"), "Login Failed")
+    run.run("Checkout", flow.step("Checkout", url="http://shop/checkout"), "Checkout Failed")
+    assert flow.calls == ["Login", "Checkout", "Checkout"]
+    # The retry started on the page Login's checkpoint was taken on
+    assert driver.visited == ["http://shop/account", "http://shop/account", "http://shop/checkout"]
+    assert run.completed == ["Login", "Checkout"]
+    assert os.listdir(tmp_path)
+    run.finish()
+    assert os.listdir(tmp_path) == []
+
+def test_steps_after_the_checkpoint_are_replayed_before_the_retry(driver, tmp_path):
+    flow = Flow(driver, failures={"Confirm": 1})
+    run = checkpoints(driver, tmp_path)
+    run.run("Proceed", flow.step("Proceed", url="http://shop/checkout"), "Proceed Failed")
+    run.run("Details", flow.step("Details"), "Details Failed", checkpoint=False)
+    run.run("Confirm", flow.step("Confirm"), "Confirm Failed")
+    assert flow.calls == ["Proceed", "Details", "Confirm", "Details", "Confirm"]
+    with open(run._path()) as f:
+        assert json.load(f)["completed"] == ["Proceed", "Details", "Confirm"]
+
+def test_unrestorable_step_saves_no_checkpoint(driver, tmp_path):
+    flow = Flow(driver)
+    run = checkpoints(driver, tmp_path)
+    run.run("Proceed", flow.step("Proceed"), "Proceed Failed")
+    run.run("Details", flow.step("Details"), "Details Failed", checkpoint=False)
+    with open(run._path()) as f:
+        assert json.load(f)["completed"] == ["Proceed"]
+
+def test_rerun_resumes_at_the_failed_step_with_the_saved_data(driver, tmp_path):
+    flow = Flow(driver, failures={"Confirm": 1})
+    first = checkpoints(driver, tmp_path, retries=0)
+    first.run("Login", flow.step("Login"), "Login Failed")
+    first.data["expected_order"] = {"subtotal": 10.0}
+    first.run("Cart", flow.step("Cart", url="http://shop/cart"), "Cart Failed", cart=("Laptop",))
+    first.run("Details", flow.step("Details"), "Details Failed", checkpoint=False)
+    with pytest.raises(AssertionError):
+        first.run("Confirm", flow.step("Confirm"), "Confirm Failed")
+
+    flow.calls = []
+    rerun = checkpoints(driver, tmp_path, retries=0)
+    data = rerun.data
+    assert data == {"expected_order": {"subtotal": 10.0}}
+    rerun.run("Login", flow.step("Login"), "Login Failed")
+    rerun.run("Cart", flow.step("Cart"), "Cart Failed", cart=("Laptop",))
+    rerun.run("Details", flow.step("Details"), "Details Failed", checkpoint=False)
+    rerun.run("Confirm", flow.step("Confirm"), "Confirm Failed")
+    # Details was never checkpointed, so the rerun runs it again after restoring Cart's checkpoint
+    assert flow.calls == ["Details", "Confirm"]
+    assert driver.visited[-1] == "http://shop/cart"
+    assert rerun.cart == ["Laptop"]
+    assert rerun.data is data
+
+def test_expired_checkpoint_is_discarded(driver, tmp_path):
+    flow = Flow(driver)
+    first = checkpoints(driver, tmp_path)
+    first.run("Login", flow.step("Login"), "Login Failed")
+    with open(first._path()) as f:
+        checkpoint = json.load(f)
+    checkpoint["created"] -= 120
+    with open(first._path(), "w") as f:
+        json.dump(checkpoint, f)
+
+    rerun = checkpoints(driver, tmp_path, ttl=60)
+    assert rerun._resume is None
+    assert os.listdir(tmp_path) == []
+    rerun.run("Login", flow.step("Login"), "Login Failed")
+    assert flow.calls == ["Login", "Login"]
+
+def test_checkpoint_within_its_ttl_is_kept(driver, tmp_path):
+    checkpoints(driver, tmp_path).run("Login", Flow(driver).step("Login"), "Login Failed")
+    assert checkpoints(driver, tmp_path, ttl=60)._resume["completed"] == ["Login"]
+
+def test_restore_over_a_changed_cart_is_refused(driver, cart, tmp_path):
+    flow = Flow(driver, failures={"Add to cart: Laptop": 1})
+    run = checkpoints(driver, tmp_path)
+    run.run("Add to cart: gift card", flow.step("Add to cart: gift card", adds="Gift card"), "Failed", cart=("Gift card",))
+    # The failed attempt already put the laptop in the server-side cart: retrying would add it twice
+    with pytest.raises(RuntimeError) as error:
+        run.run("Add to cart: Laptop", flow.step("Add to cart: Laptop", adds="Laptop"), "Failed", cart=("Laptop",))
+    assert "the cart holds 2 item(s), the checkpoint had 1 (Gift card)" in str(error.value)
+    assert flow.calls == ["Add to cart: gift card", "Add to cart: Laptop"]
+    assert cart == ["Gift card", "Laptop"]
+    # The checkpoint is dropped, so a rerun starts from scratch
+    assert os.listdir(tmp_path) == []
+
+def test_restore_without_a_readable_cart_quantity_proceeds(driver, tmp_path):
+    driver.execute_script = lambda script: None
+    flow = Flow(driver, failures={"Checkout": 1})
+    run = checkpoints(driver, tmp_path)
+    run.run("Login", flow.step("Login"), "Login Failed")
+    run.run("Checkout", flow.step("Checkout"), "Checkout Failed")
+    assert flow.calls == ["Login", "Checkout", "Checkout"]
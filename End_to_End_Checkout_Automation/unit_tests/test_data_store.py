@@ -0,0 +1,109 @@
+import json
+import os
+import pytest
+from utils import data_store
+
+'''
+Unit tests for TestDataStore: schema validation, reload on modification and JSON-lines indexing.
+'''
+
+def valid_data(**sections):
+    data = {
+        "credentials": {"email": "user@example.com", "password": "secret"},
+        "products": [{"name": "Laptop", "url": "/laptop", "add_to_cart_xpath": "//input[@id='add-to-cart-button-31']"}],
+        "shipping_billing_address": {"city": "Lahore"},
+    }
+    data.update(sections)
+    return data
+
+def write_json(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+def write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records), encoding="utf-8")
+    return str(path)
+
+def product(name):
+    return {"name": name, "url": "/" + name, "add_to_cart_xpath": "//input"}
+
+def test_valid_file_loads(tmp_path):
+    store = data_store.TestDataStore(write_json(tmp_path / "data.json", valid_data()))
+    assert store.section("credentials")["email"] == "user@example.com"
+    assert store.product("Laptop")["url"] == "/laptop"
+    assert store.product("Missing") is None
+
+@pytest.mark.parametrize("data, message", [
+    (["not", "an", "object"], "expected a JSON object at the top level"),
+    ({"credentials": {"email": "a", "password": "b"}, "products": []}, "missing required section 'shipping_billing_address'"),
+    (valid_data(products=["Laptop"]), "products[0] must be an object"),
+    (valid_data(products=[{"name": "Laptop", "url": "/laptop"}]), "products[0] is missing add_to_cart_xpath"),
+    (valid_data(credentials={"email": "user@example.com"}), "credentials is missing password"),
+    (valid_data(scenarios=[{"id": "only-id"}]), "scenarios[0] is missing products"),
+    (valid_data(products="catalog.jsonl"), "section 'products' refers to missing file catalog.jsonl"),
+    (valid_data(products=42), "section 'products' must be an object, a list or a .jsonl file name"),
+    (valid_data(products="catalog.csv"), "section 'products' must be an object, a list or a .jsonl file name"),
+])
+def test_schema_errors(tmp_path, data, message):
+    store = data_store.TestDataStore(write_json(tmp_path / "data.json", data))
+    with pytest.raises(data_store.TestDataError) as error:
+        store.data
+    assert message in str(error.value)
+
+def test_invalid_json_is_reported(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        data_store.TestDataStore(str(path)).data
+
+def test_invalid_jsonl_record_is_reported_with_its_line(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    catalog.write_text(json.dumps(product("a")) + "\n{broken\n", encoding="utf-8")
+    store = data_store.TestDataStore(write_json(tmp_path / "data.json", valid_data(products="catalog.jsonl")))
+    with pytest.raises(data_store.TestDataError) as error:
+        store.products()
+    assert "catalog.jsonl:2: invalid JSON" in str(error.value)
+
+def test_jsonl_record_missing_fields_is_reported_with_its_line(tmp_path):
+    write_jsonl(tmp_path / "catalog.jsonl", [product("a"), {"name": "b"}])
+    store = data_store.TestDataStore(write_json(tmp_path / "data.json", valid_data(products="catalog.jsonl")))
+    with pytest.raises(data_store.TestDataError) as error:
+        store.product("a")
+    assert "catalog.jsonl:2 is missing url, add_to_cart_xpath" in str(error.value)
+
+def test_file_is_reloaded_after_it_changes(tmp_path):
+    path = write_json(tmp_path / "data.json", valid_data())
+    store = data_store.TestDataStore(path)
+    assert store.product("Laptop") is not None
+    first = store.data
+    assert store.data is first  # unchanged file: no reload
+
+    write_json(tmp_path / "data.json", valid_data(products=[product("Phone")]))
+    stat = os.stat(path)
+    # Touch: make the new mtime differ even on file systems with coarse timestamps
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    assert store.data is not first
+    assert store.product("Phone") is not None
+    assert store.product("Laptop") is None  # the old index was dropped
+
+def test_jsonl_lookup_seeks_to_byte_offsets_past_multibyte_lines(tmp_path):
+    records = [product("Café crème ☕"), product("Écran 4K — 27″"), product("Laptop")]
+    write_jsonl(tmp_path / "catalog.jsonl", records)
+    with open(tmp_path / "catalog.jsonl", "a", encoding="utf-8") as f:
+        f.write("\n")  # blank lines are skipped
+        f.write(json.dumps(product("Über-Maus"), ensure_ascii=False) + "\n")
+    store = data_store.TestDataStore(write_json(tmp_path / "data.json", valid_data(products="catalog.jsonl")))
+
+    # Byte offsets, not character offsets: every record after a multibyte line must still be found intact
+    assert store.product("Laptop") == product("Laptop")
+    assert store.product("Écran 4K — 27″") == product("Écran 4K — 27″")
+    assert store.product("Über-Maus") == product("Über-Maus")
+    assert store.product("Café crème ☕") == product("Café crème ☕")
+    assert [record["name"] for record in store.products()] == ["Café crème ☕", "Écran 4K — 27″", "Laptop", "Über-Maus"]
+
+    index = store._indexes[("products", "name")]
+    raw = (tmp_path / "catalog.jsonl").read_bytes()
+    assert raw[index["Laptop"][2]:].startswith(b'{"name": "Laptop"')
+    assert index["Laptop"][1] == 3
+    assert index["Über-Maus"][1] == 5
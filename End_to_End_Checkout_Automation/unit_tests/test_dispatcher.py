@@ -0,0 +1,123 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+from utils.dispatcher import Endpoint, EndpointDispatcher
+
+'''
+Unit tests for the endpoint dispatcher with fake endpoints: least-loaded selection, latency as the
+tie breaker, fallback when an endpoint cannot start a session, draining and re-admission.
+'''
+
+class FakeEndpoint(Endpoint):
+    def __init__(self, url, **options):
+        super().__init__(url, **options)
+        self.ready = True
+        self.probes = 0
+
+    def probe(self):
+        self.probes += 1
+        return self.ready
+
+class FakeSession:
+    session_id = "session"
+    endpoint = None
+    dispatcher = None
+
+class FakeDispatcher(EndpointDispatcher):
+    '''
+    Starts fake sessions; an endpoint whose url is in `down` refuses them.
+    '''
+    def __init__(self, urls, max_failures=3, cooldown=60):
+        super().__init__(urls=[], max_failures=max_failures, cooldown=cooldown)
+        self.endpoints = [FakeEndpoint(url, max_failures=max_failures, cooldown=cooldown) for url in urls]
+        self.down = set()
+        self.attempts = []
+
+    def _start(self, endpoint, options):
+        self.attempts.append(endpoint.url)
+        if endpoint.url in self.down:
+            raise WebDriverException("%s refused the session" % endpoint.url)
+        return FakeSession()
+
+def endpoint(dispatcher, url):
+    return next(endpoint for endpoint in dispatcher.endpoints if endpoint.url == url)
+
+def test_sessions_go_to_the_endpoint_with_the_fewest_active_sessions():
+    dispatcher = FakeDispatcher(["http://a", "http://b"])
+    sessions = [dispatcher.session(None) for _ in range(3)]
+    assert [session.endpoint.url for session in sessions] == ["http://a", "http://b", "http://a"]
+    dispatcher.release(sessions[0].endpoint)
+    dispatcher.release(sessions[2].endpoint)
+    assert dispatcher.session(None).endpoint.url == "http://a"
+    assert [row["active_sessions"] for row in dispatcher.report()] == [1, 1]
+
+def test_command_latency_breaks_ties():
+    dispatcher = FakeDispatcher(["http://a", "http://b"])
+    dispatcher.succeeded(endpoint(dispatcher, "http://a"), 0.200)
+    dispatcher.succeeded(endpoint(dispatcher, "http://b"), 0.010)
+    assert dispatcher.session(None).endpoint.url == "http://b"
+
+def test_session_start_time_is_kept_apart_from_command_latency():
+    dispatcher = FakeDispatcher(["http://a"])
+    a = dispatcher.session(None).endpoint
+    assert list(a.latencies) == []
+    assert len(a.start_latencies) == 1
+    assert a.started == 1
+    assert a.mean_latency() == 0.0
+
+def test_endpoint_that_cannot_start_a_session_falls_back_to_the_next():
+    dispatcher = FakeDispatcher(["http://a", "http://b"])
+    dispatcher.down.add("http://a")
+    session = dispatcher.session(None)
+    assert session.endpoint.url == "http://b"
+    assert dispatcher.attempts == ["http://a", "http://b"]
+    a = endpoint(dispatcher, "http://a")
+    assert (a.active, a.failures, a.drained) == (0, 1, False)
+
+def test_no_endpoint_starting_a_session_raises():
+    dispatcher = FakeDispatcher(["http://a", "http://b"])
+    dispatcher.down.update(["http://a", "http://b"])
+    with pytest.raises(WebDriverException, match="No WebDriver endpoint could start a session"):
+        dispatcher.session(None)
+
+def test_successful_command_resets_the_failure_count():
+    dispatcher = FakeDispatcher(["http://a"], max_failures=2)
+    a = endpoint(dispatcher, "http://a")
+    dispatcher.failed(a, OSError("reset"))
+    dispatcher.succeeded(a, 0.01)
+    dispatcher.failed(a, OSError("reset"))
+    assert not a.drained
+
+def test_endpoint_is_drained_after_failures_in_a_row():
+    dispatcher = FakeDispatcher(["http://a", "http://b"], max_failures=2)
+    dispatcher.down.add("http://a")
+    dispatcher.session(None)
+    dispatcher.session(None)
+    assert endpoint(dispatcher, "http://a").drained
+    dispatcher.attempts = []
+    for _ in range(3):
+        assert dispatcher.session(None).endpoint.url == "http://b"
+    # Drained and still cooling down: neither tried nor probed
+    assert dispatcher.attempts == ["http://b"] * 3
+    assert endpoint(dispatcher, "http://a").probes == 0
+
+def test_drained_endpoint_is_readmitted_after_cooldown_when_ready():
+    dispatcher = FakeDispatcher(["http://a", "http://b"], max_failures=1, cooldown=0)
+    a = endpoint(dispatcher, "http://a")
+    dispatcher.failed(a, OSError("reset"))
+    assert a.drained
+    assert dispatcher.session(None).endpoint is a
+    assert a.probes == 1
+    assert not a.drained
+
+def test_endpoint_that_is_not_ready_stays_drained_for_another_cooldown():
+    dispatcher = FakeDispatcher(["http://a", "http://b"], max_failures=1, cooldown=60)
+    a = endpoint(dispatcher, "http://a")
+    dispatcher.failed(a, OSError("reset"))
+    a.ready = False
+    a.drained_until = 1.0  # cooldown over
+    assert dispatcher.session(None).endpoint.url == "http://b"
+    assert a.probes == 1
+    assert a.drained
+    # The failed probe started a new cooldown: the next session does not probe again
+    dispatcher.session(None)
+    assert a.probes == 1
@@ -0,0 +1,196 @@
+import itertools
+import threading
+import time
+import pytest
+from selenium.common.exceptions import WebDriverException
+from utils.driver_pool import DriverPool
+
+'''
+Unit tests for DriverPool with a fake driver factory: leasing, reset between tests, replacement
+after max_uses, retire(), discarding broken browsers, and exclusive leases under concurrency.
+'''
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_window = handle
+
+class FakeDriver:
+    ids = itertools.count(1)
+
+    def __init__(self):
+        self.session_id = "session-%d" % next(self.ids)
+        self.handles = ["main"]
+        self.current_window = "main"
+        self.switch_to = FakeSwitchTo(self)
+        self.alive = True
+        self.fail_reset = False
+        self.cookies_cleared = 0
+        self.url = None
+        self.quit_called = False
+
+    @property
+    def window_handles(self):
+        if not self.alive:
+            raise WebDriverException("browser is gone")
+        return list(self.handles)
+
+    def close(self):
+        self.handles.remove(self.current_window)
+
+    def execute_script(self, script):
+        pass
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cookies_cleared += 1
+
+    def get(self, url):
+        if self.fail_reset:
+            raise WebDriverException("page did not load")
+        self.url = url
+
+    def quit(self):
+        self.quit_called = True
+
+class Factory:
+    def __init__(self, fail=False):
+        self.drivers = []
+        self.fail = fail
+
+    def __call__(self):
+        if self.fail:
+            raise WebDriverException("chromedriver did not start")
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out waiting for the pool"
+        time.sleep(0.005)
+
+@pytest.fixture
+def factory():
+    return Factory()
+
+def pool_of(factory, **options):
+    pool = DriverPool(factory, **options).start()
+    wait_until(lambda: len(pool._idle) == pool.size)
+    return pool
+
+def test_lease_resets_the_driver_and_reuses_it(factory):
+    pool = pool_of(factory)
+    with pool.lease() as driver:
+        driver.handles.append("popup")
+        driver.url = "http://shop/cart"
+    assert driver.handles == ["main"]
+    assert driver.cookies_cleared == 1
+    assert driver.url == "about:blank"
+    with pool.lease() as again:
+        assert again is driver
+    assert len(factory.drivers) == 1
+    pool.close()
+
+def test_driver_is_replaced_after_max_uses(factory):
+    pool = pool_of(factory, max_uses=2)
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        assert second is first
+        # Last use: the replacement starts while the test runs
+        wait_until(lambda: len(factory.drivers) == 2)
+    assert first.quit_called
+    with pool.lease() as third:
+        assert third is factory.drivers[1]
+    # The replacement started early is the only one: releasing the worn-out driver spawns none
+    assert len(factory.drivers) == 2
+    pool.close()
+
+def test_retired_driver_is_replaced_on_release(factory):
+    pool = pool_of(factory)
+    with pool.lease() as driver:
+        pool.retire(driver)
+    assert driver.quit_called
+    with pool.lease() as replacement:
+        assert replacement is not driver
+    assert len(factory.drivers) == 2
+    pool.close()
+
+def test_unhealthy_idle_driver_is_discarded_on_acquire(factory):
+    pool = pool_of(factory)
+    dead = factory.drivers[0]
+    dead.alive = False
+    with pool.lease() as driver:
+        assert driver is not dead
+    assert dead.quit_called
+    pool.close()
+
+def test_driver_that_cannot_be_reset_is_recycled(factory):
+    pool = pool_of(factory)
+    with pool.lease() as driver:
+        driver.fail_reset = True
+    assert driver.quit_called
+    wait_until(lambda: len(pool._idle) == 1)
+    assert pool._idle == [factory.drivers[1]]
+    pool.close()
+
+def test_browser_dying_during_a_test_is_recycled(factory):
+    pool = pool_of(factory)
+    with pytest.raises(WebDriverException):
+        with pool.lease() as driver:
+            driver.alive = False
+            raise WebDriverException("session deleted")
+    assert driver.quit_called
+    with pool.lease() as replacement:
+        assert replacement is not driver
+    pool.close()
+
+def test_factory_failure_is_raised_to_the_caller():
+    pool = DriverPool(Factory(fail=True)).start()
+    with pytest.raises(RuntimeError, match="Unable to start a WebDriver"):
+        pool.acquire()
+    pool.close()
+
+def test_close_quits_every_driver_and_refuses_leases(factory):
+    pool = pool_of(factory, size=2)
+    leased = pool.acquire()
+    pool.close()
+    # Replacements still starting at close quit themselves once they are up
+    wait_until(lambda: all(driver.quit_called for driver in factory.drivers))
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.acquire()
+    # A driver handed back after close is quit, not pooled again
+    pool.release(leased)
+    assert pool._idle == []
+
+def test_concurrent_leases_never_share_a_driver(factory):
+    pool = pool_of(factory, size=2, max_uses=5)
+    in_use = set()
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        for _ in range(20):
+            with pool.lease() as driver:
+                with lock:
+                    if driver in in_use:
+                        errors.append(driver.session_id)
+                    in_use.add(driver)
+                time.sleep(0.001)
+                with lock:
+                    in_use.discard(driver)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    # 80 leases of at most 5 uses each
+    assert len(factory.drivers) >= 16
+    pool.close()
+    # Replacements still starting at close quit themselves once they are up
+    wait_until(lambda: all(driver.quit_called for driver in factory.drivers))
@@ -0,0 +1,49 @@
+import pytest
+from utils.order_ledger import OrderLedger
+
+'''
+Unit tests for the order ledger's check of one recorded order against the order history.
+'''
+
+def line(name, qty, total):
+    return {"name": name, "qty": qty, "total": total}
+
+def order(lines, subtotal):
+    return {"lines": lines, "subtotal": subtotal}
+
+def placed(total):
+    return {"total": total, "details_url": "/orderdetails/1"}
+
+CART = [line("Gift card", 1, 25.0), line("Laptop", 2, 3180.0)]
+
+@pytest.mark.parametrize("expected, history, lines, problems", [
+    (order(CART, 3205.0), placed(3215.0), CART, []),
+    (order(CART, 3205.0), None, None, ["not in the order history"]),
+    (order(CART, 3205.0), placed(3215.0), None, ["order details could not be read"]),
+    (order(CART, 3205.0), placed(3215.0), [line("Laptop", 2, 3180.0)],
+     ["'Gift card' is missing", "lines add up to 3180.00, the cart subtotal was 3205.00"]),
+    (order(CART, 3205.0), placed(3215.0), CART + [line("Mouse", 1, 0.0)], ["unexpected line 'Mouse'"]),
+    (order(CART, 3205.0), placed(3215.0), [line("Gift card", 1, 25.0), line("Laptop", 1, 3180.0)],
+     ["'Laptop' is 1 x 3180.00, expected 2 x 3180.00"]),
+    (order(CART, 3205.0), placed(3215.0), [line("Gift card", 1, 25.0), line("Laptop", 2, 3170.0)],
+     ["'Laptop' is 2 x 3170.00, expected 2 x 3180.00", "lines add up to 3195.00, the cart subtotal was 3205.00"]),
+    (order(CART, 3200.0), placed(3215.0), CART, ["lines add up to 3205.00, the cart subtotal was 3200.00"]),
+    (order(CART, 3205.0), placed(3000.0), CART, ["order total 3000.0 is below the cart subtotal 3205.00"]),
+    (order(CART, 3205.0), placed(None), CART, ["order total None is below the cart subtotal 3205.00"]),
+], ids=["matches", "missing order", "unreadable details", "missing line", "unexpected line", "quantity mismatch",
+        "line total mismatch", "lines do not add up to subtotal", "total below subtotal", "no total"])
+def test_check(expected, history, lines, problems):
+    assert OrderLedger()._check(expected, history, lines) == problems
+
+def test_differences_within_tolerance_are_accepted():
+    lines = [line("Gift card", 1, 25.004), line("Laptop", 2, 3180.0)]
+    assert OrderLedger()._check(order(CART, 3205.0), placed(3204.995), lines) == []
+
+def test_split_lines_of_one_product_are_merged():
+    lines = [line("Gift card", 1, 25.0), line("Laptop", 1, 1590.0), line("Laptop", 1, 1590.0)]
+    assert OrderLedger()._check(order(CART, 3205.0), placed(3205.0), lines) == []
+
+def test_resumed_order_without_lines_checks_only_the_subtotal():
+    assert OrderLedger()._check(order([], 3205.0), placed(3215.0), CART) == []
+    assert OrderLedger()._check(order([], 3000.0), placed(3215.0), CART) == [
+        "lines add up to 3205.00, the cart subtotal was 3000.00"]
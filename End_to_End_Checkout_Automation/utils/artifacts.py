@@ -0,0 +1,119 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import allure
+from selenium.common.exceptions import WebDriverException
+from utils.config import Config
+from utils.worker import WorkerContext
+
+try:
+    from PIL import Image
+except ImportError:
+    # Without Pillow screenshots are stored as the PNG the browser returned
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+class ArtifactService:
+    '''
+    Screenshots without blocking the test. The test thread only grabs the PNG bytes from the driver;
+    compressing, naming and writing happen on a background thread into screenshots/<run id>/.
+    Identical captures (same bytes) are written once. Captures are attached to allure by flush(),
+    which the pytest fixture calls when a test finishes, because allure only accepts attachments
+    from the thread running the test.
+    Success-path captures are skipped unless SCREENSHOTS_ON_SUCCESS is set.
+    '''
+    def __init__(self, capture_success=None, quality=None, run_id=None):
+        self.capture_success = Config.SCREENSHOTS_ON_SUCCESS if capture_success is None else capture_success
+        self.quality = Config.SCREENSHOT_QUALITY if quality is None else quality
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._lock = threading.Lock()
+        self._executor = None
+        self._run_dir = None
+        self._sequence = 0
+        self._written = {}
+        self._pending = []
+
+    @property
+    def run_dir(self):
+        if self._run_dir is None:
+            self._run_dir = os.path.join(WorkerContext().output_dir("screenshots"), self.run_id)
+            os.makedirs(self._run_dir, exist_ok=True)
+        return self._run_dir
+
+    def screenshot(self, driver, name, success=False):
+        """Capture the current page. Returns a future of the written path, or None when skipped."""
+        if success and not self.capture_success:
+            return None
+        try:
+            png = driver.get_screenshot_as_png()
+        except WebDriverException as e:
+            logger.warning("Unable to capture screenshot '%s': %s", name, e)
+            return None
+        return self.add(name, png)
+
+    def add(self, name, png):
+        digest = hashlib.sha1(png).hexdigest()
+        with self._lock:
+            future = self._written.get(digest)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifacts")
+                self._sequence += 1
+                future = self._executor.submit(self._write, name, png, self._sequence)
+                self._written[digest] = future
+            else:
+                logger.info("Screenshot '%s' is identical to an earlier capture, not writing it again", name)
+            self._pending.append((name, future))
+        return future
+
+    def flush(self, attach=True):
+        """
+        Wait for the captures made since the last flush and attach them to the current allure test.
+        Returns (name, path) of each written capture.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        attached = set()
+        written = []
+        for name, future in pending:
+            try:
+                path, attachment_type = future.result()
+            except Exception as e:
+                logger.error("Unable to write screenshot '%s': %s", name, e)
+                continue
+            logger.info("Screenshot '%s' saved to %s", name, path)
+            written.append((name, path))
+            if attach and (name, path) not in attached:
+                allure.attach.file(path, name=name, attachment_type=attachment_type)
+                attached.add((name, path))
+        return written
+
+    def close(self):
+        self.flush(attach=False)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _write(self, name, png, sequence):
+        data, extension, attachment_type = self._compress(png)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_").lower() or "screenshot"
+        path = os.path.join(self.run_dir, "%03d_%s_%s.%s" % (sequence, datetime.now().strftime("%H%M%S"), slug, extension))
+        with open(path, "wb") as f:
+            f.write(data)
+        return path, attachment_type
+
+    def _compress(self, png):
+        if Image is None or self.quality >= 100:
+            return png, "png", allure.attachment_type.PNG
+        with Image.open(io.BytesIO(png)) as image:
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        return buffer.getvalue(), "jpg", allure.attachment_type.JPG
+
+artifacts = ArtifactService()
@@ -0,0 +1,85 @@
+import logging
+import re
+from collections import OrderedDict
+import requests
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+class CartSeeder:
+    '''
+    Fills the cart with direct HTTP calls instead of searching and clicking through the UI.
+    The HTTP client shares the driver's cookies, so the products land in the same customer's cart
+    the browser sees. Products are posted to the storefront's add-to-cart endpoint one after another
+    over one keep-alive connection; concurrent adds to the same cart can race on the storefront.
+    Use it for flows that only need a populated cart; flows that test search/add-to-cart keep the UI path.
+    '''
+    ADD_TO_CART_PATH = "/addproducttocart/details/{product_id}/1"
+
+    def __init__(self, driver, base_url=None):
+        self.driver = driver
+        self.base_url = (base_url or Config.BASE_URL).rstrip("/")
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": driver.execute_script("return navigator.userAgent;"),
+            "X-Requested-With": "XMLHttpRequest",
+        })
+
+    @staticmethod
+    def product_id(product):
+        """Product id from test data: an explicit 'product_id' or the id in 'add_to_cart_xpath'."""
+        if "product_id" in product:
+            return int(product["product_id"])
+        match = re.search(r"add-to-cart-button-(\d+)", product.get("add_to_cart_xpath", ""))
+        if not match:
+            raise ValueError("Cannot determine the product id of %s" % product.get("name"))
+        return int(match.group(1))
+
+    def seed(self, products):
+        """
+        Add the given test-data products to the cart. A product may carry a 'quantity' (default 1).
+        Raises AssertionError if the storefront rejects any of them.
+        """
+        quantities = OrderedDict()
+        for product in products:
+            product_id = self.product_id(product)
+            quantities[product_id] = quantities.get(product_id, 0) + int(product.get("quantity", 1))
+        logger.info("Seeding cart with %d product(s) over HTTP", len(quantities))
+        if not self.driver.current_url.startswith(self.base_url):
+            # Cookies can only be read and written for the page the browser is on
+            self.driver.get(self.base_url)
+        self._load_driver_cookies()
+        failures = []
+        for product_id, quantity in quantities.items():
+            error = self._add(product_id, quantity)
+            if error:
+                failures.append("product %s: %s" % (product_id, error))
+        self._store_driver_cookies()
+        assert not failures, "Cart seeding failed for %s" % "; ".join(failures)
+        logger.info("Cart seeded successfully")
+
+    def _add(self, product_id, quantity):
+        """Post one product; returns why the storefront refused it, or None when it was added."""
+        url = self.base_url + self.ADD_TO_CART_PATH.format(product_id=product_id)
+        data = {"addtocart_%d.EnteredQuantity" % product_id: quantity}
+        try:
+            response = self.session.post(url, data=data, timeout=Config.HTTP_TIMEOUT)
+            response.raise_for_status()
+            result = response.json()
+        except (requests.RequestException, ValueError) as e:
+            return str(e)
+        if not result.get("success"):
+            return result.get("message") or "rejected by storefront"
+        logger.debug("Added product %s x%d", product_id, quantity)
+        return None
+
+    def _load_driver_cookies(self):
+        for cookie in self.driver.get_cookies():
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+
+    def _store_driver_cookies(self):
+        # The storefront may have issued a customer cookie to the HTTP client; the browser needs the same one
+        driver_cookies = {cookie["name"]: cookie["value"] for cookie in self.driver.get_cookies()}
+        for cookie in self.session.cookies:
+            if driver_cookies.get(cookie.name) != cookie.value:
+                self.driver.add_cookie({"name": cookie.name, "value": cookie.value, "path": cookie.path or "/"})
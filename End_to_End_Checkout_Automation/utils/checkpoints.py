@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from selenium.common.exceptions import WebDriverException
+from utils.artifacts import artifacts
+from utils.config import Config
+from utils.session_cache import SessionCache
+from utils.timing import step
+
+logger = logging.getLogger(__name__)
+
+class Checkpoints:
+    '''
+    Runs a flow as named steps and checkpoints the browser after each one that succeeds:
+    its cookies, current URL, the cart contents added so far and any values the steps put in `data`.
+    A failing step is retried (STEP_RETRIES times) from the last good checkpoint instead of from
+    the start of the flow. Checkpoints are kept on disk under the given key (e.g. scenario and
+    account) until the flow completes, so a rerun of a failed test skips the steps that already
+    passed and resumes at the one that failed.
+    Restoring checks the storefront's cart quantity against the checkpoint's: a failed attempt that
+    already added items makes the restore fail rather than add them a second time.
+    Steps must leave the browser where the next step expects to start.
+    '''
+    # Item count in the header's cart link, present on every storefront page
+    CART_QUANTITY_SCRIPT = """
+        var label = document.querySelector('.header .cart-qty');
+        var match = label && /\\d+/.exec(label.textContent);
+        return match ? parseInt(match[0], 10) : null;
+    """
+
+    def __init__(self, driver, key, session_cache=None, retries=None, directory=None, ttl=None):
+        self.driver = driver
+        self.key = key
+        self.session_cache = session_cache or SessionCache()
+        self.retries = Config.STEP_RETRIES if retries is None else retries
+        self.directory = directory or Config.CHECKPOINT_DIR
+        self.ttl = Config.CHECKPOINT_TTL if ttl is None else ttl
+        self.completed = []
+        self.cart = []
+        self.data = {}
+        self.last = None
+        # Steps passed since the last checkpoint, replayed after restoring it
+        self._pending = []
+        self._resume = self.load()
+        if self._resume:
+            logger.info("Found checkpoint for %s after step '%s'", key, self._resume["completed"][-1])
+            # Skipped steps do not run again: what they put in `data` comes from the checkpoint
+            self.data.update(self._resume.get("data", {}))
+
+    def run(self, name, action, failure, cart=(), checkpoint=True):
+        """
+        Run action() as step `name`, unless a previous run already completed it.
+        `failure` labels the error log and screenshot; `cart` names the items the step puts in the cart.
+        checkpoint=False is for a step whose end state a page load cannot bring back, such as a
+        section of the one-page checkout: nothing is saved after it, so a retry or a rerun of a
+        later step restores the checkpoint before it and runs it again first.
+        """
+        if self._resume and name in self._resume["completed"]:
+            logger.info("Skipping '%s', already completed by a previous run", name)
+            return
+        if self._resume:
+            # First step a previous run did not finish: continue from where it stopped
+            self.last, self._resume = self._resume, None
+            self.completed = list(self.last["completed"])
+            self.cart = list(self.last["cart"])
+            # Updated in place: callers may hold on to `data`
+            self.data.clear()
+            self.data.update(self.last.get("data", {}))
+            self.restore(self.last)
+        for attempt in range(self.retries + 1):
+            try:
+                with step(name):
+                    action()
+                break
+            except Exception as e:
+                logger.error("%s: %s", failure, e)
+                artifacts.screenshot(self.driver, "%s Screenshot" % failure)
+                if attempt == self.retries:
+                    raise
+                logger.info("Retrying '%s' (%d/%d) from the last checkpoint", name, attempt + 1, self.retries)
+                if self.last:
+                    self.restore(self.last)
+                    self._replay()
+        self.completed.append(name)
+        self.cart.extend(cart)
+        if checkpoint:
+            self.save()
+            self._pending = []
+        else:
+            self._pending.append((name, action))
+
+    def _replay(self):
+        for name, action in self._pending:
+            logger.info("Replaying '%s' on top of the restored checkpoint", name)
+            with step(name):
+                action()
+
+    def save(self):
+        self.last = {
+            "key": self.key,
+            "created": time.time(),
+            "completed": list(self.completed),
+            "cart": list(self.cart),
+            "data": dict(self.data),
+            "cart_quantity": self._cart_quantity(),
+            "url": self.driver.current_url,
+            "cookies": self.driver.get_cookies(),
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path()
+        tmp_path = path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.last, f)
+        os.replace(tmp_path, path)
+
+    def load(self):
+        try:
+            with open(self._path(), "r") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("created", 0) + self.ttl <= time.time() or not checkpoint.get("completed"):
+            logger.info("Discarding stale checkpoint for %s", self.key)
+            self.clear()
+            return None
+        return checkpoint
+
+    def restore(self, checkpoint):
+        """Put the browser back in the checkpointed state: same cookies (session and cart), same page."""
+        logger.info("Restoring checkpoint after '%s' at %s (cart: %s)", checkpoint["completed"][-1], checkpoint["url"], checkpoint["cart"])
+        try:
+            self.driver.delete_all_cookies()
+        except WebDriverException as e:
+            logger.warning("Unable to clear cookies before restoring: %s", e)
+        self.session_cache.inject(self.driver, checkpoint["cookies"])
+        self.driver.get(checkpoint["url"])
+        expected = checkpoint.get("cart_quantity")
+        quantity = self._cart_quantity() if expected is not None else None
+        if quantity is not None and quantity != expected:
+            # The cart is server side: items added by the failed attempt are still in it
+            self.clear()
+            raise RuntimeError("Cannot restore the checkpoint after '%s': the cart holds %d item(s), the checkpoint had %d (%s)"
+                               % (checkpoint["completed"][-1], quantity, expected, ", ".join(checkpoint["cart"]) or "empty"))
+
+    def _cart_quantity(self):
+        try:
+            return self.driver.execute_script(self.CART_QUANTITY_SCRIPT)
+        except WebDriverException as e:
+            logger.warning("Unable to read the cart quantity: %s", e)
+            return None
+
+    def finish(self):
+        """The flow completed: the next run starts from scratch."""
+        self.clear()
+
+    def clear(self):
+        try:
+            os.remove(self._path())
+        except FileNotFoundError:
+            pass
+
+    def _path(self):
+        digest = hashlib.sha1(("%s|%s" % (self.session_cache.base_url, self.key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "%s.json" % digest)
@@ -0,0 +1,75 @@
+import os
+
+class Config:
+    '''
+    Runtime settings for the suite.
+    Every value can be overridden with an environment variable of the same name.
+    '''
+    # Number of browsers started up front and kept warm for the whole session
+    DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "1"))
+    # A pooled browser is quit and replaced after serving this many tests
+    DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", "25"))
+    # Root for screenshots, logs and allure results; parallel workers get a sub-directory each
+    OUTPUT_DIR = os.getenv("OUTPUT_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # Storefront every page object and helper talks to
+    BASE_URL = os.getenv("BASE_URL", "https://demowebshop.tricentis.com")
+    # Where logged-in sessions are cached, and for how long (seconds) a cached session is trusted
+    SESSION_CACHE_DIR = os.getenv("SESSION_CACHE_DIR", os.path.join(OUTPUT_DIR, ".session_cache"))
+    SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "3600"))
+    # Step checkpoints: retries of a failed step from the last good checkpoint, where checkpoints
+    # are kept between runs, and for how long (seconds) a rerun may resume from one
+    STEP_RETRIES = int(os.getenv("STEP_RETRIES", "1"))
+    CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(OUTPUT_DIR, ".checkpoints"))
+    CHECKPOINT_TTL = int(os.getenv("CHECKPOINT_TTL", "1800"))
+    # Timeout (seconds) for direct HTTP calls to the storefront
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+    # PageSync: default time budget (seconds) per wait and the poll interval schedule
+    SYNC_TIMEOUT = float(os.getenv("SYNC_TIMEOUT", "15"))
+    SYNC_POLL_INITIAL = float(os.getenv("SYNC_POLL_INITIAL", "0.05"))
+    SYNC_POLL_BACKOFF = float(os.getenv("SYNC_POLL_BACKOFF", "1.5"))
+    SYNC_POLL_MAX = float(os.getenv("SYNC_POLL_MAX", "0.5"))
+    # DriverFactory profile for tests that do not ask for full rendering: lean, headless or full
+    DRIVER_PROFILE = os.getenv("DRIVER_PROFILE", "lean")
+    # Start every browser on one long-lived chromedriver per worker instead of a new one per browser
+    SHARED_DRIVER_SERVICE = os.getenv("SHARED_DRIVER_SERVICE", "true").lower() in ("1", "true", "yes")
+    # Where the resolved chromedriver/Chrome paths are cached for the machine, and for how long (seconds)
+    DRIVER_CACHE_FILE = os.getenv("DRIVER_CACHE_FILE", os.path.join(os.path.expanduser("~"), ".cache", "checkout-automation", "drivers.json"))
+    DRIVER_CACHE_TTL = int(os.getenv("DRIVER_CACHE_TTL", "86400"))
+    # WebDriver endpoints to spread browser sessions over (comma separated chromedriver or Grid URLs,
+    # "local" for this worker's own chromedriver); empty starts every browser locally. An endpoint is
+    # drained after ENDPOINT_MAX_FAILURES failures in a row and re-checked after ENDPOINT_COOLDOWN seconds
+    WEBDRIVER_ENDPOINTS = os.getenv("WEBDRIVER_ENDPOINTS", "")
+    ENDPOINT_MAX_FAILURES = int(os.getenv("ENDPOINT_MAX_FAILURES", "3"))
+    ENDPOINT_COOLDOWN = float(os.getenv("ENDPOINT_COOLDOWN", "60"))
+    # Latency (milliseconds) the local stub storefront adds to page loads and to AJAX calls
+    STUB_LATENCY_MS = int(os.getenv("STUB_LATENCY_MS", "0"))
+    STUB_AJAX_LATENCY_MS = int(os.getenv("STUB_AJAX_LATENCY_MS", "0"))
+    # Benchmarks: measured and discarded warm-up iterations, and the slowdown (fraction of the
+    # baseline median) beyond which a phase counts as a regression
+    BENCHMARK_ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", "5"))
+    BENCHMARK_WARMUP = int(os.getenv("BENCHMARK_WARMUP", "1"))
+    BENCHMARK_THRESHOLD = float(os.getenv("BENCHMARK_THRESHOLD", "0.2"))
+    # Screenshots: also capture on the success path (off by default), and the JPEG quality used
+    # when Pillow is installed (100 keeps the browser's PNG)
+    SCREENSHOTS_ON_SUCCESS = os.getenv("SCREENSHOTS_ON_SUCCESS", "false").lower() in ("1", "true", "yes")
+    SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "80"))
+    # Capture browser-side page metrics (navigation/resource timing, LCP, XHRs) at page transitions
+    PAGE_METRICS = os.getenv("PAGE_METRICS", "true").lower() in ("1", "true", "yes")
+    # Sample the browser's process tree (RSS, CPU; needs psutil) and DevTools metrics (JS heap, DOM nodes)
+    # after every step. A browser over any of these limits after a test is replaced before the next one (0 disables a limit)
+    RESOURCE_MONITOR = os.getenv("RESOURCE_MONITOR", "true").lower() in ("1", "true", "yes")
+    RESOURCE_MAX_RSS_MB = float(os.getenv("RESOURCE_MAX_RSS_MB", "1500"))
+    RESOURCE_MAX_JS_HEAP_MB = float(os.getenv("RESOURCE_MAX_JS_HEAP_MB", "300"))
+    RESOURCE_MAX_DOM_NODES = int(os.getenv("RESOURCE_MAX_DOM_NODES", "50000"))
+    # Logging: root level, and size (bytes) / number of rotated files of each worker's JSON-lines log
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    # SQLite database every run appends its test outcomes, step timings and artifact paths to
+    RESULTS_DB = os.getenv("RESULTS_DB", os.path.join(OUTPUT_DIR, "results.db"))
+    # Load generator defaults: concurrent virtual users, ramp-up and run time (seconds), and the
+    # mean think time (seconds) a user pauses after each step
+    LOAD_USERS = int(os.getenv("LOAD_USERS", "5"))
+    LOAD_RAMP_UP = float(os.getenv("LOAD_RAMP_UP", "30"))
+    LOAD_DURATION = float(os.getenv("LOAD_DURATION", "300"))
+    LOAD_THINK_TIME = float(os.getenv("LOAD_THINK_TIME", "1"))
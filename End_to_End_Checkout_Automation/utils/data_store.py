@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestDataError(ValueError):
+    '''
+    The test data file does not match the expected schema.
+    '''
+
+class TestDataStore:
+    '''
+    Test data parsed once per process and shared by every caller.
+    - The file is re-read only when its mtime changes.
+    - The top-level schema is validated on load, so a broken file fails before the first browser starts.
+    - Products are indexed by name; sections are validated and indexed on first use.
+    - A list section may instead name a JSON-lines file ("products": "products.jsonl"). Such a
+      section is streamed record by record and indexed by byte offset, so a catalog of thousands
+      of products is never held in memory or scanned per lookup.
+    '''
+    # section -> (required, fields every record must have); a dict section is a single record
+    SCHEMA = {
+        "credentials": (True, ("email", "password")),
+        "products": (True, ("name", "url", "add_to_cart_xpath")),
+        "shipping_billing_address": (True, ()),
+        "accounts": (False, ("email", "password")),
+        "scenarios": (False, ("id", "products")),
+        "home_page": (False, ("url",)),
+    }
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._mtime = None
+        self._data = None
+        self._indexes = {}
+
+    @classmethod
+    def get(cls, file_path="test_data.json"):
+        path = file_path if os.path.isabs(file_path) else os.path.join(BASE_DIR, file_path)
+        with cls._stores_lock:
+            if path not in cls._stores:
+                cls._stores[path] = cls(path)
+            return cls._stores[path]
+
+    @property
+    def data(self):
+        """The parsed file. JSON-lines sections appear as their file name; read them with records()."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                logger.error("Test data file not found: %s", self.path)
+                raise
+            if mtime != self._mtime:
+                self._load(mtime)
+            return self._data
+
+    def section(self, name):
+        data = self.data
+        if name not in data:
+            raise KeyError("Test data has no '%s' section" % name)
+        return data[name]
+
+    def records(self, name):
+        """Iterate the records of a list section, streaming it when it lives in a JSON-lines file."""
+        value = self.section(name)
+        if not isinstance(value, str):
+            yield from value
+            return
+        with open(self._resolve(value), "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield self._parse_record(name, value, line_number, line)
+
+    def products(self):
+        return list(self.records("products"))
+
+    def product(self, name):
+        """Look a product up by name (None if there is no such product)."""
+        return self.lookup("products", "name", name)
+
+    def lookup(self, section, field, value):
+        """O(1) lookup of a list-section record by one of its fields; the index is built on first use."""
+        self.data  # reloads the file, dropping stale indexes, if it changed
+        with self._lock:
+            key = (section, field)
+            if key not in self._indexes:
+                self._indexes[key] = self._build_index(section, field)
+            entry = self._indexes[key].get(value)
+        if entry is None or isinstance(entry, dict):
+            return entry
+        path, line_number, offset = entry
+        with open(path, "r", encoding="utf-8") as f:
+            f.seek(offset)
+            return self._parse_record(section, path, line_number, f.readline())
+
+    def _build_index(self, section, field):
+        value = self.section(section)
+        if not isinstance(value, str):
+            return {record[field]: record for record in value}
+        # JSON-lines section: remember where each record starts instead of keeping it
+        path = self._resolve(value)
+        index = {}
+        with open(path, "rb") as f:
+            line_number = 0
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                line_number += 1
+                if line.strip():
+                    record = self._parse_record(section, path, line_number, line)
+                    index[record[field]] = (path, line_number, offset)
+        logger.info("Indexed %d '%s' records of %s by %s", len(index), section, path, field)
+        return index
+
+    def _load(self, mtime):
+        logger.info("Reading test data from %s", self.path)
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                logger.error("Failed to parse test data: %s", str(e))
+                raise
+        self._validate(data)
+        self._data = data
+        self._mtime = mtime
+        self._indexes = {}
+
+    def _validate(self, data):
+        if not isinstance(data, dict):
+            raise TestDataError("%s: expected a JSON object at the top level" % self.path)
+        for name, (required, fields) in self.SCHEMA.items():
+            if name not in data:
+                if required:
+                    raise TestDataError("%s: missing required section '%s'" % (self.path, name))
+                continue
+            value = data[name]
+            if isinstance(value, dict):
+                self._check_fields(name, value, name)
+            elif isinstance(value, list):
+                for position, record in enumerate(value):
+                    self._check_fields(name, record, "%s[%d]" % (name, position))
+            elif isinstance(value, str) and value.endswith(".jsonl"):
+                # Streamed section: its records are checked as they are read
+                if not os.path.exists(self._resolve(value)):
+                    raise TestDataError("%s: section '%s' refers to missing file %s" % (self.path, name, value))
+                continue
+            else:
+                raise TestDataError("%s: section '%s' must be an object, a list or a .jsonl file name" % (self.path, name))
+
+    def _parse_record(self, section, path, line_number, line):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise TestDataError("%s:%d: invalid JSON: %s" % (path, line_number, e))
+        self._check_fields(section, record, "%s:%d" % (path, line_number))
+        return record
+
+    def _check_fields(self, section, record, where):
+        if not isinstance(record, dict):
+            raise TestDataError("%s: %s must be an object" % (self.path, where))
+        missing = [field for field in self.SCHEMA.get(section, (False, ()))[1] if field not in record]
+        if missing:
+            raise TestDataError("%s: %s is missing %s" % (self.path, where, ", ".join(missing)))
+
+    def _resolve(self, file_name):
+        return file_name if os.path.isabs(file_name) else os.path.join(os.path.dirname(self.path), file_name)
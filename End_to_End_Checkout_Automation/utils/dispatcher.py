@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from urllib.error import URLError
+from urllib.request import urlopen
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from urllib3.exceptions import HTTPError as TransportError
+from utils.config import Config
+from utils.driver_service import ChromeDriverService, SharedServiceChrome, resolve_binaries
+
+logger = logging.getLogger(__name__)
+
+LOCAL = "local"
+
+class Endpoint:
+    '''
+    One WebDriver endpoint (a chromedriver or a Grid-compatible node) and its live load:
+    sessions running on it, latency of its recent commands, and consecutive failures.
+    Session start times (browser launch included) are kept apart from command latencies, which
+    alone are used for routing. After `max_failures` failures in a row it is drained: no new
+    sessions are scheduled on it until `cooldown` seconds have passed and its /status answers
+    ready again. Its state is changed under the dispatcher's lock.
+    '''
+    def __init__(self, url, max_failures=3, cooldown=60):
+        self.url = url.rstrip("/")
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.active = 0
+        self.started = 0
+        self.failures = 0
+        self.total_failures = 0
+        self.drained_until = 0.0
+        self.latencies = deque(maxlen=50)
+        self.start_latencies = deque(maxlen=50)
+
+    @property
+    def local(self):
+        return self.url == LOCAL
+
+    @property
+    def drained(self):
+        return self.drained_until > 0
+
+    def mean_latency(self):
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def mean_start_latency(self):
+        return sum(self.start_latencies) / len(self.start_latencies) if self.start_latencies else 0.0
+
+    def record_latency(self, seconds):
+        self.latencies.append(seconds)
+        self.failures = 0
+
+    def record_start(self, seconds):
+        self.start_latencies.append(seconds)
+        self.started += 1
+        self.failures = 0
+
+    def record_failure(self, error):
+        self.failures += 1
+        self.total_failures += 1
+        if self.failures >= self.max_failures and not self.drained:
+            self.drained_until = time.monotonic() + self.cooldown
+            logger.warning("Draining WebDriver endpoint %s after %d failures in a row: %s", self.url, self.failures, error)
+
+    def claim_probe(self):
+        """
+        True when a drained endpoint's cooldown is over and it should be probed. The next probe is
+        pushed a cooldown out right away, so only one caller probes it and a failed probe waits again.
+        """
+        if not self.drained or time.monotonic() < self.drained_until:
+            return False
+        self.drained_until = time.monotonic() + self.cooldown
+        return True
+
+    def readmit(self):
+        logger.info("WebDriver endpoint %s is healthy again", self.url)
+        self.drained_until = 0.0
+        self.failures = 0
+
+    def probe(self):
+        if self.local:
+            return True
+        try:
+            with urlopen(self.url + "/status", timeout=Config.HTTP_TIMEOUT) as response:
+                status = json.load(response).get("value", {})
+        except (URLError, OSError, ValueError) as e:
+            logger.debug("Status probe of %s failed: %s", self.url, e)
+            return False
+        return bool(status.get("ready", True))
+
+    def report(self):
+        return {
+            "url": self.url,
+            "active_sessions": self.active,
+            "sessions_started": self.started,
+            "failures": self.total_failures,
+            "drained": self.drained,
+            "mean_latency_ms": round(self.mean_latency() * 1000, 2),
+            "mean_session_start_ms": round(self.mean_start_latency() * 1000, 2),
+        }
+
+class DispatchedChrome(SharedServiceChrome):
+    '''
+    A Chrome session started by the dispatcher. Every command's latency is reported to its endpoint,
+    transport errors count as endpoint failures, and quit() frees the endpoint's slot.
+    '''
+    endpoint = None
+    dispatcher = None
+
+    def execute(self, driver_command, params=None):
+        start = time.perf_counter()
+        try:
+            result = super().execute(driver_command, params)
+        except (TransportError, OSError) as e:
+            if self.dispatcher is not None:
+                self.dispatcher.failed(self.endpoint, e)
+            raise
+        if self.dispatcher is not None:
+            self.dispatcher.succeeded(self.endpoint, time.perf_counter() - start)
+        return result
+
+    def quit(self):
+        try:
+            super().quit()
+        finally:
+            if self.dispatcher is not None:
+                self.dispatcher.release(self.endpoint)
+                self.dispatcher = None
+
+class EndpointDispatcher:
+    '''
+    Schedules new browser sessions across the WebDriver endpoints in WEBDRIVER_ENDPOINTS
+    (comma separated URLs; "local" is this worker's shared chromedriver). A session goes to the
+    healthy endpoint with the fewest active sessions, the lowest recent command latency breaking
+    ties. When an endpoint cannot start a session the next one is tried, and failing endpoints are
+    drained and re-admitted automatically.
+    '''
+    def __init__(self, urls=None, max_failures=None, cooldown=None):
+        urls = Config.WEBDRIVER_ENDPOINTS if urls is None else urls
+        if isinstance(urls, str):
+            urls = [url.strip() for url in urls.split(",") if url.strip()]
+        max_failures = Config.ENDPOINT_MAX_FAILURES if max_failures is None else max_failures
+        cooldown = Config.ENDPOINT_COOLDOWN if cooldown is None else cooldown
+        self.endpoints = [Endpoint(url, max_failures, cooldown) for url in urls]
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.endpoints)
+
+    def session(self, options):
+        """Start a session on the least-loaded healthy endpoint, falling back to the others in load order."""
+        tried = set()
+        last_error = None
+        while True:
+            endpoint = self._reserve(tried)
+            if endpoint is None:
+                raise WebDriverException("No WebDriver endpoint could start a session (%s)" % ", ".join(e.url for e in self.endpoints)) from last_error
+            tried.add(endpoint)
+            start = time.perf_counter()
+            try:
+                driver = self._start(endpoint, options)
+            except (WebDriverException, TransportError, OSError) as e:
+                logger.warning("WebDriver endpoint %s could not start a session: %s", endpoint.url, e)
+                self.failed(endpoint, e)
+                self.release(endpoint)
+                last_error = e
+                continue
+            with self._lock:
+                endpoint.record_start(time.perf_counter() - start)
+            driver.endpoint = endpoint
+            driver.dispatcher = self
+            logger.info("Started session %s on %s (%d active)", driver.session_id, endpoint.url, endpoint.active)
+            return driver
+
+    def _reserve(self, tried):
+        with self._lock:
+            due = [endpoint for endpoint in self.endpoints if endpoint not in tried and endpoint.claim_probe()]
+        # Probing a drained endpoint is a network call: do it outside the lock
+        for endpoint in due:
+            if endpoint.probe():
+                with self._lock:
+                    endpoint.readmit()
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in tried and not endpoint.drained]
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda endpoint: (endpoint.active, endpoint.mean_latency()))
+            endpoint.active += 1
+            return endpoint
+
+    def _start(self, endpoint, options):
+        if endpoint.local:
+            driver_path, browser_path = resolve_binaries(options)
+            if browser_path:
+                options.binary_location = browser_path
+            url = ChromeDriverService.url(driver_path)
+        else:
+            url = endpoint.url
+        return DispatchedChrome(command_executor=ChromeRemoteConnection(url, keep_alive=True), options=options)
+
+    def succeeded(self, endpoint, seconds):
+        with self._lock:
+            endpoint.record_latency(seconds)
+
+    def failed(self, endpoint, error):
+        with self._lock:
+            endpoint.record_failure(error)
+
+    def release(self, endpoint):
+        with self._lock:
+            endpoint.active = max(endpoint.active - 1, 0)
+
+    def report(self):
+        with self._lock:
+            return [endpoint.report() for endpoint in self.endpoints]
+
+    def export(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "endpoints.json")
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+dispatcher = EndpointDispatcher()
@@ -0,0 +1,215 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from selenium.common.exceptions import WebDriverException
+from utils.config import Config
+from utils.driver_factory import DriverFactory
+from utils.timing import timings
+
+logger = logging.getLogger(__name__)
+
+class DriverPool:
+    '''
+    Keeps a set of started browsers warm for the whole test session.
+    Tests lease a driver and hand it back when done. On return the driver is reset
+    (cookies, storage, extra windows) and health-checked, and it is recycled after
+    max_uses tests, as soon as it stops responding, or when retire() flags it (e.g. it grew too large).
+    A driver leased for its last use gets its replacement started right away, so the next test does
+    not wait for a browser launch.
+    '''
+    def __init__(self, factory, size=1, max_uses=25):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self._idle = []
+        self._uses = {}
+        self._replaced = set()
+        self._retired = set()
+        self._lock = threading.Condition()
+        self._starting = 0
+        self._last_error = None
+        self._closed = False
+
+    def start(self):
+        """Start the pool's browsers in parallel so the first test does not pay for them."""
+        logger.info("Starting driver pool with %d driver(s)", self.size)
+        for _ in range(self.size):
+            self._spawn()
+        return self
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                driver = self._next_idle()
+            # Health checks and quits can hang on a dead browser: keep them outside the lock
+            if self.is_healthy(driver):
+                with self._lock:
+                    self._uses[driver] = self._uses.get(driver, 0) + 1
+                    logger.debug("Leased driver %s (use %d)", driver.session_id, self._uses[driver])
+                    if self._uses[driver] >= self.max_uses:
+                        # Last use: warm up the replacement while this test runs
+                        self._replaced.add(driver)
+                        self._spawn()
+                return driver
+            logger.warning("Discarding unresponsive driver %s", driver.session_id)
+            self._recycle(driver)
+
+    def _next_idle(self):
+        """Take an idle driver, waiting for one to start if needed. Called with the lock held."""
+        while True:
+            if self._closed:
+                raise RuntimeError("Driver pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            if not self._starting:
+                if self._last_error is not None:
+                    error, self._last_error = self._last_error, None
+                    raise RuntimeError("Unable to start a WebDriver for the pool") from error
+                self._spawn()
+            self._lock.wait()
+
+    def retire(self, driver):
+        """Replace this driver when it is released instead of leasing it again."""
+        with self._lock:
+            self._retired.add(driver)
+
+    def release(self, driver, broken=False):
+        with self._lock:
+            uses = self._uses.get(driver, 0)
+            recycle = broken or self._closed or driver in self._retired or uses >= self.max_uses
+        if recycle:
+            logger.info("Recycling driver %s after %d use(s)", driver.session_id, uses)
+            self._recycle(driver)
+            return
+        if not self.reset(driver):
+            logger.warning("Reset failed, recycling driver %s", driver.session_id)
+            self._recycle(driver)
+            return
+        with self._lock:
+            self._idle.append(driver)
+            self._lock.notify()
+
+    @contextmanager
+    def lease(self):
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = not self.is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            drivers = list(self._uses)
+            self._idle.clear()
+            self._lock.notify_all()
+        logger.info("Closing driver pool (%d driver(s))", len(drivers))
+        for driver in drivers:
+            self._discard(driver)
+
+    @staticmethod
+    def is_healthy(driver):
+        try:
+            driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def reset(driver):
+        """Bring a used browser back to a blank state. Returns False if the browser is unusable."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            try:
+                driver.execute_script("localStorage.clear(); sessionStorage.clear();")
+            except WebDriverException:
+                # about:blank and data: pages have no storage to clear
+                pass
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except (AttributeError, WebDriverException):
+                # Not a Chromium driver: only the current domain's cookies are reachable
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except WebDriverException as e:
+            logger.error("Unable to reset driver: %s", e)
+            return False
+
+    def _spawn(self):
+        """Start one replacement driver on a background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._starting += 1
+        threading.Thread(target=self._start_driver, name="driver-pool-spawn", daemon=True).start()
+
+    def _start_driver(self):
+        driver = error = None
+        start = time.perf_counter()
+        try:
+            driver = self.factory()
+            timings.record_step("Driver startup", time.perf_counter() - start)
+        except Exception as e:
+            logger.error("Failed to start pooled driver: %s", e)
+            error = e
+        with self._lock:
+            self._starting -= 1
+            closed = self._closed
+            if driver is None:
+                self._last_error = error
+            elif not closed:
+                self._uses[driver] = 0
+                self._idle.append(driver)
+            self._lock.notify_all()
+        if driver is not None and closed:
+            self._quit(driver)
+
+    def _recycle(self, driver):
+        with self._lock:
+            replaced = driver in self._replaced
+        self._discard(driver)
+        if not replaced:
+            self._spawn()
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(driver, None)
+            self._replaced.discard(driver)
+            self._retired.discard(driver)
+        self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning("Error while quitting driver: %s", e)
+
+class DriverPools:
+    '''
+    One warm DriverPool per driver profile, started on first use.
+    '''
+    def __init__(self, default_profile):
+        self.default_profile = default_profile
+        self.pools = {}
+
+    def get(self, profile=None):
+        profile = profile or self.default_profile
+        if profile not in self.pools:
+            factory = lambda: DriverFactory.get_driver(profile)
+            self.pools[profile] = DriverPool(factory, size=Config.DRIVER_POOL_SIZE, max_uses=Config.DRIVER_MAX_USES).start()
+        return self.pools[profile]
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
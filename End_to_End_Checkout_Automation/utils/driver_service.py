@@ -0,0 +1,130 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from selenium import webdriver
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from selenium.webdriver.chrome.service import Service
+from utils.config import Config
+from utils.timing import timings
+
+logger = logging.getLogger(__name__)
+
+def resolve_binaries(options):
+    """
+    Paths of chromedriver and of the Chrome binary to drive, as (driver_path, browser_path).
+    Selenium Manager is asked once per machine; the answer is cached in DRIVER_CACHE_FILE for
+    DRIVER_CACHE_TTL seconds and dropped early if either file disappears.
+    """
+    cached = _load_cache()
+    if cached:
+        return cached["driver_path"], cached["browser_path"]
+    start = time.perf_counter()
+    driver_path, browser_path = _selenium_manager(options)
+    timings.record_step("Driver binary resolution", time.perf_counter() - start)
+    logger.info("Resolved chromedriver %s and browser %s in %.2fs", driver_path, browser_path or "(default)", time.perf_counter() - start)
+    _save_cache(driver_path, browser_path)
+    return driver_path, browser_path
+
+def _selenium_manager(options):
+    from selenium.webdriver.common.driver_finder import DriverFinder
+    try:
+        finder = DriverFinder(Service(), options)
+    except TypeError:
+        # Selenium < 4.20: DriverFinder only has a static get_path()
+        return DriverFinder.get_path(Service(), options), options.binary_location or None
+    return finder.get_driver_path(), finder.get_browser_path() or None
+
+def _load_cache():
+    try:
+        with open(Config.DRIVER_CACHE_FILE, "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("resolved_at", 0) + Config.DRIVER_CACHE_TTL <= time.time():
+        return None
+    if not os.path.isfile(entry.get("driver_path") or ""):
+        return None
+    if entry.get("browser_path") and not os.path.isfile(entry["browser_path"]):
+        return None
+    return entry
+
+def _save_cache(driver_path, browser_path):
+    directory = os.path.dirname(Config.DRIVER_CACHE_FILE)
+    os.makedirs(directory, exist_ok=True)
+    # Parallel workers resolve at the same time: write a private file and swap it in
+    tmp_path = "%s.%d.tmp" % (Config.DRIVER_CACHE_FILE, os.getpid())
+    with open(tmp_path, "w") as f:
+        json.dump({"driver_path": driver_path, "browser_path": browser_path, "resolved_at": time.time()}, f)
+    os.replace(tmp_path, Config.DRIVER_CACHE_FILE)
+
+class SharedServiceChrome(webdriver.Remote):
+    '''
+    A Chrome session on the worker's shared chromedriver. quit() ends the browser session only;
+    the chromedriver process keeps serving the next one.
+    '''
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+class ChromeDriverService:
+    '''
+    One long-lived chromedriver per worker process that serves every browser session the worker
+    starts, so a new session costs only the browser launch. It is started on first use (or by
+    prestart() in the background), restarted if it dies, and stopped when the process exits.
+    '''
+    _lock = threading.Lock()
+    _service = None
+
+    @classmethod
+    def url(cls, driver_path):
+        with cls._lock:
+            if cls._service is None or not cls._service.is_connectable():
+                if cls._service is not None:
+                    logger.warning("Shared chromedriver stopped responding, starting a new one")
+                    cls._stop_service(cls._service)
+                start = time.perf_counter()
+                service = Service(executable_path=driver_path)
+                service.start()
+                timings.record_step("Driver service startup", time.perf_counter() - start)
+                logger.info("Started shared chromedriver at %s in %.2fs", service.service_url, time.perf_counter() - start)
+                cls._service = service
+            return cls._service.service_url
+
+    @classmethod
+    def prestart(cls, options):
+        """Resolve the binaries and start the service on a background thread."""
+        def start():
+            try:
+                cls.url(resolve_binaries(options)[0])
+            except Exception as e:
+                # The first session will try again and report the error
+                logger.warning("Unable to prestart chromedriver: %s", e)
+        thread = threading.Thread(target=start, name="chromedriver-prestart", daemon=True)
+        thread.start()
+        return thread
+
+    @classmethod
+    def session(cls, options):
+        driver_path, browser_path = resolve_binaries(options)
+        if browser_path:
+            options.binary_location = browser_path
+        executor = ChromeRemoteConnection(cls.url(driver_path), keep_alive=True)
+        return SharedServiceChrome(command_executor=executor, options=options)
+
+    @classmethod
+    def stop(cls):
+        with cls._lock:
+            service, cls._service = cls._service, None
+        if service is not None:
+            cls._stop_service(service)
+
+    @staticmethod
+    def _stop_service(service):
+        try:
+            service.stop()
+        except Exception as e:
+            logger.warning("Error while stopping chromedriver: %s", e)
+
+atexit.register(ChromeDriverService.stop)
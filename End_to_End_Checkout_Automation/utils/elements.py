@@ -0,0 +1,90 @@
+import logging
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.support.ui import WebDriverWait
+from utils.locators import locators
+
+logger = logging.getLogger(__name__)
+
+class ElementProxy:
+    '''
+    Stands in for a WebElement that is looked up on first use and then reused.
+    If the cached element has gone stale (the DOM was re-rendered or the browser navigated),
+    it is looked up again and the call is retried once.
+    Use .element where Selenium needs a real WebElement (execute_script arguments, ActionChains).
+    '''
+    def __init__(self, name, resolve):
+        self._name = name
+        self._resolve = resolve
+        self._element = None
+
+    @property
+    def element(self):
+        if self._element is None:
+            self._element = self._resolve()
+        return self._element
+
+    def invalidate(self):
+        self._element = None
+
+    def __getattr__(self, name):
+        for attempt in (1, 2):
+            try:
+                value = getattr(self.element, name)
+                break
+            except StaleElementReferenceException:
+                if attempt == 2:
+                    raise
+                logger.debug("%s went stale, looking it up again", self._name)
+                self.invalidate()
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            for attempt in (1, 2):
+                try:
+                    return getattr(self.element, name)(*args, **kwargs)
+                except StaleElementReferenceException:
+                    if attempt == 2:
+                        raise
+                    logger.debug("%s went stale, looking it up again", self._name)
+                    self.invalidate()
+        return call
+
+    def __repr__(self):
+        return "ElementProxy(%s)" % self._name
+
+class Element:
+    '''
+    Page-object attribute that resolves to a cached, lazily looked-up element:
+
+        class CheckoutPage:
+            checkout_button = Element((By.ID, "checkout"), condition="clickable")
+
+    The first access on a page instance waits (up to `timeout`) for the element to satisfy
+    `condition` (present, visible or clickable), using the registered locator and its fallbacks.
+    Later accesses on the same page reuse the handle until it goes stale.
+    '''
+    def __init__(self, *candidates, condition="present", timeout=10):
+        self.candidates = candidates
+        self.condition = condition
+        self.timeout = timeout
+        self.name = None
+        self.locator = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.locator = locators.register("%s.%s" % (owner.__name__, name), *self.candidates)
+
+    def __get__(self, page, owner=None):
+        if page is None:
+            return self
+        cache = page.__dict__.setdefault("_elements", {})
+        if self.name not in cache:
+            cache[self.name] = ElementProxy(self.locator.name, lambda: self.resolve(page.driver))
+        return cache[self.name]
+
+    def __set__(self, page, value):
+        raise AttributeError("%s is a page element and cannot be reassigned" % self.name)
+
+    def resolve(self, driver):
+        return WebDriverWait(driver, self.timeout).until(getattr(self.locator, self.condition)())
@@ -0,0 +1,101 @@
+import logging
+from selenium.webdriver.common.by import By
+from utils.waits import PageSync
+
+logger = logging.getLogger(__name__)
+
+class FormFiller:
+    '''
+    Fills a whole form section in one scripted call instead of a wait+clear+send_keys per field.
+    Takes a data section (e.g. test_data.json["shipping_billing_address"]) and a field map:
+        {"field": "city", "by": By.XPATH, "locator": "city_field_xpath"}
+    "field" is the data key holding the value and "locator" the data key holding the selector
+    (or the selector itself when the data has no such key). Fields with "depends_on" are filled
+    in a second pass after the AJAX reload their parent triggers (e.g. country -> state).
+    Text inputs get their value set; selects pick the option whose value or text matches, falling back
+    to the first option starting with the given text, like typing into the dropdown. Both fire
+    input/change events so the storefront's own handlers run. All values are verified afterwards.
+    '''
+    # arguments[0]: [{field, by, selector, value}]. Fills nothing unless every field is usable.
+    FILL_SCRIPT = """
+        var fields = arguments[0];
+        function resolve(by, selector) {
+            if (by === 'id') { return document.getElementById(selector); }
+            if (by === 'name') { return document.getElementsByName(selector)[0] || null; }
+            if (by === 'xpath') {
+                return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            }
+            return document.querySelector(selector);
+        }
+        function matchOption(select, wanted) {
+            var options = Array.prototype.slice.call(select.options), lower = wanted.toLowerCase();
+            return options.find(function (o) { return o.value === wanted || o.text.trim() === wanted; })
+                || options.find(function (o) { return o.text.trim().toLowerCase().indexOf(lower) === 0; });
+        }
+        var elements = [], missing = [];
+        fields.forEach(function (f) {
+            var el = resolve(f.by, f.selector);
+            if (!el || el.offsetParent === null || el.disabled) { missing.push(f.field); }
+            elements.push(el);
+        });
+        if (missing.length) { return {missing: missing}; }
+        var results = {};
+        fields.forEach(function (f, i) {
+            var el = elements[i], ok = true;
+            if (f.value !== null) {
+                if (el.tagName === 'SELECT') {
+                    var option = matchOption(el, f.value);
+                    ok = !!option;
+                    if (option) { el.value = option.value; }
+                } else {
+                    el.value = f.value;
+                }
+                el.dispatchEvent(new Event('input', {bubbles: true}));
+                el.dispatchEvent(new Event('change', {bubbles: true}));
+            }
+            var actual = el.tagName === 'SELECT' ? (el.selectedIndex >= 0 ? el.options[el.selectedIndex].text.trim() : null) : el.value;
+            if (f.value !== null && el.tagName !== 'SELECT') { ok = actual === f.value; }
+            if (f.value !== null && el.tagName === 'SELECT') { ok = ok && matchOption(el, f.value) === el.options[el.selectedIndex]; }
+            if (f.value === null && el.tagName === 'SELECT') { ok = el.selectedIndex >= 0; }
+            results[f.field] = {ok: ok, value: actual};
+        });
+        return {missing: [], results: results};
+    """
+    BY_NAMES = {By.ID: "id", By.NAME: "name", By.XPATH: "xpath", By.CSS_SELECTOR: "css"}
+
+    def __init__(self, driver, sync=None):
+        self.driver = driver
+        self.sync = sync or PageSync(driver)
+
+    def fill(self, data, field_map, timeout=None):
+        """Fill and verify every mapped field. Returns {field: value actually shown on the page}."""
+        independent = [f for f in field_map if not f.get("depends_on")]
+        dependent = [f for f in field_map if f.get("depends_on")]
+        results = self._run(self._fields(data, independent), timeout)
+        if dependent:
+            # Parent fields (e.g. country) reload their dependents over AJAX
+            self.sync.wait_for_ajax_idle(timeout)
+            results.update(self._run(self._fields(data, dependent), timeout))
+        failed = {field: result["value"] for field, result in results.items() if not result["ok"]}
+        assert not failed, "Form fields did not take the expected values: %s" % failed
+        logger.info("Filled %d form field(s)", len(results))
+        return {field: result["value"] for field, result in results.items()}
+
+    def _fields(self, data, field_map):
+        fields = []
+        for entry in field_map:
+            value = data.get(entry["field"])
+            fields.append({
+                "field": entry["field"],
+                "by": self.BY_NAMES.get(entry.get("by", By.XPATH), "css"),
+                "selector": data.get(entry["locator"], entry["locator"]),
+                "value": None if value is None else str(value),
+            })
+        return fields
+
+    def _run(self, fields, timeout):
+        # Retries until every field is present, visible and enabled, then fills them all at once
+        def filled(driver):
+            outcome = driver.execute_script(self.FILL_SCRIPT, fields)
+            return outcome["results"] if not outcome["missing"] else None
+        return self.sync.until(filled, timeout, "Form fields not available: %s" % ", ".join(f["field"] for f in fields))
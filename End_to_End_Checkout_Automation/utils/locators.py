@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+
+logger = logging.getLogger(__name__)
+
+# //tag[@attribute='value'], the shape of most XPaths in the page objects and test_data.json
+SIMPLE_XPATH = re.compile(r"^//([\w-]+|\*)\[@([\w-]+)='([^']*)'\]$")
+
+def fast_candidates(by, value):
+    """
+    The given locator, preceded by a cheaper equivalent when one exists:
+    //tag[@id='x'] -> ID x, //tag[@attr='v'] -> CSS tag[attr="v"].
+    """
+    candidates = []
+    match = SIMPLE_XPATH.match(value) if by == By.XPATH else None
+    if match:
+        tag, attribute, attribute_value = match.groups()
+        if attribute == "id":
+            candidates.append((By.ID, attribute_value))
+        elif '"' not in attribute_value and "\\" not in attribute_value:
+            candidates.append((By.CSS_SELECTOR, '%s[%s="%s"]' % ("" if tag == "*" else tag, attribute, attribute_value)))
+    candidates.append((by, value))
+    return candidates
+
+class Locator:
+    '''
+    A named element locator with ordered fallbacks. Each lookup tries the candidates in order
+    (fast ID/CSS selectors first, the original XPath last) and reports how long every attempt took.
+    present(), visible() and clickable() are WebDriverWait conditions, like their expected_conditions
+    counterparts.
+    '''
+    def __init__(self, name, candidates, registry):
+        self.name = name
+        self.candidates = list(candidates)
+        self.registry = registry
+
+    def find(self, driver):
+        """Return the first element matched by the first candidate that matches, or None."""
+        for index, (by, value) in enumerate(self.candidates):
+            start = time.perf_counter()
+            elements = driver.find_elements(by, value)
+            self.registry.record(self, index, time.perf_counter() - start, bool(elements))
+            if elements:
+                return elements[0]
+        self.registry.record_miss(self)
+        return None
+
+    def present(self):
+        return lambda driver: self.find(driver) or False
+
+    def visible(self):
+        def condition(driver):
+            element = self.find(driver)
+            try:
+                return element if element is not None and element.is_displayed() else False
+            except StaleElementReferenceException:
+                return False
+        return condition
+
+    def clickable(self):
+        def condition(driver):
+            element = self.find(driver)
+            try:
+                return element if element is not None and element.is_displayed() and element.is_enabled() else False
+            except StaleElementReferenceException:
+                return False
+        return condition
+
+    def __repr__(self):
+        return "Locator(%s)" % self.name
+
+class LocatorRegistry:
+    '''
+    All locators by name, with resolution telemetry: attempts, hits, time spent per candidate,
+    and how often a lookup matched nothing at all. report() lists the slowest candidates first.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locators = {}
+        self._stats = {}
+        self._misses = {}
+
+    def register(self, name, *candidates):
+        """Return the locator called name, creating it from the (by, value) candidates the first time."""
+        with self._lock:
+            if name not in self._locators:
+                self._locators[name] = Locator(name, candidates, self)
+            return self._locators[name]
+
+    def from_data(self, name, by, value):
+        """Register a locator from data (e.g. an XPath in test_data.json), with a faster equivalent first."""
+        return self.register("%s[%s]" % (name, value), *fast_candidates(by, value))
+
+    def record(self, locator, index, duration, hit):
+        with self._lock:
+            stats = self._stats.setdefault((locator.name, index), {"attempts": 0, "hits": 0, "seconds": 0.0, "max_seconds": 0.0})
+            stats["attempts"] += 1
+            stats["hits"] += int(hit)
+            stats["seconds"] += duration
+            stats["max_seconds"] = max(stats["max_seconds"], duration)
+
+    def record_miss(self, locator):
+        with self._lock:
+            self._misses[locator.name] = self._misses.get(locator.name, 0) + 1
+
+    def report(self, limit=None):
+        with self._lock:
+            rows = []
+            for (name, index), stats in self._stats.items():
+                by, value = self._locators[name].candidates[index]
+                rows.append({
+                    "locator": name,
+                    "candidate": index,
+                    "strategy": "%s=%s" % (by, value),
+                    "attempts": stats["attempts"],
+                    "hits": stats["hits"],
+                    "misses": stats["attempts"] - stats["hits"],
+                    "lookup_misses": self._misses.get(name, 0),
+                    "total_ms": round(stats["seconds"] * 1000, 2),
+                    "mean_ms": round(stats["seconds"] * 1000 / stats["attempts"], 2),
+                    "max_ms": round(stats["max_seconds"] * 1000, 2),
+                })
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def export(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "locators.json")
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        logger.info("Locator telemetry written to %s", path)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._misses.clear()
+
+locators = LocatorRegistry()
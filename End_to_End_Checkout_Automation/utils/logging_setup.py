@@ -0,0 +1,100 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+from utils.config import Config
+from utils.timing import current_step
+from utils.worker import WorkerContext
+
+current_test = contextvars.ContextVar("current_test", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is kept as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "worker", "test", "step"}
+
+class ContextFilter(logging.Filter):
+    '''
+    Tags each record with the worker, test and step it was logged from. Runs on the logging
+    thread (the context variables live there); everything after it runs on the listener.
+    '''
+    def __init__(self, worker_id):
+        super().__init__()
+        self.worker_id = worker_id
+
+    def filter(self, record):
+        record.worker = self.worker_id
+        record.test = current_test.get()
+        record.step = current_step.get()
+        return True
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    '''
+    QueueHandler that hands the record over as-is. The stock handler merges the message
+    arguments and renders tracebacks before queueing, which is the work we want off the test thread.
+    '''
+    def prepare(self, record):
+        return record
+
+class JsonFormatter(logging.Formatter):
+    '''
+    One JSON object per line: time, level, logger, message, worker/test/step and any extra fields.
+    '''
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "worker": getattr(record, "worker", None),
+            "test": getattr(record, "test", None),
+            "step": getattr(record, "step", None),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_listener = None
+
+def configure_logging(worker=None, level=None):
+    """
+    Route every log record through a queue to a background listener that writes JSON lines to
+    this worker's logs/test.jsonl, rotated by size. Returns the listener; call stop_logging() at exit.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    worker = worker or WorkerContext()
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(worker.output_dir("logs"), "test.jsonl"),
+        maxBytes=Config.LOG_MAX_BYTES,
+        backupCount=Config.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter(worker.worker_id))
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level or Config.LOG_LEVEL)
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    _listener.queue_handler = queue_handler
+    return _listener
+
+def stop_logging():
+    """Drain the queue, close the log file and detach the queue handler."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_listener.queue_handler)
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import threading
+import time
+from pages.order_history_page import OrderHistoryPage
+
+logger = logging.getLogger(__name__)
+
+class OrderLedger:
+    '''
+    Every order placed during the run with what the cart said it should contain: its lines and
+    subtotal as validated on the cart page. reconcile() checks all of them at once against the
+    account's order history: one page load for the list and one call for the lines of every order.
+    An order must be listed, contain exactly the expected lines, have lines that add up to the
+    expected subtotal, and a total no lower than it (the difference is shipping, fees and tax).
+    '''
+    TOLERANCE = 0.01
+
+    def __init__(self, account=None):
+        self.account = account
+        self._lock = threading.Lock()
+        self.orders = {}
+        self.results = []
+
+    def record(self, number, lines, subtotal):
+        with self._lock:
+            self.orders[str(number)] = {
+                "lines": [{"name": line["name"], "qty": line["qty"], "total": line["total"]} for line in lines or []],
+                "subtotal": subtotal,
+            }
+        logger.info("Recorded order %s (%d lines, subtotal %s) for reconciliation", number, len(lines or []), subtotal)
+
+    def reconcile(self, driver):
+        """Check every recorded order against the order history; returns the list of discrepancies."""
+        with self._lock:
+            expected = dict(self.orders)
+        if not expected:
+            return []
+        history = OrderHistoryPage(driver).open()
+        placed = history.orders()
+        listed = {number: placed[number]["details_url"] for number in expected if number in placed}
+        lines = history.order_lines(listed)
+        problems = []
+        self.results = []
+        for number, order in sorted(expected.items()):
+            found = self._check(order, placed.get(number), lines.get(number))
+            self.results.append(dict(order, number=number, problems=found, placed=placed.get(number), placed_lines=lines.get(number)))
+            problems.extend("Order %s: %s" % (number, problem) for problem in found)
+        logger.info("Reconciled %d order(s) against the order history, %d discrepancies", len(expected), len(problems))
+        return problems
+
+    def _check(self, order, placed, placed_lines):
+        if placed is None:
+            return ["not in the order history"]
+        if placed_lines is None:
+            return ["order details could not be read"]
+        problems = []
+        # Expected lines come from the cart page when there was one; a resumed run may only know the subtotal
+        if order["lines"]:
+            wanted = self._by_name(order["lines"])
+            actual = self._by_name(placed_lines)
+            for name in sorted(set(wanted) | set(actual)):
+                if name not in actual:
+                    problems.append("'%s' is missing" % name)
+                elif name not in wanted:
+                    problems.append("unexpected line '%s'" % name)
+                elif wanted[name]["qty"] != actual[name]["qty"] or abs(wanted[name]["total"] - actual[name]["total"]) > self.TOLERANCE:
+                    problems.append("'%s' is %s x %.2f, expected %s x %.2f" % (
+                        name, actual[name]["qty"], actual[name]["total"], wanted[name]["qty"], wanted[name]["total"]))
+        if order["subtotal"] is not None:
+            lines_total = sum(line["total"] or 0 for line in placed_lines)
+            if abs(lines_total - order["subtotal"]) > self.TOLERANCE:
+                problems.append("lines add up to %.2f, the cart subtotal was %.2f" % (lines_total, order["subtotal"]))
+            if placed["total"] is None or placed["total"] + self.TOLERANCE < order["subtotal"]:
+                problems.append("order total %s is below the cart subtotal %.2f" % (placed["total"], order["subtotal"]))
+        return problems
+
+    @staticmethod
+    def _by_name(lines):
+        merged = {}
+        for line in lines:
+            entry = merged.setdefault(line["name"], {"qty": 0, "total": 0.0})
+            entry["qty"] += line["qty"] or 0
+            entry["total"] += line["total"] or 0.0
+        return merged
+
+    def export(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "orders.json")
+        with open(path, "w") as f:
+            json.dump({"account": self.account, "orders": self.results or self.orders}, f, indent=2)
+        return path
+
+class OrderReconciliation:
+    '''
+    The reconciliation of this process's ledger once its tests have run. Its outcome is reported when
+    the session ends: in the results store, the terminal summary and the exit status. A failure to
+    reconcile at all (no browser, history page not loading) is reported as a discrepancy. The xdist
+    controller has no ledger of its own and collects the workers' discrepancies with add().
+    '''
+    NAME = "order reconciliation"
+
+    def __init__(self):
+        self.ledger = None
+        self.started = None
+        self.duration = 0.0
+        self.problems = []
+
+    def run(self, ledger, pool, session_cache, account):
+        self.ledger = ledger
+        self.started = time.time()
+        try:
+            with pool.lease() as driver:
+                session_cache.login(driver, account["email"], account["password"])
+                self.problems = ledger.reconcile(driver)
+        except Exception as e:
+            logger.exception("Order reconciliation could not run")
+            self.problems = ["reconciliation could not run: %s" % e]
+        self.duration = time.time() - self.started
+        if self.problems:
+            logger.error("Order reconciliation failed:\n%s", "\n".join(self.problems))
+
+    def add(self, worker, problems):
+        self.problems.extend("%s: %s" % (worker, problem) for problem in problems)
+
+    @property
+    def outcome(self):
+        return "failed" if self.problems else "passed"
+
+    @property
+    def message(self):
+        return "\n".join(self.problems) or None
+
+    def export(self, directory):
+        path = self.ledger.export(directory)
+        logger.info("Order ledger written to %s", path)
+        return path
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import weakref
+from collections import defaultdict
+from selenium.common.exceptions import WebDriverException
+from utils.config import Config
+from utils.timing import current_step, percentile, NO_STEP
+
+logger = logging.getLogger(__name__)
+
+# Installed into every new document: keeps the latest LCP candidate and makes room for more
+# resource entries than the browser's default buffer of 250
+OBSERVER_SCRIPT = """
+    (function () {
+        if (window.__pageMetricsObserver) { return; }
+        window.__pageMetricsObserver = true;
+        try { performance.setResourceTimingBufferSize(2000); } catch (e) {}
+        try {
+            new PerformanceObserver(function (list) {
+                var entries = list.getEntries();
+                window.__largestContentfulPaint = entries[entries.length - 1].startTime;
+            }).observe({type: 'largest-contentful-paint', buffered: true});
+        } catch (e) {}
+    })();
+"""
+
+# Metrics of the current page in one round trip. The first capture in a document reports its
+# navigation timing and LCP; every capture reports the resources loaded since the previous one,
+# so in-page transitions (checkout steps) get only the XHRs they caused.
+CAPTURE_SCRIPT = """
+    var slowest = arguments[0];
+    var state = window.__pageMetrics || (window.__pageMetrics = {cursor: 0, captures: 0});
+    var resources = performance.getEntriesByType('resource');
+    var fresh = resources.slice(state.cursor);
+    state.cursor = resources.length;
+    var first = state.captures++ === 0;
+    function ms(value) { return value === undefined || value === null ? null : Math.round(value * 10) / 10; }
+    var bytes = 0, initiators = {};
+    fresh.forEach(function (entry) {
+        bytes += entry.transferSize || 0;
+        initiators[entry.initiatorType] = (initiators[entry.initiatorType] || 0) + 1;
+    });
+    var xhrs = fresh.filter(function (entry) {
+        return entry.initiatorType === 'xmlhttprequest' || entry.initiatorType === 'fetch';
+    }).sort(function (a, b) { return b.duration - a.duration; }).slice(0, slowest).map(function (entry) {
+        return {url: entry.name.split('?')[0], duration_ms: ms(entry.duration), transfer_bytes: entry.transferSize || 0};
+    });
+    var result = {
+        url: location.pathname,
+        navigation: first,
+        requests: fresh.length,
+        transfer_bytes: bytes,
+        initiators: initiators,
+        slowest_xhr: xhrs,
+        ttfb_ms: null, dom_content_loaded_ms: null, load_ms: null, lcp_ms: null
+    };
+    var nav = first ? performance.getEntriesByType('navigation')[0] : null;
+    if (nav) {
+        result.requests += 1;
+        result.transfer_bytes += nav.transferSize || 0;
+        result.ttfb_ms = ms(nav.responseStart - nav.startTime);
+        result.dom_content_loaded_ms = ms(nav.domContentLoadedEventEnd - nav.startTime);
+        result.load_ms = nav.loadEventEnd ? ms(nav.loadEventEnd - nav.startTime) : null;
+        result.lcp_ms = ms(window.__largestContentfulPaint);
+    }
+    return result;
+"""
+
+TIMING_FIELDS = ("ttfb_ms", "dom_content_loaded_ms", "load_ms", "lcp_ms")
+
+class PageMetrics:
+    '''
+    Browser-side performance of the storefront pages the suite reaches: Navigation and Resource
+    Timing, LCP, request count, transferred bytes and the slowest XHRs. Page objects call capture()
+    after each navigation or checkout step transition; every capture costs one WebDriver call.
+    Samples are aggregated per page by summary() and stored with the test in the results database.
+    '''
+    _observed = weakref.WeakSet()
+
+    def __init__(self, enabled=None, slowest=5):
+        self.enabled = Config.PAGE_METRICS if enabled is None else enabled
+        self.slowest = slowest
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples = []
+
+    def install(self, driver):
+        """Start observing LCP in every document the driver loads from now on (once per driver)."""
+        if not self.enabled or driver in self._observed:
+            return
+        try:
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": OBSERVER_SCRIPT})
+        except (AttributeError, WebDriverException):
+            logger.debug("CDP not available, page metrics are captured without LCP")
+        self._observed.add(driver)
+
+    def capture(self, driver, page):
+        """Record the metrics of the page the driver is on under the given page name."""
+        if not self.enabled:
+            return None
+        self.install(driver)
+        try:
+            sample = driver.execute_script(CAPTURE_SCRIPT, self.slowest)
+        except WebDriverException as e:
+            logger.warning("Unable to capture page metrics for %s: %s", page, e)
+            return None
+        sample["page"] = page
+        sample["step"] = current_step.get() or NO_STEP
+        with self._lock:
+            self.samples.append(sample)
+        logger.debug("Page metrics for %s: %s", page, sample)
+        return sample
+
+    def mark(self):
+        with self._lock:
+            return len(self.samples)
+
+    def samples_since(self, mark):
+        with self._lock:
+            return list(self.samples[mark:])
+
+    def summary(self):
+        with self._lock:
+            by_page = defaultdict(list)
+            for sample in self.samples:
+                by_page[sample["page"]].append(sample)
+        pages = {}
+        for page, samples in by_page.items():
+            entry = {"samples": len(samples)}
+            for field in TIMING_FIELDS + ("requests", "transfer_bytes"):
+                values = [sample[field] for sample in samples if sample.get(field) is not None]
+                if values:
+                    entry[field] = {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "max": max(values)}
+            xhrs = defaultdict(list)
+            for sample in samples:
+                for xhr in sample["slowest_xhr"]:
+                    xhrs[xhr["url"]].append(xhr["duration_ms"])
+            entry["slowest_xhr"] = sorted(
+                ({"url": url, "count": len(durations), "p50_ms": percentile(durations, 0.5), "max_ms": max(durations)}
+                 for url, durations in xhrs.items()),
+                key=lambda xhr: xhr["max_ms"], reverse=True,
+            )[:self.slowest]
+            pages[page] = entry
+        return pages
+
+    def export(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "pages.json")
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        logger.info("Page metrics written to %s", path)
+        return path
+
+page_metrics = PageMetrics()
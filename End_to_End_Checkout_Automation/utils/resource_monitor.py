@@ -0,0 +1,218 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import weakref
+from collections import defaultdict
+from selenium.common.exceptions import WebDriverException
+from utils.config import Config
+from utils.timing import NO_STEP, add_step_listener
+
+try:
+    import psutil
+except ImportError:
+    # Without psutil only the DevTools metrics (JS heap, DOM nodes) are sampled
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+FIELDS = ("rss_mb", "cpu_seconds", "js_heap_mb", "dom_nodes")
+
+class _BrowserState:
+    '''
+    What the monitor keeps per browser: its main process once found, the last CPU time seen for
+    every process of its tree (renderers come and go, their CPU time must not disappear with them),
+    and whether the DevTools Performance domain is enabled.
+    '''
+    def __init__(self):
+        self.process = None
+        self.searched = False
+        self.cpu = {}
+        self.performance = False
+
+class _Watch:
+    def __init__(self, driver, test, sample):
+        self.driver = driver
+        self.test = test
+        self.start = sample
+        self.last = sample
+        self.steps = []
+
+class ResourceMonitor:
+    '''
+    Resource usage of the browser each test runs in. The browser's process tree (main process,
+    renderers, GPU and utility processes) is sampled with psutil for RSS and CPU time, and DevTools
+    Performance.getMetrics gives the page's JS heap and DOM node count. A sample is taken when the
+    test gets its driver, after every step and when the test ends, so growth is attributed to the
+    step it happened in. A browser over RESOURCE_MAX_RSS_MB, RESOURCE_MAX_JS_HEAP_MB or
+    RESOURCE_MAX_DOM_NODES at the end of a test is reported by finish() so the pool can replace it.
+    The monitor's own commands bypass the timing instrumentation and do not count as test round trips.
+    '''
+    _browsers = weakref.WeakKeyDictionary()
+
+    def __init__(self, enabled=None, max_rss_mb=None, max_js_heap_mb=None, max_dom_nodes=None):
+        self.enabled = Config.RESOURCE_MONITOR if enabled is None else enabled
+        self.limits = {
+            "rss_mb": Config.RESOURCE_MAX_RSS_MB if max_rss_mb is None else max_rss_mb,
+            "js_heap_mb": Config.RESOURCE_MAX_JS_HEAP_MB if max_js_heap_mb is None else max_js_heap_mb,
+            "dom_nodes": Config.RESOURCE_MAX_DOM_NODES if max_dom_nodes is None else max_dom_nodes,
+        }
+        self._current = contextvars.ContextVar("resource_watch", default=None)
+        self._lock = threading.Lock()
+        self.reset()
+        add_step_listener(self.on_step)
+
+    def reset(self):
+        with self._lock:
+            self.tests = []
+            self.steps = defaultdict(list)
+
+    def start(self, driver, test):
+        """Take the baseline sample of the test's browser; steps ending from now on are attributed to this test."""
+        if not self.enabled:
+            return
+        self._current.set(_Watch(driver, test, self.sample(driver)))
+
+    def on_step(self, name):
+        watch = self._current.get()
+        if watch is None:
+            return
+        sample = self.sample(watch.driver)
+        growth = self._delta(watch.last, sample)
+        watch.steps.append(dict(growth, step=name))
+        watch.last = sample
+        with self._lock:
+            self.steps[name].append(growth)
+
+    def finish(self, driver):
+        """End the test's watch. Returns the limits its browser is over (empty when it can be reused)."""
+        watch = self._current.get()
+        if watch is None or watch.driver is not driver:
+            return []
+        self._current.set(None)
+        sample = self.sample(driver)
+        remainder = self._delta(watch.last, sample)
+        if any(remainder.values()):
+            watch.steps.append(dict(remainder, step=NO_STEP))
+            with self._lock:
+                self.steps[NO_STEP].append(remainder)
+        over = ["%s %s > %s" % (field, sample[field], limit) for field, limit in self.limits.items()
+                if limit and sample.get(field) is not None and sample[field] > limit]
+        entry = {"test": watch.test, "start": watch.start, "end": sample,
+                 "growth": self._delta(watch.start, sample), "steps": watch.steps, "recycled": over}
+        with self._lock:
+            self.tests.append(entry)
+        if over:
+            # Without psutil there is no RSS: name the steps that grew the JS heap instead
+            field = "rss_mb" if sample["rss_mb"] is not None else "js_heap_mb"
+            culprits = sorted((step for step in watch.steps if step[field] is not None), key=lambda step: step[field], reverse=True)[:3]
+            logger.warning("Browser of %s is over its resource limits (%s), replacing it. Largest %s growth: %s",
+                           watch.test, ", ".join(over), field, ", ".join("%s %+.1f" % (step["step"], step[field]) for step in culprits) or "n/a")
+        return over
+
+    def sample(self, driver):
+        """Current {"rss_mb", "cpu_seconds", "processes", "js_heap_mb", "dom_nodes"}; None where unavailable."""
+        state = self._browsers.setdefault(driver, _BrowserState())
+        sample = dict.fromkeys(FIELDS)
+        sample["processes"] = None
+        process = self._browser_process(driver, state)
+        if process is not None:
+            try:
+                tree = [process] + process.children(recursive=True)
+            except psutil.Error:
+                state.process = None
+                tree = []
+            rss = 0
+            for member in tree:
+                try:
+                    with member.oneshot():
+                        rss += member.memory_info().rss
+                        times = member.cpu_times()
+                    state.cpu[member.pid] = times.user + times.system
+                except psutil.Error:
+                    continue
+            if tree:
+                sample.update(rss_mb=round(rss / MB, 1), cpu_seconds=round(sum(state.cpu.values()), 2), processes=len(tree))
+        metrics = self._performance_metrics(driver, state)
+        if "JSHeapUsedSize" in metrics:
+            sample["js_heap_mb"] = round(metrics["JSHeapUsedSize"] / MB, 1)
+        if "Nodes" in metrics:
+            sample["dom_nodes"] = int(metrics["Nodes"])
+        return sample
+
+    @staticmethod
+    def _browser_process(driver, state):
+        # chromedriver starts every browser with its own --user-data-dir; the main process is the one without --type=
+        if psutil is None or state.searched:
+            return state.process
+        state.searched = True
+        user_data_dir = (driver.capabilities.get("chrome") or {}).get("userDataDir")
+        if not user_data_dir:
+            return None
+        flag = "--user-data-dir=%s" % user_data_dir
+        for process in psutil.process_iter(["cmdline"]):
+            cmdline = process.info.get("cmdline") or []
+            if flag in cmdline and not any(arg.startswith("--type=") for arg in cmdline):
+                state.process = process
+                break
+        else:
+            # Remote endpoint: only the DevTools metrics are available
+            logger.debug("No local browser process for session %s", driver.session_id)
+        return state.process
+
+    @staticmethod
+    def _performance_metrics(driver, state):
+        try:
+            if not state.performance:
+                ResourceMonitor._cdp(driver, "Performance.enable", {})
+                state.performance = True
+            metrics = ResourceMonitor._cdp(driver, "Performance.getMetrics", {})["metrics"]
+        except (KeyError, WebDriverException) as e:
+            # Not a Chromium session, or the browser is gone
+            logger.debug("Performance metrics unavailable: %s", e)
+            return {}
+        return {metric["name"]: metric["value"] for metric in metrics}
+
+    @staticmethod
+    def _cdp(driver, cmd, params):
+        # The class's execute, not the instance's timing wrapper
+        return type(driver).execute(driver, "executeCdpCommand", {"cmd": cmd, "params": params})["value"]
+
+    @staticmethod
+    def _delta(before, after):
+        return {field: round(after[field] - before[field], 2) if after[field] is not None and before[field] is not None else None
+                for field in FIELDS}
+
+    def report(self, limit=None):
+        """Steps by total RSS growth (JS heap, DOM nodes and browser CPU alongside)."""
+        with self._lock:
+            steps = {name: list(samples) for name, samples in self.steps.items()}
+        rows = []
+        for name, samples in steps.items():
+            row = {"step": name, "count": len(samples)}
+            for field in FIELDS:
+                values = [sample[field] for sample in samples if sample[field] is not None]
+                row[field + "_total"] = round(sum(values), 2) if values else None
+                row[field + "_max"] = max(values) if values else None
+            rows.append(row)
+        rows.sort(key=lambda row: (row["rss_mb_total"] or 0, row["js_heap_mb_total"] or 0), reverse=True)
+        return rows[:limit] if limit else rows
+
+    def recycled(self):
+        with self._lock:
+            return [{"test": entry["test"], "reasons": entry["recycled"]} for entry in self.tests if entry["recycled"]]
+
+    def export(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "resources.json")
+        with self._lock:
+            tests = list(self.tests)
+        with open(path, "w") as f:
+            json.dump({"limits": self.limits, "psutil": psutil is not None, "steps": self.report(),
+                       "recycled": self.recycled(), "tests": tests}, f, indent=2)
+        logger.info("Browser resource samples written to %s", path)
+        return path
+
+resource_monitor = ResourceMonitor()
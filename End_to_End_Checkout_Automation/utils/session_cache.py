@@ -0,0 +1,115 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from pages.login_page import LoginPage
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+class SessionCache:
+    '''
+    Logs each account in once and reuses its auth cookies across drivers and runs.
+    Cookies are stored per account on disk with an expiry. A new driver gets them injected
+    before its first navigation; if the storefront no longer accepts them, the cache entry is
+    dropped and the account logs in through the UI again.
+    '''
+    def __init__(self, base_url=None, cache_dir=None, ttl=None):
+        self.base_url = (base_url or Config.BASE_URL).rstrip("/")
+        self.cache_dir = cache_dir or Config.SESSION_CACHE_DIR
+        self.ttl = Config.SESSION_CACHE_TTL if ttl is None else ttl
+        self.logout_link = (By.LINK_TEXT, "Log out")
+
+    def login(self, driver, email, password, landing_path="/"):
+        """
+        Make the driver authenticated as the given account and leave it on landing_path.
+        Returns True if the cached session was reused, False if the UI login had to run.
+        """
+        cookies = self.load(email)
+        if cookies:
+            self.inject(driver, cookies)
+            driver.get(self.base_url + landing_path)
+            if self.is_authenticated(driver):
+                logger.info("Reused cached session for %s", email)
+                return True
+            logger.info("Cached session for %s is no longer valid, logging in through the UI", email)
+            self.invalidate(email)
+        driver.get(self.base_url + "/login")
+        LoginPage(driver).login(email, password)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located(self.logout_link))
+        self.save(email, driver.get_cookies())
+        if landing_path != "/":
+            driver.get(self.base_url + landing_path)
+        return False
+
+    def is_authenticated(self, driver):
+        return any(link.is_displayed() for link in driver.find_elements(*self.logout_link))
+
+    def load(self, email):
+        path = self._path(email)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) <= time.time():
+            logger.info("Cached session for %s has expired", email)
+            self.invalidate(email)
+            return None
+        return entry["cookies"]
+
+    def save(self, email, cookies):
+        expires_at = time.time() + self.ttl
+        # Never trust the cache for longer than the storefront itself keeps the cookies
+        cookie_expiries = [cookie["expiry"] for cookie in cookies if "expiry" in cookie]
+        if cookie_expiries:
+            expires_at = min(expires_at, min(cookie_expiries))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(email)
+        tmp_path = path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"email": email, "expires_at": expires_at, "cookies": cookies}, f)
+        os.replace(tmp_path, path)
+        logger.info("Cached session for %s until %s", email, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(expires_at)))
+
+    def invalidate(self, email):
+        try:
+            os.remove(self._path(email))
+        except FileNotFoundError:
+            pass
+
+    def inject(self, driver, cookies):
+        """Set the cookies on the driver. Chromium drivers take them before any page is loaded."""
+        try:
+            for cookie in cookies:
+                params = {
+                    "name": cookie["name"],
+                    "value": cookie["value"],
+                    "domain": cookie.get("domain"),
+                    "path": cookie.get("path", "/"),
+                    "secure": cookie.get("secure", False),
+                    "httpOnly": cookie.get("httpOnly", False),
+                }
+                if "expiry" in cookie:
+                    params["expires"] = cookie["expiry"]
+                if cookie.get("sameSite"):
+                    params["sameSite"] = cookie["sameSite"]
+                if not params["domain"]:
+                    params["url"] = self.base_url
+                    del params["domain"]
+                driver.execute_cdp_cmd("Network.setCookie", params)
+        except (AttributeError, WebDriverException):
+            # WebDriver can only add cookies for the domain of the page currently loaded
+            driver.get(self.base_url + "/favicon.ico")
+            for cookie in cookies:
+                driver.add_cookie({key: value for key, value in cookie.items() if key != "sameSite"})
+
+    def _path(self, email):
+        digest = hashlib.sha1(("%s|%s" % (self.base_url, email.lower())).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "%s.json" % digest)
@@ -0,0 +1,223 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+import allure
+
+logger = logging.getLogger(__name__)
+
+current_step = contextvars.ContextVar("current_step", default=None)
+NO_STEP = "(outside steps)"
+
+def percentile(values, fraction):
+    """Linear-interpolated percentile of a list of numbers (fraction in 0..1)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+class TimingRecorder:
+    '''
+    Collects how long every test step and every WebDriver command takes.
+    Steps are recorded by the step() context manager, commands by an instrumented driver,
+    each command tagged with the step it ran in and the page-object method that issued it.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.steps = defaultdict(list)
+            self.step_round_trips = defaultdict(list)
+            self.commands = defaultdict(list)
+            self.step_log = []
+
+    def record_step(self, name, duration, round_trips=0):
+        with self._lock:
+            self.steps[name].append(duration)
+            self.step_round_trips[name].append(round_trips)
+            self.step_log.append((name, duration, round_trips))
+
+    def mark(self):
+        """Position in the step log; pass it to steps_since() to get the steps recorded after it."""
+        with self._lock:
+            return len(self.step_log)
+
+    def steps_since(self, mark):
+        with self._lock:
+            return list(self.step_log[mark:])
+
+    def record_command(self, step, command, caller, duration):
+        with self._lock:
+            self.commands[(step, command, caller)].append(duration)
+
+    def step_samples(self):
+        """Copy of the recorded durations per step name."""
+        with self._lock:
+            return {name: list(durations) for name, durations in self.steps.items()}
+
+    def summary(self):
+        with self._lock:
+            steps = {
+                name: {
+                    "count": len(durations),
+                    "total_seconds": round(sum(durations), 6),
+                    "p50_seconds": round(percentile(durations, 0.5), 6),
+                    "p95_seconds": round(percentile(durations, 0.95), 6),
+                    "round_trips_p50": percentile(self.step_round_trips[name], 0.5),
+                    "round_trips_total": sum(self.step_round_trips[name]),
+                }
+                for name, durations in self.steps.items()
+            }
+            commands = [
+                {
+                    "step": step,
+                    "command": command,
+                    "caller": caller,
+                    "count": len(durations),
+                    "total_seconds": round(sum(durations), 6),
+                    "p50_seconds": round(percentile(durations, 0.5), 6),
+                    "p95_seconds": round(percentile(durations, 0.95), 6),
+                }
+                for (step, command, caller), durations in self.commands.items()
+            ]
+        commands.sort(key=lambda entry: entry["total_seconds"], reverse=True)
+        callers = defaultdict(lambda: {"count": 0, "total_seconds": 0.0})
+        for entry in commands:
+            callers[entry["caller"]]["count"] += entry["count"]
+            callers[entry["caller"]]["total_seconds"] = round(callers[entry["caller"]]["total_seconds"] + entry["total_seconds"], 6)
+        return {"steps": steps, "commands": commands, "callers": dict(callers)}
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def export_prometheus(self, path):
+        summary = self.summary()
+        lines = [
+            "# HELP checkout_step_duration_seconds Duration of test steps.",
+            "# TYPE checkout_step_duration_seconds summary",
+        ]
+        for name, stats in sorted(summary["steps"].items()):
+            label = 'step="%s"' % _escape_label(name)
+            lines.append('checkout_step_duration_seconds{%s,quantile="0.5"} %s' % (label, stats["p50_seconds"]))
+            lines.append('checkout_step_duration_seconds{%s,quantile="0.95"} %s' % (label, stats["p95_seconds"]))
+            lines.append("checkout_step_duration_seconds_sum{%s} %s" % (label, stats["total_seconds"]))
+            lines.append("checkout_step_duration_seconds_count{%s} %d" % (label, stats["count"]))
+        lines.append("# HELP checkout_step_round_trips_total WebDriver round trips issued inside each step.")
+        lines.append("# TYPE checkout_step_round_trips_total counter")
+        for name, stats in sorted(summary["steps"].items()):
+            lines.append('checkout_step_round_trips_total{step="%s"} %d' % (_escape_label(name), stats["round_trips_total"]))
+        lines.append("# HELP webdriver_command_duration_seconds Duration of WebDriver commands by step and page-object method.")
+        lines.append("# TYPE webdriver_command_duration_seconds summary")
+        for entry in summary["commands"]:
+            label = 'step="%s",command="%s",caller="%s"' % (_escape_label(entry["step"]), _escape_label(entry["command"]), _escape_label(entry["caller"]))
+            lines.append('webdriver_command_duration_seconds{%s,quantile="0.5"} %s' % (label, entry["p50_seconds"]))
+            lines.append('webdriver_command_duration_seconds{%s,quantile="0.95"} %s' % (label, entry["p95_seconds"]))
+            lines.append("webdriver_command_duration_seconds_sum{%s} %s" % (label, entry["total_seconds"]))
+            lines.append("webdriver_command_duration_seconds_count{%s} %d" % (label, entry["count"]))
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def export(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        json_path = self.export_json(os.path.join(directory, "timings.json"))
+        prom_path = self.export_prometheus(os.path.join(directory, "timings.prom"))
+        logger.info("Timing metrics written to %s and %s", json_path, prom_path)
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+timings = TimingRecorder()
+_round_trips = contextvars.ContextVar("round_trips", default=None)
+_step_listeners = []
+
+def add_step_listener(callback):
+    """Call callback(name) whenever a step ends, after its duration has been recorded."""
+    if callback not in _step_listeners:
+        _step_listeners.append(callback)
+
+@contextmanager
+def step(name, recorder=None):
+    '''
+    Drop-in replacement for allure.step that also records the step's duration and
+    the number of WebDriver round trips issued inside it.
+    '''
+    recorder = recorder or timings
+    token = current_step.set(name)
+    counter = [0]
+    counter_token = _round_trips.set(counter)
+    start = time.perf_counter()
+    try:
+        with allure.step(name):
+            yield
+    finally:
+        duration = time.perf_counter() - start
+        _round_trips.reset(counter_token)
+        current_step.reset(token)
+        parent = _round_trips.get()
+        if parent is not None:
+            parent[0] += counter[0]
+        recorder.record_step(name, duration, counter[0])
+        logger.debug("Step '%s' took %.3fs (%d round trips)", name, duration, counter[0])
+        for listener in _step_listeners:
+            try:
+                listener(name)
+            except Exception as e:
+                logger.warning("Step listener failed after '%s': %s", name, e)
+
+def _caller():
+    """Name the page-object method (or failing that, the helper) that issued the current command."""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("pages."):
+            return _describe(frame)
+        if fallback is None and module.startswith(("utils.", "tests.", "flows.")) and module != __name__:
+            fallback = _describe(frame)
+        frame = frame.f_back
+    return fallback or "unknown"
+
+def _describe(frame):
+    owner = frame.f_locals.get("self")
+    if owner is not None:
+        return "%s.%s" % (type(owner).__name__, frame.f_code.co_name)
+    return "%s.%s" % (frame.f_globals.get("__name__", "?").rsplit(".", 1)[-1], frame.f_code.co_name)
+
+def instrument(driver, recorder=None):
+    """
+    Time every WebDriver command the driver (and its elements) send. WebElement calls go through
+    driver.execute too, so one wrapper covers find_element, click, send_keys, execute_script, ...
+    Safe to call more than once.
+    """
+    if getattr(driver, "_timing_instrumented", False):
+        return driver
+    recorder = recorder or timings
+    original_execute = driver.execute
+
+    def execute(driver_command, params=None):
+        start = time.perf_counter()
+        try:
+            return original_execute(driver_command, params)
+        finally:
+            duration = time.perf_counter() - start
+            counter = _round_trips.get()
+            if counter is not None:
+                counter[0] += 1
+            recorder.record_command(current_step.get() or NO_STEP, driver_command, _caller(), duration)
+
+    driver.execute = execute
+    driver._timing_instrumented = True
+    return driver
@@ -0,0 +1,170 @@
+import logging
+import time
+import weakref
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException, WebDriverException
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+class PollingStrategy:
+    '''
+    Poll interval schedule for PageSync: starts fast and backs off geometrically up to a ceiling,
+    so quick responses are picked up within milliseconds without hammering the driver on slow ones.
+    '''
+    def __init__(self, initial=None, backoff=None, maximum=None):
+        self.initial = Config.SYNC_POLL_INITIAL if initial is None else initial
+        self.backoff = Config.SYNC_POLL_BACKOFF if backoff is None else backoff
+        self.maximum = Config.SYNC_POLL_MAX if maximum is None else maximum
+
+    def intervals(self):
+        interval = self.initial
+        while True:
+            yield interval
+            interval = min(interval * self.backoff, self.maximum)
+
+class PageSync:
+    '''
+    Waits for real readiness signals instead of fixed implicit waits:
+    document ready, no pending jQuery/XHR/fetch requests, no visible checkout "please wait" loaders,
+    and optionally a one-page-checkout step becoming the active one.
+    Every wait returns as soon as the storefront is ready and takes its own time budget.
+    first_of() waits for whichever of several page states comes first, so page objects can branch
+    on the state the storefront is in instead of waiting out a timeout to rule one out.
+    '''
+    # Counts in-flight and completed XHR and fetch requests; installed into every new document of the driver
+    REQUEST_TRACKER_SCRIPT = """
+        (function () {
+            if (window.__pendingRequests !== undefined) { return; }
+            window.__pendingRequests = 0;
+            window.__completedRequests = 0;
+            function done() { window.__pendingRequests--; window.__completedRequests++; }
+            var send = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.send = function () {
+                window.__pendingRequests++;
+                this.addEventListener('loadend', done);
+                return send.apply(this, arguments);
+            };
+            if (window.fetch) {
+                var fetch = window.fetch;
+                window.fetch = function () {
+                    window.__pendingRequests++;
+                    return fetch.apply(this, arguments).finally(done);
+                };
+            }
+        })();
+    """
+    PAGE_STATE_SCRIPT = """
+        var pending = Math.max(window.__pendingRequests || 0, 0) + (window.jQuery ? window.jQuery.active : 0);
+        var loading = Array.prototype.some.call(document.querySelectorAll('.please-wait'), function (el) {
+            return el.offsetParent !== null;
+        });
+        var step = arguments[0] ? document.getElementById('opc-' + arguments[0]) : null;
+        return {
+            ready: document.readyState === 'complete',
+            pending: pending,
+            completed: window.__completedRequests || 0,
+            loading: loading,
+            step_active: step ? step.classList.contains('active') : null
+        };
+    """
+    _instrumented = weakref.WeakSet()
+
+    def __init__(self, driver, timeout=None, polling=None):
+        self.driver = driver
+        self.timeout = Config.SYNC_TIMEOUT if timeout is None else timeout
+        self.polling = polling or PollingStrategy()
+        self.install_request_tracker()
+
+    def install_request_tracker(self):
+        """Register the XHR/fetch tracker for every document the driver loads from now on (once per driver)."""
+        if self.driver in self._instrumented:
+            return
+        try:
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": self.REQUEST_TRACKER_SCRIPT})
+        except (AttributeError, WebDriverException):
+            logger.debug("CDP not available, request tracking limited to jQuery.active")
+        self._instrumented.add(self.driver)
+
+    def until(self, condition, timeout=None, message=None):
+        """Poll condition(driver) on the polling schedule until it returns something truthy, and return that."""
+        budget = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + budget
+        intervals = self.polling.intervals()
+        while True:
+            try:
+                value = condition(self.driver)
+                if value:
+                    return value
+            except (NoSuchElementException, StaleElementReferenceException):
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutException(message or "Page did not become ready within %.1fs" % budget)
+            time.sleep(min(next(intervals), remaining))
+
+    def first_of(self, states, timeout=None):
+        """
+        Poll several named page states in one loop and return (name, value) of the first one that holds.
+        states maps a name to a condition(driver), like WebDriverWait conditions; on every poll they are
+        checked in the given order, so list the state that should win a tie first.
+        """
+        def any_state(driver):
+            for name, condition in states.items():
+                try:
+                    value = condition(driver)
+                except (NoSuchElementException, StaleElementReferenceException):
+                    continue
+                if value:
+                    return name, value
+            return None
+        name, value = self.until(any_state, timeout, "None of the page states (%s) was reached within the time budget" % ", ".join(states))
+        logger.debug("Page state '%s' reached", name)
+        return name, value
+
+    def page_state(self, step=None):
+        return self.driver.execute_script(self.PAGE_STATE_SCRIPT, step)
+
+    def wait_for_page_ready(self, timeout=None):
+        """Document loaded and no AJAX in flight."""
+        def ready(driver):
+            state = self.page_state()
+            return state["ready"] and state["pending"] == 0 and not state["loading"]
+        self.until(ready, timeout, "Page was not ready and idle within the time budget")
+
+    def document(self):
+        """The current document's root element, taken before a click that navigates; see wait_for_new_page()."""
+        return self.driver.find_element(By.TAG_NAME, "html")
+
+    def wait_for_new_page(self, old_document, timeout=None):
+        """
+        After a click that navigates: wait for `old_document` to be replaced, then for the new page to be
+        ready and idle. Right after the click the old document is often still there, complete and idle.
+        """
+        def replaced(driver):
+            try:
+                old_document.tag_name
+            except StaleElementReferenceException:
+                return True
+            return False
+        self.until(replaced, timeout, "The page did not navigate away within the time budget")
+        self.wait_for_page_ready(timeout)
+
+    def wait_for_ajax_idle(self, timeout=None):
+        """No jQuery/XHR/fetch requests pending and no loader visible, e.g. after a dropdown triggers a reload."""
+        def idle(driver):
+            state = self.page_state()
+            return state["pending"] == 0 and not state["loading"]
+        self.until(idle, timeout, "AJAX requests still pending after the time budget")
+
+    def wait_for_checkout_step(self, step, timeout=None):
+        """
+        Wait for the one-page-checkout to settle on a step, e.g. 'shipping' after Billing.save().
+        Steps are named after their container ids: billing, shipping, shipping_method,
+        payment_method, payment_info, confirm_order.
+        """
+        def settled(driver):
+            state = self.page_state(step)
+            return state["step_active"] and state["pending"] == 0 and not state["loading"]
+        self.until(settled, timeout, "Checkout step '%s' did not become active within the time budget" % step)
+        logger.debug("Checkout step '%s' is active", step)
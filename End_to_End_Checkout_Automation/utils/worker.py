@@ -0,0 +1,50 @@
+import os
+import re
+import logging
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+class WorkerContext:
+    '''
+    Identity and isolated output locations of the current test process.
+    Under pytest-xdist every worker (gw0, gw1, ...) gets its own output directory and its own
+    test account, so parallel workers never write to the same files or share a storefront session.
+    A serial run uses the worker id "main" and keeps the usual top-level directories.
+    '''
+    def __init__(self, worker_id=None):
+        self.worker_id = worker_id or os.getenv("PYTEST_XDIST_WORKER", "main")
+
+    @property
+    def parallel(self):
+        return self.worker_id != "main"
+
+    @property
+    def index(self):
+        match = re.search(r"(\d+)$", self.worker_id)
+        return int(match.group(1)) if match else 0
+
+    def output_dir(self, kind):
+        """Return (and create) the directory for one kind of output, e.g. 'screenshots' or 'logs'."""
+        if self.parallel:
+            path = os.path.join(Config.OUTPUT_DIR, "workers", self.worker_id, kind)
+        else:
+            path = os.path.join(Config.OUTPUT_DIR, kind)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def account(self, test_data):
+        """
+        Pick this worker's test account from test_data["accounts"].
+        Account fields override the shared "credentials" block, so recipient details stay shared.
+        """
+        accounts = test_data.get("accounts") or [test_data["credentials"]]
+        if self.index >= len(accounts):
+            raise RuntimeError(
+                "Worker %s needs test account #%d but test_data.json only defines %d; "
+                "add more entries to 'accounts' or run with fewer workers" % (self.worker_id, self.index + 1, len(accounts))
+            )
+        account = dict(test_data["credentials"])
+        account.update(accounts[self.index])
+        logger.info("Worker %s uses account %s", self.worker_id, account["email"])
+        return account